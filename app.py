@@ -1,109 +1,259 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, stream_with_context
+import hashlib
+import logging
 import os
-import sys
+from typing import Dict, Optional
 
-# Add backend to Python path
-PROJECT_DIR = r"C:\Users\tomco\Documents\Projects\el_plan"
-sys.path.append(os.path.join(PROJECT_DIR, 'backend'))
-
-from csv_handler import CSVHandler
-from ingredient_operations import IngredientOperations
-from meal_operations import MealOperations
-
-app = Flask(__name__)
-
-# Configuration
-CSV_DIR = PROJECT_DIR  # ingredients.csv is in main folder
-DATA_DIR = os.path.join(PROJECT_DIR, "data")  # generated CSVs go here
-STATIC_DIR = os.path.join(PROJECT_DIR, "static")
-TEMPLATES_DIR = os.path.join(PROJECT_DIR, "templates")
-
-# Ensure data directory exists
-os.makedirs(DATA_DIR, exist_ok=True)
-
-# Set template and static folders
-app.template_folder = TEMPLATES_DIR
-app.static_folder = STATIC_DIR
-
-print(f"Project dir: {PROJECT_DIR}")
-print(f"Looking for ingredients.csv at: {os.path.join(CSV_DIR, 'ingredients.csv')}")
-print(f"Ingredients file exists: {os.path.exists(os.path.join(CSV_DIR, 'ingredients.csv'))}")
-
-# Initialize operations
-csv_handler = CSVHandler(CSV_DIR, DATA_DIR)
-ingredient_ops = IngredientOperations(csv_handler)
-meal_ops = MealOperations(csv_handler)
-
-# Ensure servings_remaining column exists on startup
-csv_handler.ensure_servings_remaining_column()
-
-
-@app.route('/')
+from backend.metrics import REGISTRY, configure_logging, instrument_app
+from backend.services import NutritionServices
+
+logger = logging.getLogger(__name__)
+
+# Templates, static files and (by default) the data all live next to this file
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+bp = Blueprint('nutrition', __name__)
+
+# Requests name their user in this header; requests without it use the shared DATA_DIR
+TENANT_HEADER = 'X-User-ID'
+
+
+def default_config() -> Dict:
+    """Settings used when create_app() isn't given them; NUTRITION_* environment variables override"""
+    return {
+        # ingredients.csv is in main folder
+        'CSV_DIR': os.environ.get("NUTRITION_CSV_DIR", PROJECT_DIR),
+        # generated CSVs go here
+        'DATA_DIR': os.environ.get("NUTRITION_DATA_DIR", os.path.join(PROJECT_DIR, "data")),
+        # "csv", "sqlite" (data/nutrition.db) or "feather" (needs pyarrow) - both migrated from the CSVs on first run
+        'STORAGE_BACKEND': os.environ.get("NUTRITION_STORAGE_BACKEND", "csv"),
+        # Acknowledge new meals / daily entries / meal logs at once and persist them in the background
+        'WRITE_BEHIND': os.environ.get("NUTRITION_WRITE_BEHIND", "").lower() in ('1', 'true', 'yes'),
+        # Per-user data directories (DATA_DIR/users by default), and how many stay open at once
+        'TENANTS_DIR': os.environ.get("NUTRITION_TENANTS_DIR"),
+        'TENANT_POOL_SIZE': int(os.environ.get("NUTRITION_TENANT_POOL_SIZE", 64)),
+    }
+
+
+def create_app(config: Optional[Dict] = None) -> Flask:
+    """Build the Flask app; storage is opened lazily on the first request that needs it"""
+    configure_logging()
+
+    app = Flask(__name__)
+    app.config.update(default_config())
+    app.config.update(config or {})
+
+    # Per-route latency histograms and request / error counts, served on /metrics
+    instrument_app(app)
+    app.extensions['nutrition'] = NutritionServices(app.config)
+    app.register_blueprint(bp)
+
+    logger.info("App created data_dir=%s storage=%s", app.config['DATA_DIR'], app.config['STORAGE_BACKEND'])
+    return app
+
+
+def get_services():
+    """Storage and operations for the current request's user (built on first use, held until the request ends)"""
+    if 'services' not in g:
+        g.tenant_id = request.headers.get(TENANT_HEADER) or None
+        g.services = current_app.extensions['nutrition'].tenant(g.tenant_id)
+    return g.services
+
+
+@bp.teardown_app_request
+def release_services(exc):
+    """Let the tenant pool close the request's user data once it's evicted"""
+    if g.pop('services', None) is not None:
+        current_app.extensions['nutrition'].release(g.pop('tenant_id'))
+
+
+@bp.before_request
+def check_tenant():
+    """Reject user IDs that can't be used as a directory name"""
+    from backend.tenants import TENANT_ID_PATTERN
+
+    tenant_id = request.headers.get(TENANT_HEADER)
+    if tenant_id and not TENANT_ID_PATTERN.match(tenant_id):
+        return jsonify({'error': f"{TENANT_HEADER} must be 1-64 letters, digits, '-' or '_'"}), 400
+
+
+def json_response(payload, status: int = 200):
+    """JSON response through the shared serialiser (DataFrames are encoded column-wise)"""
+    from backend.serialization import to_json
+    return current_app.response_class(to_json(payload), status=status, mimetype='application/json')
+
+
+def collection_response(load_records, version):
+    """JSON list response supporting fields=, limit= and cursor=, with an ETag from the data version
+
+    The ETag covers the user, the data version and the query string, so an unchanged table answers
+    If-None-Match with 304 before any records are loaded. Without limit= the whole list is
+    returned; with it, X-Next-Cursor holds the cursor for the next page (absent on the last one).
+    """
+    tenant_id = request.headers.get(TENANT_HEADER, '')
+    etag = hashlib.sha1(f"{tenant_id}|{request.full_path}|{version}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        fields = [field for field in request.args.get('fields', '').split(',') if field]
+        limit = request.args.get('limit')
+        cursor = request.args.get('cursor', '0')
+        if not cursor.isdigit() or (limit is not None and (not limit.isdigit() or int(limit) < 1)):
+            return jsonify({'error': 'cursor and limit must be positive integers'}), 400
+        limit = int(limit) if limit is not None else None
+
+        records = load_records()  # A list of dicts or a DataFrame
+        start = int(cursor)
+        end = len(records) if limit is None else start + limit
+        if isinstance(records, list):
+            page = records[start:end]
+            if fields:
+                page = [{field: record.get(field) for field in fields} for record in page]
+        else:
+            page = records.iloc[start:end]
+            if fields:
+                page = page.reindex(columns=fields)
+
+        response = json_response(page)
+        response.headers['X-Total-Count'] = str(len(records))
+        if end < len(records):
+            response.headers['X-Next-Cursor'] = str(end)
+
+    response.set_etag(etag)
+    response.vary.add(TENANT_HEADER)
+    # Let browsers keep the response but revalidate it every time
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def bulk_records(key: str):
+    """Records for a bulk import: an uploaded .csv/.ndjson "file", a JSON array, or {key: [...]}"""
+    from backend.bulk_import import BulkImportError, parse_upload
+
+    if 'file' in request.files:
+        return parse_upload(request.files['file'])
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get(key)
+    if not isinstance(data, list):
+        raise BulkImportError([{'row': None, 'error': f'Send a JSON array, {{"{key}": [...]}} or a .csv/.ndjson file'}])
+    return data
+
+
+@bp.route('/metrics')
+def metrics():
+    """Request and storage metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
 
-@app.route('/daily-nutrition')
+@bp.route('/daily-nutrition')
 def daily_nutrition():
     """Daily nutrition tracking page"""
     return render_template('daily_nutrition.html')
 
 
-@app.route('/api/ingredients')
+@bp.route('/api/ingredients')
 def get_ingredients():
-    """Get all ingredients for dropdown"""
+    """Get all ingredients (supports fields=, limit=, cursor= and If-None-Match)"""
     try:
-        print("API call: /api/ingredients")
-        ingredients = ingredient_ops.get_all_ingredients()
-        print(f"Found {len(ingredients)} ingredients")
-        if len(ingredients) > 0:
-            print(f"First ingredient: {ingredients[0]}")
-        return jsonify(ingredients)
+        ingredient_ops = get_services().ingredient_ops
+        return collection_response(ingredient_ops.get_all_ingredients, ingredient_ops.catalog.version)
     except Exception as e:
-        print(f"Error in get_ingredients: {e}")
+        logger.exception("Error in get_ingredients: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/ingredient/<name>')
+@bp.route('/api/ingredients/search')
+def search_ingredients():
+    """Typeahead search over ingredient names"""
+    try:
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        return json_response(get_services().ingredient_ops.search_ingredients(query, limit))
+    except Exception as e:
+        logger.exception("Error in search_ingredients: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/ingredient/<name>')
 def get_ingredient(name):
     """Get specific ingredient details"""
     try:
-        ingredient = ingredient_ops.get_ingredient_by_name(name)
+        ingredient = get_services().ingredient_ops.get_ingredient_by_name(name)
         if ingredient:
-            return jsonify(ingredient)
+            return json_response(ingredient)
         return jsonify({'error': 'Ingredient not found'}), 404
     except Exception as e:
-        print(f"Error in get_ingredient: {e}")
+        logger.exception("Error in get_ingredient: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/ingredient/<name>/meals')
+def get_ingredient_meals(name):
+    """Meals that use an ingredient, with the quantity each one uses"""
+    try:
+        return json_response(get_services().meal_ops.get_meals_using_ingredient(name))
+    except Exception as e:
+        logger.exception("Error in get_ingredient_meals: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/calculate-nutrition', methods=['POST'])
+@bp.route('/api/calculate-nutrition', methods=['POST'])
 def calculate_nutrition():
     """Calculate nutrition for ingredient and quantity"""
     try:
         data = request.json
-        print(f"Calculate nutrition request: {data}")
-        nutrition = ingredient_ops.calculate_nutrition(data['name'], data['quantity'])
-        return jsonify(nutrition)
+        logger.debug("Calculate nutrition request payload=%s", data)
+        nutrition = get_services().ingredient_ops.calculate_nutrition(data['name'], data['quantity'])
+        return json_response(nutrition)
+    except Exception as e:
+        logger.exception("Error in calculate_nutrition: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/calculate-nutrition/batch', methods=['POST'])
+def calculate_nutrition_batch():
+    """Calculate nutrition for many ingredient lines in one request"""
+    try:
+        data = request.json
+        # Accept either a bare list or {"items": [...]}
+        items = data.get('items') if isinstance(data, dict) else data
+
+        if not isinstance(items, list):
+            return jsonify({'error': 'items must be a list of {name, quantity}'}), 400
+        for item in items:
+            if not isinstance(item, dict) or 'name' not in item or 'quantity' not in item:
+                return jsonify({'error': 'each item needs a name and a quantity'}), 400
+
+        logger.debug("Calculate nutrition batch request items=%d", len(items))
+        return json_response(get_services().ingredient_ops.calculate_nutrition_batch(items))
     except Exception as e:
-        print(f"Error in calculate_nutrition: {e}")
+        logger.exception("Error in calculate_nutrition_batch: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/meals', methods=['GET', 'POST'])
+@bp.route('/api/meals', methods=['GET', 'POST'])
 def meals():
     try:
         if request.method == 'GET':
-            """Get all meals"""
-            print("GET /api/meals - fetching all meals")
-            meals = meal_ops.get_all_meals()
-            print(f"Found {len(meals)} meals")
-            return jsonify(meals)
+            """Get all meals (supports fields=, limit=, cursor= and If-None-Match)"""
+            services = get_services()
+            # Persist queued writes and apply pending ingredient corrections first, so the ETag reflects them
+            services.meal_ops.flush_pending()
+            services.meal_ops.meal_nutrition.sync()
+            meals_version = services.csv_handler.file_version(services.csv_handler.meals_file)
+            return collection_response(services.meal_ops.get_all_meals_frame, meals_version)
 
         elif request.method == 'POST':
             """Create new meal - UPDATED to handle servings"""
             data = request.json
-            print(f"Create meal request: {data}")
+            logger.debug("Create meal request payload=%s", data)
 
             # Extract required parameters
             meal_name = data.get('meal_name')
@@ -118,27 +268,59 @@ def meals():
             if servings < 1:
                 return jsonify({'error': 'servings must be at least 1'}), 400
 
-            print(f"Creating meal: {meal_name}, servings: {servings}, ingredients: {len(ingredients)}")
+            logger.info("Creating meal name=%s servings=%s ingredients=%d", meal_name, servings, len(ingredients))
 
             # Create the meal
-            meal = meal_ops.create_meal(meal_name, servings, ingredients)
-            return jsonify(meal)
+            meal = get_services().meal_ops.create_meal(meal_name, servings, ingredients)
+            return json_response(meal)
 
     except Exception as e:
-        print(f"Error in meals endpoint: {e}")
-        import traceback
-        traceback.print_exc()  # Print full traceback for debugging
+        logger.exception("Error in meals endpoint: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/daily-nutrition/<date>', methods=['GET', 'POST', 'DELETE'])
+@bp.route('/api/meals/bulk', methods=['POST'])
+def import_meals():
+    """Create many meals in one request (all or nothing)"""
+    from backend.bulk_import import BulkImportError
+
+    try:
+        new_meals = get_services().meal_ops.import_meals(bulk_records('meals'))
+        return json_response({'imported': len(new_meals), 'meals': new_meals})
+    except BulkImportError as e:
+        return jsonify({'error': str(e), 'errors': e.errors}), 400
+    except Exception as e:
+        logger.exception("Error importing meals: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/meals/recompute', methods=['POST'])
+def recompute_meal_nutrition():
+    """Refresh stored meal totals after ingredient corrections
+
+    Optional JSON body: {"ingredients": [names]} to pick the ingredients, or {"all": true}
+    for every meal; by default only meals using ingredients changed in ingredients.csv.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ingredients = data.get('ingredients')
+        if ingredients is not None and not isinstance(ingredients, list):
+            return jsonify({'error': 'ingredients must be a list of names'}), 400
+
+        result = get_services().meal_ops.recompute_meal_nutrition(ingredients, bool(data.get('all')))
+        return json_response(result)
+    except Exception as e:
+        logger.exception("Error recomputing meal nutrition: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/daily-nutrition/<date>', methods=['GET', 'POST', 'DELETE'])
 def daily_nutrition_api(date):
     """API endpoints for daily nutrition tracking"""
     try:
         if request.method == 'GET':
             """Get all meals logged for a specific date"""
-            daily_meals = meal_ops.get_daily_nutrition(date)
-            return jsonify(daily_meals)
+            return json_response(get_services().meal_ops.get_daily_nutrition_frame(date))
 
         elif request.method == 'POST':
             """Add a meal to a specific date"""
@@ -149,50 +331,197 @@ def daily_nutrition_api(date):
             if not meal_id:
                 return jsonify({'error': 'meal_id is required'}), 400
 
-            daily_entry = meal_ops.add_meal_to_daily_nutrition(date, meal_id, servings)
-            return jsonify(daily_entry)
+            daily_entry = get_services().meal_ops.add_meal_to_daily_nutrition(date, meal_id, servings)
+            return json_response(daily_entry)
 
         elif request.method == 'DELETE':
             """Clear all meals for a specific date"""
-            meal_ops.clear_daily_nutrition(date)
+            get_services().meal_ops.clear_daily_nutrition(date)
             return jsonify({'message': f'Daily nutrition cleared for {date}'})
 
     except Exception as e:
-        print(f"Error in daily_nutrition_api: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in daily_nutrition_api: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/daily-nutrition/bulk', methods=['POST'])
+def import_daily_entries():
+    """Add many {date, meal_id, servings} entries in one request (all or nothing)"""
+    from backend.bulk_import import BulkImportError
+
+    try:
+        new_entries = get_services().meal_ops.import_daily_entries(bulk_records('entries'))
+        return json_response({'imported': len(new_entries), 'entries': new_entries})
+    except BulkImportError as e:
+        return jsonify({'error': str(e), 'errors': e.errors}), 400
+    except Exception as e:
+        logger.exception("Error importing daily nutrition: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/daily-nutrition/<date>/entry/<int:entry_id>', methods=['DELETE'])
+@bp.route('/api/daily-nutrition/<date>/entry/<int:entry_id>', methods=['DELETE'])
 def remove_daily_nutrition_entry(date, entry_id):
     """Remove a specific meal entry from daily nutrition"""
     try:
-        meal_ops.remove_daily_nutrition_entry(date, entry_id)
+        get_services().meal_ops.remove_daily_nutrition_entry(date, entry_id)
         return jsonify({'message': 'Entry removed successfully'})
     except Exception as e:
-        print(f"Error removing daily nutrition entry: {e}")
+        logger.exception("Error removing daily nutrition entry: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/log-meal', methods=['POST'])
+@bp.route('/api/nutrition-summary')
+def nutrition_summary():
+    """Nutrient totals per day (or week) between ?from= and ?to= (YYYY-MM-DD, inclusive)"""
+    try:
+        summary = get_services().meal_ops.get_nutrition_summary(
+            request.args.get('from'),
+            request.args.get('to'),
+            request.args.get('granularity', 'day')
+        )
+        return json_response(summary)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error in nutrition_summary: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/ingredient-consumption')
+def ingredient_consumption():
+    """Per-ingredient quantities eaten and nutrients contributed between ?from= and ?to= (inclusive)
+
+    ?sort= quantity or a nutrient column (default calories), ?limit= keeps the top N.
+    """
+    try:
+        limit = request.args.get('limit')
+        if limit is not None and not limit.isdigit():
+            raise ValueError('limit must be a positive integer')
+        limit = int(limit) if limit is not None else None
+        report = get_services().meal_ops.get_ingredient_consumption(
+            request.args.get('from'),
+            request.args.get('to'),
+            request.args.get('sort', 'calories'),
+            limit
+        )
+        return json_response(report)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error in ingredient_consumption: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/meal-plan', methods=['POST'])
+def meal_plan():
+    """Plan servings of stored meals over several days to hit daily targets
+
+    JSON body: {"targets": {"calories": 2000, "protein": 120, ...}, "limits": {"sodium": 2300},
+    "days": 7, "serving_step": 0.5, "max_servings_per_meal": 2, "time_budget_ms": 500,
+    "start_date": "YYYY-MM-DD"} - only targets is required.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data.get('targets'), dict):
+            return jsonify({'error': 'targets must be an object of {nutrient: daily amount}'}), 400
+        if data.get('limits') is not None and not isinstance(data['limits'], dict):
+            return jsonify({'error': 'limits must be an object of {nutrient: daily maximum}'}), 400
+
+        try:
+            options = {
+                'serving_step': float(data.get('serving_step', 0.5)),
+                'max_servings_per_meal': float(data.get('max_servings_per_meal', 2)),
+                'time_budget_ms': min(float(data.get('time_budget_ms', 500)), 5000),
+                'start_date': data.get('start_date'),
+            }
+            days = int(data.get('days', 7))
+            plan = get_services().meal_ops.plan_meals(data['targets'], data.get('limits'), days, **options)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        return json_response(plan)
+    except Exception as e:
+        logger.exception("Error in meal_plan: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/meals/<int:meal_id>/what-if', methods=['POST'])
+def meal_what_if(meal_id):
+    """Nutrition of a stored meal with overrides applied, for many variants at once (nothing is saved)
+
+    JSON body: {"variants": [{"label": "...", "scale": 1.5, "servings": 6,
+    "quantities": {"Rice": 200}, "substitutions": {"Butter": "Olive oil"},
+    "add": [{"name": "Spinach", "quantity": 50}], "remove": ["Salt"]}, ...]}
+    or a single variant object.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Body must be a variant object or {"variants": [...]}'}), 400
+        variants = data['variants'] if 'variants' in data else [data]
+        if not isinstance(variants, list):
+            return jsonify({'error': 'variants must be a list'}), 400
+
+        try:
+            result = get_services().meal_ops.evaluate_meal_variants(meal_id, variants)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if result is None:
+            return jsonify({'error': 'Meal not found'}), 404
+
+        return json_response(result)
+    except Exception as e:
+        logger.exception("Error in meal_what_if: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/export/<table>')
+def export_history(table):
+    """Stream daily_nutrition or meal_log as ?format=csv|ndjson, optionally limited by ?from=&to="""
+    from backend.history_export import HistoryExporter, EXPORT_FORMATS
+
+    try:
+        export_format = request.args.get('format', 'csv')
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+
+        services = get_services()
+        services.meal_ops.flush_pending()
+        exporter = HistoryExporter(services.csv_handler)
+        exporter.validate(table, export_format, date_from, date_to)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Rows are read and sent one chunk at a time, so memory stays flat however big the table
+    chunks = exporter.export(table, export_format, date_from, date_to)
+    filename = f"{table}_{date_from or 'start'}_{date_to or 'end'}.{export_format}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+@bp.route('/api/log-meal', methods=['POST'])
 def log_meal():
     """Log a meal consumption"""
     try:
         data = request.json
-        log = meal_ops.log_meal(
+        log = get_services().meal_ops.log_meal(
             data['meal_id'],
             data['meal_time'],
             data.get('date'),
             data.get('notes', '')
         )
-        return jsonify(log)
+        return json_response(log)
     except Exception as e:
-        print(f"Error in log_meal: {e}")
+        logger.exception("Error in log_meal: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
+# Module-level app for `flask --app app run` and `from app import app`; cheap, since storage is lazy
+app = create_app()
+
 if __name__ == '__main__':
-    print("Starting Nutrition & Meal Planning App...")
-    print("Visit: http://localhost:5000")
-    app.run(debug=True, host='localhost', port=5000)
\ No newline at end of file
+    logger.info("Starting Nutrition & Meal Planning App at http://localhost:5000")
+    app.run(debug=True, host='localhost', port=5000)
@@ -0,0 +1,137 @@
+import io
+import json
+import math
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List
+from .serialization import dataframe_to_records
+
+
+class BulkImportError(ValueError):
+    """A bulk import was rejected; errors lists every problem as {'row': index, 'error': message}"""
+
+    def __init__(self, errors: List[Dict]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid record(s), nothing was imported")
+
+
+def parse_upload(upload) -> List[Dict]:
+    """Records from an uploaded .csv or .ndjson / .jsonl file (a werkzeug FileStorage)"""
+    filename = (upload.filename or '').lower()
+    text = upload.read().decode('utf-8-sig')
+
+    if filename.endswith(('.ndjson', '.jsonl')) or upload.mimetype == 'application/x-ndjson':
+        return parse_ndjson(text)
+    if filename.endswith('.csv') or upload.mimetype == 'text/csv':
+        return dataframe_to_records(pd.read_csv(io.StringIO(text)))
+
+    raise BulkImportError([{'row': None, 'error': 'Upload must be a .csv or .ndjson file'}])
+
+
+def parse_ndjson(text: str) -> List[Dict]:
+    """One JSON object per non-blank line"""
+    records, errors = [], []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            errors.append({'row': line_number, 'error': f'Invalid JSON: {e}'})
+            continue
+        if not isinstance(record, dict):
+            errors.append({'row': line_number, 'error': 'Each line must be a JSON object'})
+            continue
+        records.append(record)
+
+    if errors:
+        raise BulkImportError(errors)
+    return records
+
+
+def _json_value(value):
+    """Lists can arrive as real lists (JSON) or JSON-encoded strings (CSV cells)"""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def parse_meal(record: Dict, known_ingredient) -> Dict:
+    """Validated {meal_name, servings, ingredients} from an import record, or ValueError
+
+    Ingredients come either as 'ingredients' ([{name, quantity}]) or as the
+    'ingredients_list' / 'quantities_list' pair stored in meals.csv.
+    """
+    meal_name = str(record.get('meal_name') or '').strip()
+    if not meal_name:
+        raise ValueError('meal_name is required')
+
+    servings = record.get('servings')
+    if servings is None or (isinstance(servings, str) and not servings.strip()):
+        servings = 1  # Missing key or blank CSV cell
+    try:
+        servings = float(servings)
+    except (TypeError, ValueError):
+        raise ValueError('servings must be a number')
+    if not servings.is_integer():
+        raise ValueError('servings must be a whole number')
+    servings = int(servings)
+    if servings < 1:
+        raise ValueError('servings must be at least 1')
+
+    try:
+        if record.get('ingredients') is not None:
+            ingredients = _json_value(record['ingredients'])
+        else:
+            names = _json_value(record.get('ingredients_list') or '[]')
+            quantities = _json_value(record.get('quantities_list') or '[]')
+            if len(names) != len(quantities):
+                raise ValueError('ingredients_list and quantities_list must be the same length')
+            ingredients = [{'name': name, 'quantity': quantity} for name, quantity in zip(names, quantities)]
+    except (TypeError, json.JSONDecodeError):
+        raise ValueError('ingredients must be a list of {name, quantity}')
+
+    if not isinstance(ingredients, list) or not ingredients:
+        raise ValueError('ingredients list is required')
+
+    parsed = []
+    for ingredient in ingredients:
+        if not isinstance(ingredient, dict) or not ingredient.get('name'):
+            raise ValueError('each ingredient needs a name and a quantity')
+        try:
+            quantity = float(ingredient.get('quantity'))
+        except (TypeError, ValueError):
+            raise ValueError(f"quantity for {ingredient['name']} must be a number")
+        if not math.isfinite(quantity) or quantity <= 0:
+            raise ValueError(f"quantity for {ingredient['name']} must be greater than 0")
+        if not known_ingredient(ingredient['name']):
+            raise ValueError(f"Unknown ingredient: {ingredient['name']}")
+        parsed.append({'name': ingredient['name'], 'quantity': quantity})
+
+    return {'meal_name': meal_name, 'servings': servings, 'ingredients': parsed}
+
+
+def parse_daily_entry(record: Dict) -> Dict:
+    """Validated {date, meal_id, servings} from an import record, or ValueError"""
+    date = str(record.get('date') or '')
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError('date must be YYYY-MM-DD')
+
+    try:
+        meal_id = float(record.get('meal_id'))
+    except (TypeError, ValueError):
+        raise ValueError('meal_id is required')
+    if not meal_id.is_integer():
+        raise ValueError('meal_id must be an integer')
+
+    servings = record.get('servings', record.get('servings_consumed'))
+    try:
+        servings = float(1 if servings is None else servings)
+    except (TypeError, ValueError):
+        raise ValueError('servings must be a number')
+    if not math.isfinite(servings) or servings <= 0:
+        raise ValueError('servings must be greater than 0')
+
+    return {'date': date, 'meal_id': int(meal_id), 'servings': servings}
@@ -1,10 +1,166 @@
 import pandas as pd
+import logging
+import csv
+import io
 import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from .file_lock import locked
+from .metrics import instrument_storage
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Column layout of each generated table
+MEALS_COLUMNS = [
+    'meal_id', 'meal_name', 'servings', 'servings_remaining', 'ingredients_list', 'quantities_list',
+    # Total nutrition
+    'total_calories', 'total_protein', 'total_fat_total', 'total_fat_saturated',
+    'total_carbohydrate', 'total_sugars', 'total_dietary_fibre_g',
+    'total_sodium_mg', 'total_calcium_mg',
+    # Per serving nutrition
+    'calories_per_serving', 'protein_per_serving', 'fat_total_per_serving',
+    'fat_saturated_per_serving', 'carbohydrate_per_serving', 'sugars_per_serving',
+    'dietary_fibre_per_serving', 'sodium_per_serving', 'calcium_per_serving',
+    'created_date'
+]
+
+MEAL_LOG_COLUMNS = [
+    'log_id', 'date', 'meal_time', 'meal_id', 'meal_name', 'servings',
+    'ingredients_list', 'quantities_list',
+    # Total nutrition
+    'total_calories', 'total_protein', 'total_fat_total', 'total_fat_saturated',
+    'total_carbohydrate', 'total_sugars', 'total_dietary_fibre_g',
+    'total_sodium_mg', 'total_calcium_mg',
+    # Per serving nutrition
+    'calories_per_serving', 'protein_per_serving', 'fat_total_per_serving',
+    'fat_saturated_per_serving', 'carbohydrate_per_serving', 'sugars_per_serving',
+    'dietary_fibre_per_serving', 'sodium_per_serving', 'calcium_per_serving',
+    'notes'
+]
+
+DAILY_NUTRITION_COLUMNS = [
+    'entry_id', 'date', 'meal_id', 'meal_name', 'servings_consumed',
+    'calories_consumed', 'protein_consumed', 'fat_total_consumed',
+    'fat_saturated_consumed', 'carbohydrate_consumed', 'sugars_consumed',
+    'dietary_fibre_consumed', 'sodium_consumed', 'calcium_consumed',
+    'added_timestamp'
+]
+
+# One row per ingredient line of a meal (position = index in the meal's ingredient list)
+MEAL_INGREDIENTS_COLUMNS = ['meal_id', 'position', 'ingredient_name', 'quantity']
+
+# Columns typed as text / integers by the typed backends - everything else is a
+# float nutrient or servings value
+TEXT_COLUMNS = {
+    'meal_name', 'ingredients_list', 'quantities_list', 'created_date',
+    'date', 'meal_time', 'notes', 'added_timestamp', 'ingredient_name'
+}
+INTEGER_COLUMNS = {'meal_id', 'log_id', 'entry_id', 'entries', 'position'}
+
+# Rows per chunk when streaming a table
+CHUNK_ROWS = 5000
+
+# Rows per chunk when a stream is only summed (each chunk shrinks to one row per meal)
+SUM_CHUNK_ROWS = 100000
+
+# Nutrient columns of daily_nutrition that are summed per day
+CONSUMED_COLUMNS = [
+    'calories_consumed', 'protein_consumed', 'fat_total_consumed',
+    'fat_saturated_consumed', 'carbohydrate_consumed', 'sugars_consumed',
+    'dietary_fibre_consumed', 'sodium_consumed', 'calcium_consumed'
+]
+
+# Nutrient columns of meals, in ingredient NUTRIENT_COLUMNS order
+MEAL_TOTAL_COLUMNS = MEALS_COLUMNS[6:15]
+MEAL_PER_SERVING_COLUMNS = MEALS_COLUMNS[15:24]
+
+# Per-date sums of daily_nutrition, maintained incrementally
+DAILY_ROLLUP_COLUMNS = ['date', 'entries', 'servings_consumed'] + CONSUMED_COLUMNS
+
+# Dates look like YYYY-MM-DD; the YYYY-MM prefix picks the partition file
+PARTITION_DATE_PATTERN = re.compile(r'^(\d{4}-\d{2})')
+
+
+class _CompleteRows(io.RawIOBase):
+    """Read-only view of an open file that stops at a fixed byte offset"""
+
+    def __init__(self, f, end: int):
+        self._f = f
+        self._remaining = end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        size = min(len(b), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._f.readinto(memoryview(b)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+class ServingsUnitOfWork:
+    """Collects servings_remaining changes per meal and commits them in one update
+
+    Create it through CSVHandler.servings_unit_of_work(), which holds the meals table lock
+    until the changes are committed. meals.csv is read at most once for the whole unit.
+    """
+
+    def __init__(self, handler: 'CSVHandler'):
+        self.handler = handler
+        self.changes: Dict = {}
+        self._meals_df: Optional[pd.DataFrame] = None
+
+    def _meals(self) -> pd.DataFrame:
+        if self._meals_df is None:
+            self._meals_df = self.handler.read_csv(self.handler.meals_file)
+        return self._meals_df
+
+    def get_meal(self, meal_id) -> Optional[Dict]:
+        """Meal row as stored (NaN for missing values), or None"""
+        meals_df = self._meals()
+        if meals_df.empty:
+            return None
+
+        meal = meals_df[meals_df['meal_id'] == meal_id]
+        return meal.iloc[0].to_dict() if not meal.empty else None
+
+    def add(self, meal_id, servings_change: float):
+        """Queue a change to a meal's servings_remaining (positive = add, negative = subtract)"""
+        meal_id = _normalise_id(meal_id)
+        self.changes[meal_id] = self.changes.get(meal_id, 0.0) + float(servings_change)
+
+    def commit(self) -> Dict:
+        """Apply all queued changes at once"""
+        results = self.handler.apply_servings_changes(self.changes, self._meals_df)
+        self.changes = {}
+        self._meals_df = None
+        return results
+
+
+def _normalise_id(value):
+    """7, 7.0, np.int64(7) and "7" all become 7 so they group together"""
+    try:
+        as_float = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(as_float) if as_float.is_integer() else value
 
 
 class CSVHandler:
+    # Unit of work used by servings_unit_of_work() - storage backends can override it
+    unit_of_work_class = ServingsUnitOfWork
+
     def __init__(self, csv_dir: str, data_dir: str):
         self.csv_dir = csv_dir  # Main folder with ingredients.csv
         self.data_dir = data_dir  # Data folder for generated CSVs
@@ -13,6 +169,23 @@ class CSVHandler:
         self.ingredients_file = os.path.join(csv_dir, "ingredients.csv")
         self.meals_file = os.path.join(data_dir, "meals.csv")
         self.meal_log_file = os.path.join(data_dir, "meal_log.csv")
+        self.daily_nutrition_file = os.path.join(data_dir, "daily_nutrition.csv")
+
+        # daily_nutrition is stored as one CSV per month (YYYY-MM.csv) in this folder,
+        # so reading or deleting a day only touches that month's file
+        self.daily_nutrition_dir = os.path.join(data_dir, "daily_nutrition")
+        self.daily_rollup_file = os.path.join(data_dir, "daily_rollup.csv")
+        # Per-unit ingredient nutrients that meal totals were last computed from
+        self.catalog_snapshot_file = os.path.join(data_dir, "catalog_snapshot.csv")
+        # Meals' ingredient lines, one row each (derived from meals' ingredients_list / quantities_list)
+        self.meal_ingredients_file = os.path.join(data_dir, "meal_ingredients.csv")
+
+        # Daily nutrition partition file -> (file version, servings_by_meal() sums for the whole month)
+        self._partition_servings: Dict[str, Tuple[Tuple, pd.DataFrame]] = {}
+
+        # Next-ID counters: (file_path, id_column) -> [next_id, file version it was valid for]
+        self._id_counters: Dict[Tuple[str, str], list] = {}
+        self._id_lock = threading.Lock()
 
         self._initialize_csv_files()
 
@@ -21,47 +194,395 @@ class CSVHandler:
 
         # Meals database - stores created meal recipes (UPDATED with servings and servings_remaining)
         if not os.path.exists(self.meals_file):
-            meals_df = pd.DataFrame(columns=[
-                'meal_id', 'meal_name', 'servings', 'servings_remaining', 'ingredients_list', 'quantities_list',
-                # Total nutrition
-                'total_calories', 'total_protein', 'total_fat_total', 'total_fat_saturated',
-                'total_carbohydrate', 'total_sugars', 'total_dietary_fibre_g',
-                'total_sodium_mg', 'total_calcium_mg',
-                # Per serving nutrition
-                'calories_per_serving', 'protein_per_serving', 'fat_total_per_serving',
-                'fat_saturated_per_serving', 'carbohydrate_per_serving', 'sugars_per_serving',
-                'dietary_fibre_per_serving', 'sodium_per_serving', 'calcium_per_serving',
-                'created_date'
-            ])
-            meals_df.to_csv(self.meals_file, index=False)
+            pd.DataFrame(columns=MEALS_COLUMNS).to_csv(self.meals_file, index=False)
 
         # Meal log - logs when meals are consumed (UPDATED with servings)
         if not os.path.exists(self.meal_log_file):
-            meal_log_df = pd.DataFrame(columns=[
-                'log_id', 'date', 'meal_time', 'meal_id', 'meal_name', 'servings',
-                'ingredients_list', 'quantities_list',
-                # Total nutrition
-                'total_calories', 'total_protein', 'total_fat_total', 'total_fat_saturated',
-                'total_carbohydrate', 'total_sugars', 'total_dietary_fibre_g',
-                'total_sodium_mg', 'total_calcium_mg',
-                # Per serving nutrition
-                'calories_per_serving', 'protein_per_serving', 'fat_total_per_serving',
-                'fat_saturated_per_serving', 'carbohydrate_per_serving', 'sugars_per_serving',
-                'dietary_fibre_per_serving', 'sodium_per_serving', 'calcium_per_serving',
-                'notes'
-            ])
-            meal_log_df.to_csv(self.meal_log_file, index=False)
+            pd.DataFrame(columns=MEAL_LOG_COLUMNS).to_csv(self.meal_log_file, index=False)
 
-    def read_csv(self, file_path: str) -> pd.DataFrame:
-        """Safely read CSV file"""
+        # Daily nutrition - servings of meals eaten on each date, partitioned by month
+        if not os.path.exists(self.daily_nutrition_dir):
+            with self.locked(self.daily_nutrition_file):
+                # Another worker may have migrated while we waited for the lock
+                if not os.path.exists(self.daily_nutrition_dir):
+                    self._partition_daily_nutrition()
+
+    def locked(self, file_path: str):
+        """Exclusive lock on a table across threads and processes (re-entrant per thread)
+
+        Hold it around read-modify-write sequences, e.g. allocating an ID and appending the row.
+        """
+        return locked(file_path)
+
+    def _partition_daily_nutrition(self):
+        """Split a single daily_nutrition.csv into monthly partition files (one-off migration)"""
+        legacy_df = self._read_file(self.daily_nutrition_file)
+        os.makedirs(self.daily_nutrition_dir, exist_ok=True)
+
+        if not legacy_df.empty:
+            self.write_csv(legacy_df, self.daily_nutrition_file)
+            logger.info("Split daily nutrition into monthly files entries=%d dir=%s", len(legacy_df), self.daily_nutrition_dir)
+
+        # Keep the old file as a backup rather than deleting user data
+        if os.path.exists(self.daily_nutrition_file):
+            os.replace(self.daily_nutrition_file, self.daily_nutrition_file + ".bak")
+
+    def table_exists(self, file_path: str) -> bool:
+        """Whether a table has been created yet"""
+        if self._is_partitioned(file_path):
+            return True
+        return os.path.exists(file_path)
+
+    def table_name(self, file_path: str) -> str:
+        """Short table name for a file (partitions count as daily_nutrition), e.g. for metrics"""
+        if os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(self.daily_nutrition_dir):
+            return 'daily_nutrition'
+        return os.path.splitext(os.path.basename(file_path))[0]
+
+    def stored_bytes(self, file_path: str) -> Optional[int]:
+        """Size of a table on disk, or None if it can't be told apart from other tables"""
+        version = self.file_version(file_path)
+        return version[1] if version is not None else None
+
+    def _is_partitioned(self, file_path: str) -> bool:
+        return file_path == self.daily_nutrition_file and os.path.isdir(self.daily_nutrition_dir)
+
+    def _partition_file(self, date) -> str:
+        """Monthly partition file that holds a date"""
+        match = PARTITION_DATE_PATTERN.match(str(date))
+        key = match.group(1) if match else 'undated'
+        return os.path.join(self.daily_nutrition_dir, f"{key}.csv")
+
+    def _partition_files(self) -> List[str]:
+        """All partition files, oldest month first"""
+        try:
+            names = sorted(name for name in os.listdir(self.daily_nutrition_dir) if name.endswith('.csv'))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.daily_nutrition_dir, name) for name in names]
+
+    def _open_rows(self, file_path: str) -> io.BufferedReader:
+        """Open a CSV for parsing, up to the end of its last complete row
+
+        append_rows writes to the live file, so a reader that doesn't hold the lock can
+        catch the last row half written. Files this handler writes always end on a line
+        break; if this one doesn't, wait under its lock for the append to finish and take
+        the file as it is then (a last line still without a break is a complete row).
+        """
+        f = open(file_path, 'rb')
+        try:
+            end = os.fstat(f.fileno()).st_size
+            if end:
+                f.seek(end - 1)
+                if f.read(1) not in (b'\n', b'\r'):
+                    f.close()
+                    with self.locked(file_path):
+                        f = open(file_path, 'rb')
+                        end = os.fstat(f.fileno()).st_size
+                f.seek(0)
+        except BaseException:
+            f.close()
+            raise
+        return io.BufferedReader(_CompleteRows(f, end))
+
+    def _read_file(self, file_path: str) -> pd.DataFrame:
+        """Read a single CSV file"""
         try:
-            return pd.read_csv(file_path)
+            with self._open_rows(file_path) as f:
+                return pd.read_csv(f)
         except (FileNotFoundError, pd.errors.EmptyDataError):
             return pd.DataFrame()
 
+    @instrument_storage('read')
+    def read_csv(self, file_path: str) -> pd.DataFrame:
+        """Safely read CSV file"""
+        if self._is_partitioned(file_path):
+            partitions = [self._read_file(path) for path in self._partition_files()]
+            partitions = [df for df in partitions if not df.empty]
+            if not partitions:
+                return pd.DataFrame(columns=DAILY_NUTRITION_COLUMNS)
+            return pd.concat(partitions, ignore_index=True)
+
+        return self._read_file(file_path)
+
+    @instrument_storage('write')
     def write_csv(self, df: pd.DataFrame, file_path: str):
         """Safely write DataFrame to CSV"""
-        df.to_csv(file_path, index=False)
+        with self.locked(file_path):
+            if self._is_partitioned(file_path):
+                # Rewrite every month present in df and drop months that no longer have rows
+                groups = df.groupby(df['date'].map(self._partition_file)) if not df.empty else []
+                written = set()
+                for partition_file, partition_df in groups:
+                    self.write_csv(partition_df, partition_file)
+                    written.add(partition_file)
+                for partition_file in self._partition_files():
+                    if partition_file not in written:
+                        os.remove(partition_file)
+            else:
+                self._atomic_write(df, file_path)
+            self._note_write(file_path, df)
+
+    @staticmethod
+    def _atomic_write(df: pd.DataFrame, file_path: str):
+        """Write to a temp file in the same folder, then rename it over the target
+
+        Readers see either the old or the new file, never a half-written one.
+        """
+        directory = os.path.dirname(file_path) or '.'
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def select_rows(self, file_path: str, where: Dict) -> pd.DataFrame:
+        """Rows of a table whose columns equal all the given values"""
+        if self._is_partitioned(file_path) and 'date' in where:
+            return self.select_rows(self._partition_file(where['date']), where)
+
+        df = self.read_csv(file_path)
+        if df.empty:
+            return df
+        return df[self._match(df, where)]
+
+    def delete_rows(self, file_path: str, where: Dict) -> pd.DataFrame:
+        """Delete rows whose columns equal all the given values and return the deleted rows"""
+        with self.locked(file_path):
+            if self._is_partitioned(file_path) and 'date' in where:
+                removed = self.delete_rows(self._partition_file(where['date']), where)
+                self._note_write(file_path, removed)
+                return removed
+
+            df = self.read_csv(file_path)
+            if df.empty:
+                return df
+
+            mask = self._match(df, where)
+            if mask.any():
+                self.write_csv(df[~mask], file_path)
+            return df[mask]
+
+    @staticmethod
+    def _match(df: pd.DataFrame, where: Dict) -> pd.Series:
+        """Boolean mask of rows matching every column == value pair"""
+        mask = pd.Series(True, index=df.index)
+        for column, value in where.items():
+            mask &= df[column] == value
+        return mask
+
+    def append_row(self, row: Dict, file_path: str):
+        """Append a single row to the end of a CSV"""
+        self.append_rows([row], file_path)
+
+    @instrument_storage('append')
+    def append_rows(self, rows: List[Dict], file_path: str):
+        """Append rows to the end of a CSV without rewriting the existing contents
+
+        Readers parse only up to the last line break (see _open_rows), so a row being
+        written is never seen half done.
+        """
+        if not rows:
+            return
+
+        with self.locked(file_path):
+            if self._is_partitioned(file_path):
+                # Each row goes to the end of its own month's file
+                by_partition: Dict[str, List[Dict]] = {}
+                for row in rows:
+                    by_partition.setdefault(self._partition_file(row.get('date')), []).append(row)
+                for partition_file, partition_rows in by_partition.items():
+                    self.append_rows(partition_rows, partition_file)
+                self._note_write(file_path, pd.DataFrame(rows))
+                return
+
+            header = self.read_header(file_path)
+            new_columns = [key for row in rows for key in row if key not in header]
+            if not header or new_columns:
+                # The file is new or the rows bring new columns - the header has to change,
+                # so fall back to a full rewrite
+                df = self.read_csv(file_path)
+                new_df = pd.DataFrame(rows)
+                if df.empty:
+                    # Keep the existing column order, new columns go at the end
+                    columns = header + [column for column in new_df.columns if column not in header]
+                    df = new_df.reindex(columns=columns)
+                else:
+                    df = pd.concat([df, new_df], ignore_index=True)
+                self.write_csv(df, file_path)
+                return
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator=os.linesep)
+            for row in rows:
+                writer.writerow([self._csv_value(row.get(column)) for column in header])
+            data = buffer.getvalue().encode('utf-8')
+
+            with open(file_path, 'rb+') as f:
+                # Make sure the new rows start on their own line
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) not in (b'\n', b'\r'):
+                    data = os.linesep.encode('utf-8') + data
+                f.seek(0, os.SEEK_END)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._note_write(file_path, pd.DataFrame(rows))
+
+    def read_header(self, file_path: str) -> List[str]:
+        """Read just the column names of a CSV (empty list if missing or empty)"""
+        try:
+            with open(file_path, newline='', encoding='utf-8-sig') as f:
+                return next(csv.reader(f), [])
+        except FileNotFoundError:
+            return []
+
+    def table_columns(self, file_path: str) -> List[str]:
+        """Column names of a table, across every partition for daily nutrition"""
+        if not self._is_partitioned(file_path):
+            return self.read_header(file_path)
+
+        columns = []
+        for partition in self._partition_files():
+            columns.extend(column for column in self.read_header(partition) if column not in columns)
+        return columns
+
+    def iter_chunks(self, file_path: str, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    chunksize: int = CHUNK_ROWS, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Stream a table in chunks of rows, optionally limited to a date range (inclusive)
+
+        Only one chunk is in memory at a time; for daily nutrition, partitions outside the
+        range aren't opened at all. columns limits the columns parsed (missing ones are skipped).
+        """
+        if self._is_partitioned(file_path):
+            files = []
+            for partition in self._partition_files():
+                month = os.path.splitext(os.path.basename(partition))[0]
+                if month == 'undated':
+                    if date_from or date_to:
+                        continue  # Undated rows can't fall in a range
+                elif (date_from and month < date_from[:7]) or (date_to and month > date_to[:7]):
+                    continue
+                files.append(partition)
+        else:
+            files = [file_path]
+
+        usecols = None
+        if columns is not None:
+            # The date filter needs the date column whether or not it was asked for
+            wanted = set(columns) | ({'date'} if date_from or date_to else set())
+            usecols = wanted.__contains__
+
+        for path in files:
+            try:
+                f = self._open_rows(path)
+            except FileNotFoundError:
+                continue
+            try:
+                reader = pd.read_csv(f, chunksize=chunksize, dtype={'date': str}, usecols=usecols)
+            except pd.errors.EmptyDataError:
+                f.close()
+                continue
+
+            with f, reader:
+                for chunk in reader:
+                    if date_from or date_to:
+                        chunk = chunk[self._date_range_mask(chunk, date_from, date_to)]
+                    if not chunk.empty:
+                        yield chunk
+
+    def servings_by_meal(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> pd.DataFrame:
+        """servings_consumed and entry count per meal_id in daily nutrition between two dates (inclusive)
+
+        Months wholly inside the range are summed once per partition file and reused until
+        that file changes, so only the partly covered months at the ends are read again.
+        """
+        if not self._is_partitioned(self.daily_nutrition_file):
+            return self._sum_servings(self.iter_chunks(self.daily_nutrition_file, date_from, date_to, SUM_CHUNK_ROWS,
+                                                       columns=['meal_id', 'servings_consumed']))
+
+        sums = []
+        for partition in self._partition_files():
+            month = os.path.splitext(os.path.basename(partition))[0]
+            if month == 'undated':
+                if date_from or date_to:
+                    continue  # Undated rows can't fall in a range
+                whole_month = True
+            elif (date_from and month < date_from[:7]) or (date_to and month > date_to[:7]):
+                continue
+            else:
+                whole_month = (not date_from or date_from <= f"{month}-01") and (not date_to or date_to >= f"{month}-31")
+
+            if whole_month:
+                sums.append(self._month_servings(partition))
+            else:
+                sums.append(self._sum_servings(self.iter_chunks(partition, date_from, date_to, SUM_CHUNK_ROWS,
+                                                                columns=['meal_id', 'servings_consumed'])))
+        return self._combine_servings(sums)
+
+    def _month_servings(self, partition_file: str) -> pd.DataFrame:
+        """servings_by_meal() sums for a whole partition, memoised per file version"""
+        version = self.file_version(partition_file)
+        cached = self._partition_servings.get(partition_file)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        sums = self._sum_servings(self.iter_chunks(partition_file, chunksize=SUM_CHUNK_ROWS,
+                                                   columns=['meal_id', 'servings_consumed']))
+        self._partition_servings[partition_file] = (version, sums)
+        return sums
+
+    @classmethod
+    def _sum_servings(cls, chunks: Iterator[pd.DataFrame]) -> pd.DataFrame:
+        """Reduce daily nutrition chunks to servings_consumed and entries per meal_id"""
+        sums = []
+        for chunk in chunks:
+            meal_ids = pd.to_numeric(chunk['meal_id'], errors='coerce')
+            valid = meal_ids.notna()
+            consumed = pd.to_numeric(chunk['servings_consumed'], errors='coerce').fillna(0)[valid]
+            grouped = consumed.groupby(meal_ids[valid].astype('int64').to_numpy())
+            sums.append(pd.DataFrame({'servings_consumed': grouped.sum(), 'entries': grouped.size()}))
+        return cls._combine_servings(sums)
+
+    @staticmethod
+    def _combine_servings(sums: List[pd.DataFrame]) -> pd.DataFrame:
+        sums = [df for df in sums if not df.empty]
+        if not sums:
+            return pd.DataFrame({'servings_consumed': pd.Series(dtype=float), 'entries': pd.Series(dtype='int64')},
+                                index=pd.Index([], dtype='int64', name='meal_id'))
+        combined = sums[0] if len(sums) == 1 else pd.concat(sums).groupby(level=0).sum()
+        return combined.rename_axis('meal_id')
+
+    @staticmethod
+    def _date_range_mask(df: pd.DataFrame, date_from: Optional[str], date_to: Optional[str]) -> pd.Series:
+        """Rows dated between date_from and date_to inclusive (ISO dates compare as strings)"""
+        if 'date' not in df.columns:
+            return pd.Series(False, index=df.index)
+        dates = df['date']
+        mask = dates.notna()
+        if date_from:
+            mask &= dates >= date_from
+        if date_to:
+            mask &= dates <= date_to
+        return mask
+
+    @staticmethod
+    def _csv_value(value):
+        """Format a value the way pandas writes it (missing values become empty fields)"""
+        if value is None:
+            return ''
+        try:
+            if pd.isna(value):
+                return ''
+        except (TypeError, ValueError):
+            pass
+        return value
 
     def get_next_id(self, df: pd.DataFrame, id_column: str) -> int:
         """Get next available ID for a dataframe"""
@@ -69,67 +590,202 @@ class CSVHandler:
             return 1
         return int(df[id_column].max()) + 1
 
+    def next_id(self, file_path: str, id_column: str) -> int:
+        """Allocate the next ID for a table without reading the whole file"""
+        return self.allocate_ids(file_path, id_column, 1)
+
+    def allocate_ids(self, file_path: str, id_column: str, count: int) -> int:
+        """Reserve a block of count consecutive IDs and return the first one
+
+        The counter lives in memory and is only re-seeded from the file (reading just
+        the ID column) when the file has been changed by something other than this handler.
+        Allocate and append under locked(file_path) so other processes can't take the same IDs.
+        """
+        key = (file_path, id_column)
+        with self.locked(file_path), self._id_lock:
+            version = self.file_version(file_path)
+            counter = self._id_counters.get(key)
+            if counter is None or counter[1] != version:
+                counter = [self._max_id_in_file(file_path, id_column) + 1, version]
+                self._id_counters[key] = counter
+
+            first_id = counter[0]
+            counter[0] += count
+            return first_id
+
+    def _max_id_in_file(self, file_path: str, id_column: str) -> int:
+        """Largest ID currently stored in a file (0 if there are none)"""
+        if self._is_partitioned(file_path):
+            return max([self._max_id_in_file(path, id_column) for path in self._partition_files()], default=0)
+
+        try:
+            with self._open_rows(file_path) as f:
+                ids = pd.read_csv(f, usecols=[id_column])[id_column]
+        except (FileNotFoundError, pd.errors.EmptyDataError, ValueError):
+            return 0
+
+        max_id = pd.to_numeric(ids, errors='coerce').max()
+        return 0 if pd.isna(max_id) else int(max_id)
+
+    def _note_write(self, file_path: str, written: pd.DataFrame):
+        """Keep ID counters for a file valid after this handler wrote to it"""
+        with self._id_lock:
+            version = self.file_version(file_path)
+            for (counter_file, id_column), counter in self._id_counters.items():
+                if counter_file != file_path:
+                    continue
+                if id_column in written.columns:
+                    max_id = pd.to_numeric(written[id_column], errors='coerce').max()
+                    if not pd.isna(max_id):
+                        counter[0] = max(counter[0], int(max_id) + 1)
+                counter[1] = version
+
+    def file_version(self, file_path: str) -> Optional[Tuple]:
+        """(mtime, size, inode) of a file, or None if it doesn't exist
+
+        The inode changes on every atomic rewrite (a rename), so a rewrite that keeps the
+        size within one mtime tick still gets a new version.
+        """
+        if self._is_partitioned(file_path):
+            # Latest mtime, total size and every inode over all partitions
+            versions = [self.file_version(path) for path in self._partition_files()]
+            return self._combine_versions(versions)
+
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    @staticmethod
+    def _combine_versions(versions: List[Optional[Tuple]]) -> Optional[Tuple]:
+        """One version for a table stored in several files"""
+        versions = [version for version in versions if version is not None]
+        if not versions:
+            return None
+        return (max(version[0] for version in versions), sum(version[1] for version in versions),
+                tuple(version[2] for version in versions))
+
     def ensure_servings_remaining_column(self):
         """Add servings_remaining column to existing meals.csv if it doesn't exist"""
-        try:
+        with self.locked(self.meals_file):
+            try:
+                meals_df = self.read_csv(self.meals_file)
+
+                if meals_df.empty:
+                    logger.debug("Meals table is empty, nothing to update")
+                    return meals_df
+
+                if 'servings_remaining' not in meals_df.columns:
+                    # Add servings_remaining column, set to None for existing meals
+                    # (we don't want to retrospectively apply this to existing meals)
+                    meals_df['servings_remaining'] = None
+                    self.write_csv(meals_df, self.meals_file)
+                    logger.info("Added servings_remaining column to existing meals table")
+                else:
+                    logger.debug("servings_remaining column already exists")
+
+                return meals_df
+
+            except Exception as e:
+                logger.exception("Error in ensure_servings_remaining_column: %s", e)
+                return pd.DataFrame()
+
+    def update_servings_remaining(self, meal_id: int, servings_change: float):
+        """Update servings_remaining for a specific meal (positive = add, negative = subtract)"""
+        with self.locked(self.meals_file):
             meals_df = self.read_csv(self.meals_file)
 
             if meals_df.empty:
-                print("Meals CSV is empty, nothing to update")
-                return meals_df
+                return
 
+            # Ensure servings_remaining column exists
             if 'servings_remaining' not in meals_df.columns:
-                # Add servings_remaining column, set to None for existing meals
-                # (we don't want to retrospectively apply this to existing meals)
                 meals_df['servings_remaining'] = None
-                self.write_csv(meals_df, self.meals_file)
-                print("Added servings_remaining column to existing meals.csv")
-            else:
-                print("servings_remaining column already exists")
 
-            return meals_df
+            # Find the meal
+            meal_mask = meals_df['meal_id'] == meal_id
+            if not meal_mask.any():
+                raise ValueError(f"Meal with ID {meal_id} not found")
 
-        except Exception as e:
-            print(f"Error in ensure_servings_remaining_column: {e}")
-            import traceback
-            traceback.print_exc()
-            return pd.DataFrame()
+            # Get current servings_remaining (could be NaN for old meals)
+            current_remaining = meals_df.loc[meal_mask, 'servings_remaining'].iloc[0]
 
-    def update_servings_remaining(self, meal_id: int, servings_change: float):
-        """Update servings_remaining for a specific meal (positive = add, negative = subtract)"""
-        meals_df = self.read_csv(self.meals_file)
+            # If it's NaN (old meal), we can't track remaining servings
+            if pd.isna(current_remaining):
+                logger.warning("Cannot update servings for meal_id=%s - no servings_remaining data "
+                               "(created before this feature)", meal_id)
+                return
 
-        if meals_df.empty:
-            return
+            # Update servings_remaining
+            new_remaining = float(current_remaining) + servings_change
 
-        # Ensure servings_remaining column exists
-        if 'servings_remaining' not in meals_df.columns:
-            meals_df['servings_remaining'] = None
+            # Don't let it go negative
+            if new_remaining < 0:
+                logger.warning("Attempted to consume more servings than available meal_id=%s", meal_id)
+                new_remaining = 0
 
-        # Find the meal
-        meal_mask = meals_df['meal_id'] == meal_id
-        if not meal_mask.any():
-            raise ValueError(f"Meal with ID {meal_id} not found")
+            meals_df.loc[meal_mask, 'servings_remaining'] = new_remaining
+            self.write_csv(meals_df, self.meals_file)
 
-        # Get current servings_remaining (could be NaN for old meals)
-        current_remaining = meals_df.loc[meal_mask, 'servings_remaining'].iloc[0]
+            logger.debug("Updated servings_remaining meal_id=%s servings_remaining=%s", meal_id, new_remaining)
+            return new_remaining
 
-        # If it's NaN (old meal), we can't track remaining servings
-        if pd.isna(current_remaining):
-            print(
-                f"Warning: Cannot update servings for meal {meal_id} - no servings_remaining data (created before this feature)")
-            return
+    @contextmanager
+    def servings_unit_of_work(self):
+        """Group servings_remaining changes and commit them once when the block exits
+
+        The meals table stays locked for the whole block, so checks made on the meal inside
+        it can't be invalidated by another request. Nothing is committed if the block raises.
+        """
+        with self.locked(self.meals_file):
+            unit_of_work = self.unit_of_work_class(self)
+            yield unit_of_work
+            unit_of_work.commit()
+
+    def apply_servings_changes(self, changes: Dict, meals_df: Optional[pd.DataFrame] = None) -> Dict:
+        """Add servings changes ({meal_id: change}) to many meals with one vectorised update and one write
+
+        Returns {meal_id: new servings_remaining} for the meals that were updated.
+        """
+        if not changes:
+            return {}
+
+        with self.locked(self.meals_file):
+            if meals_df is None:
+                meals_df = self.read_csv(self.meals_file)
+            if meals_df.empty:
+                return {}
+
+            # Ensure servings_remaining column exists
+            if 'servings_remaining' not in meals_df.columns:
+                meals_df['servings_remaining'] = None
+
+            deltas = meals_df['meal_id'].map(changes)
+            touched = deltas.notna()
+            current = pd.to_numeric(meals_df['servings_remaining'], errors='coerce')
+
+            found_ids = set(meals_df.loc[touched, 'meal_id'])
+            for meal_id in changes:
+                if meal_id not in found_ids:
+                    logger.warning("Meal not found meal_id=%s", meal_id)
+            for meal_id in meals_df.loc[touched & current.isna(), 'meal_id']:
+                logger.warning("Cannot update servings for meal_id=%s - no servings_remaining data "
+                               "(created before this feature)", meal_id)
 
-        # Update servings_remaining
-        new_remaining = float(current_remaining) + servings_change
+            update = touched & current.notna()
+            if not update.any():
+                return {}
 
-        # Don't let it go negative
-        if new_remaining < 0:
-            print(f"Warning: Attempted to consume more servings than available for meal {meal_id}")
-            new_remaining = 0
+            new_remaining = current[update] + deltas[update]
+            for meal_id in meals_df.loc[new_remaining[new_remaining < 0].index, 'meal_id']:
+                logger.warning("Attempted to consume more servings than available meal_id=%s", meal_id)
+            new_remaining = new_remaining.clip(lower=0)
 
-        meals_df.loc[meal_mask, 'servings_remaining'] = new_remaining
-        self.write_csv(meals_df, self.meals_file)
+            meals_df = meals_df.copy()
+            meals_df.loc[update, 'servings_remaining'] = new_remaining
+            self.write_csv(meals_df, self.meals_file)
 
-        print(f"Updated meal {meal_id}: servings_remaining = {new_remaining}")
-        return new_remaining
\ No newline at end of file
+            results = dict(zip(meals_df.loc[update, 'meal_id'].map(_normalise_id), new_remaining.astype(float)))
+            logger.debug("Updated servings_remaining meals=%d changes=%s", len(results), results)
+            return results
@@ -0,0 +1,243 @@
+from .csv_handler import (
+    CSVHandler, MEALS_COLUMNS, MEAL_LOG_COLUMNS, DAILY_NUTRITION_COLUMNS, CHUNK_ROWS,
+    TEXT_COLUMNS, INTEGER_COLUMNS
+)
+import pandas as pd
+import logging
+from .metrics import instrument_storage
+import os
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# pyarrow is optional - only needed for the "feather" storage backend
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+# ID column of each table - rows without one are dropped (e.g. blank lines in old CSVs)
+ID_COLUMNS = {'meals': 'meal_id', 'meal_log': 'log_id', 'daily_nutrition': 'entry_id'}
+
+
+class FeatherHandler(CSVHandler):
+    """Storage handler that keeps meals, meal_log and daily_nutrition as typed Feather (Arrow IPC) files
+
+    Files are uncompressed so reads are memory-mapped rather than parsed, and every column
+    has a fixed type (IDs are int64, so meal_id stays 7 rather than 7.0). Tables are still
+    addressed by the CSV file paths; ingredients.csv and derived tables stay CSV files.
+    """
+
+    def __init__(self, csv_dir: str, data_dir: str):
+        if pa is None:
+            raise ImportError("The feather storage backend needs pyarrow (pip install pyarrow)")
+
+        super().__init__(csv_dir, data_dir)
+
+        # File path -> table name for the tables stored as Feather
+        self.tables = {
+            self.meals_file: 'meals',
+            self.meal_log_file: 'meal_log',
+            self.daily_nutrition_file: 'daily_nutrition',
+        }
+
+    def _initialize_csv_files(self):
+        """Tables are created by migrate_csv_files(), not as empty CSVs"""
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def _table_path(self, file_path: str) -> str:
+        return os.path.join(self.data_dir, self.tables[file_path] + ".feather")
+
+    def _default_columns(self, table: str) -> List[str]:
+        return {
+            'meals': MEALS_COLUMNS,
+            'meal_log': MEAL_LOG_COLUMNS,
+            'daily_nutrition': DAILY_NUTRITION_COLUMNS,
+        }[table]
+
+    @staticmethod
+    def _arrow_type(column: str, values: pd.Series):
+        if column in INTEGER_COLUMNS:
+            return pa.int64()
+        if column in TEXT_COLUMNS:
+            return pa.string()
+        if values.isna().all() or pd.api.types.is_numeric_dtype(values):
+            return pa.float64()
+        # Unknown column holding text: keep it as text rather than losing it to NaN
+        numeric = pd.to_numeric(values, errors='coerce')
+        return pa.float64() if numeric.notna().sum() == values.notna().sum() else pa.string()
+
+    def _to_arrow(self, df: pd.DataFrame, table: str) -> 'pa.Table':
+        """Typed Arrow table for a DataFrame, one fixed type per column"""
+        id_column = ID_COLUMNS[table]
+        if id_column in df.columns:
+            df = df[pd.to_numeric(df[id_column], errors='coerce').notna()]
+
+        arrays, fields = [], []
+        for column in df.columns:
+            values = df[column]
+            arrow_type = self._arrow_type(column, values)
+            if arrow_type == pa.string():
+                values = values.astype(object).where(values.notna(), None)
+                values = values.map(lambda value: value if value is None else str(value))
+            else:
+                values = pd.to_numeric(values, errors='coerce')
+                if arrow_type == pa.int64():
+                    values = values.astype('Int64')
+            arrays.append(pa.array(values, type=arrow_type, from_pandas=True))
+            fields.append(pa.field(column, arrow_type))
+
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+    def _read_table(self, file_path: str, columns: Optional[List[str]] = None) -> Optional['pa.Table']:
+        try:
+            return feather.read_table(self._table_path(file_path), columns=columns, memory_map=True)
+        except FileNotFoundError:
+            return None
+
+    def table_exists(self, file_path: str) -> bool:
+        if file_path not in self.tables:
+            return super().table_exists(file_path)
+        return os.path.exists(self._table_path(file_path))
+
+    def table_columns(self, file_path: str) -> List[str]:
+        if file_path not in self.tables:
+            return super().table_columns(file_path)
+        table = self._read_table(file_path)
+        return table.schema.names if table is not None else []
+
+    @instrument_storage('read')
+    def read_csv(self, file_path: str) -> pd.DataFrame:
+        """Read a whole table (memory-mapped, no parsing or type inference)"""
+        if file_path not in self.tables:
+            return super().read_csv(file_path)
+
+        table = self._read_table(file_path)
+        if table is None:
+            return pd.DataFrame()
+        return table.to_pandas()
+
+    @instrument_storage('write')
+    def write_csv(self, df: pd.DataFrame, file_path: str):
+        """Atomically replace the contents of a table"""
+        if file_path not in self.tables:
+            return super().write_csv(df, file_path)
+
+        table_path = self._table_path(file_path)
+        arrow_table = self._to_arrow(df, self.tables[file_path])
+        with self.locked(file_path):
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(table_path), suffix='.tmp')
+            os.close(fd)
+            try:
+                # Uncompressed so later reads can be memory-mapped
+                feather.write_feather(arrow_table, temp_path, compression='uncompressed')
+                os.replace(temp_path, table_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._note_write(file_path, df)
+
+    @instrument_storage('append')
+    def append_rows(self, rows: List[Dict], file_path: str):
+        """Append rows (Feather files can't be appended to, so the table is rewritten once)"""
+        if file_path not in self.tables:
+            return super().append_rows(rows, file_path)
+        if not rows:
+            return
+
+        with self.locked(file_path):
+            df = self.read_csv(file_path)
+            new_rows = pd.DataFrame(rows)
+            if df.empty:
+                df = new_rows.reindex(columns=list(dict.fromkeys(list(df.columns) + list(new_rows.columns))))
+            else:
+                df = pd.concat([df, new_rows], ignore_index=True)
+            self.write_csv(df, file_path)
+
+    def select_rows(self, file_path: str, where: Dict) -> pd.DataFrame:
+        if file_path not in self.tables:
+            return super().select_rows(file_path, where)
+
+        df = self.read_csv(file_path)
+        if df.empty:
+            return df
+        return df[self._match(df, where)]
+
+    def delete_rows(self, file_path: str, where: Dict) -> pd.DataFrame:
+        if file_path not in self.tables:
+            return super().delete_rows(file_path, where)
+
+        with self.locked(file_path):
+            df = self.read_csv(file_path)
+            if df.empty:
+                return df
+
+            mask = self._match(df, where)
+            if mask.any():
+                self.write_csv(df[~mask], file_path)
+            return df[mask]
+
+    def iter_chunks(self, file_path: str, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    chunksize: int = CHUNK_ROWS, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Stream a table in record batches straight off the memory map"""
+        if file_path not in self.tables:
+            yield from super().iter_chunks(file_path, date_from, date_to, chunksize, columns)
+            return
+
+        table = self._read_table(file_path)
+        if table is None:
+            return
+        if columns is not None:
+            wanted = set(columns) | ({'date'} if date_from or date_to else set())
+            table = table.select([name for name in table.schema.names if name in wanted])
+
+        for batch in table.to_batches(max_chunksize=chunksize):
+            chunk = batch.to_pandas()
+            if date_from or date_to:
+                chunk = chunk[self._date_range_mask(chunk, date_from, date_to)]
+            if not chunk.empty:
+                yield chunk
+
+    def _max_id_in_file(self, file_path: str, id_column: str) -> int:
+        if file_path not in self.tables:
+            return super()._max_id_in_file(file_path, id_column)
+
+        table = self._read_table(file_path)
+        if table is None or id_column not in table.schema.names:
+            return 0
+        max_id = table[id_column].to_pandas().max()
+        return 0 if pd.isna(max_id) else int(max_id)
+
+    def file_version(self, file_path: str) -> Optional[Tuple]:
+        if file_path not in self.tables:
+            return super().file_version(file_path)
+        return super().file_version(self._table_path(file_path))
+
+    def migrate_csv_files(self, overwrite: bool = False):
+        """Convert the existing CSV tables to Feather
+
+        Each table is migrated once (when its .feather file doesn't exist yet) unless
+        overwrite is True. Rows without an ID are dropped and every column gets its fixed type.
+        """
+        for file_path, table in self.tables.items():
+            if self.table_exists(file_path) and not overwrite:
+                continue
+
+            with self.locked(file_path):
+                df = super().read_csv(file_path)
+                if df.empty:
+                    df = pd.DataFrame(columns=self._default_columns(table))
+                self.write_csv(df, file_path)
+                logger.info("Migrated CSV to Feather rows=%d file=%s table_file=%s",
+                            len(self.read_csv(file_path)), file_path, self._table_path(file_path))
+
+    def export_csv_files(self, target_dir: str):
+        """Write every table back out as a CSV file in target_dir"""
+        os.makedirs(target_dir, exist_ok=True)
+        for file_path in self.tables:
+            df = self.read_csv(file_path)
+            df.to_csv(os.path.join(target_dir, os.path.basename(file_path)), index=False)
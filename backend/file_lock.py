@@ -0,0 +1,120 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_handle(handle):
+    """Block until this process holds the OS-level lock on an open lock file"""
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return
+
+    handle.seek(0)
+    while True:
+        try:
+            # LK_LOCK retries for ~10 seconds before raising, so keep trying
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_handle(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        return
+
+    handle.seek(0)
+    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """Exclusive lock on a path, shared by threads in this process and by other processes
+
+    Threads serialise on an RLock (so the same thread can nest the lock); the outermost
+    holder also takes an OS-level lock on "<path>.lock" to keep other processes out.
+    """
+
+    def __init__(self, path: str):
+        self.lock_path = path + ".lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._handle = open(self.lock_path, 'a+b')
+                _lock_handle(self._handle)
+            except BaseException:
+                if self._handle is not None:
+                    self._handle.close()
+                    self._handle = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                _unlock_handle(self._handle)
+            finally:
+                self._handle.close()
+                self._handle = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+# One FileLock per path for the whole process, so every handler shares it
+_locks: Dict[str, FileLock] = {}
+_locks_guard = threading.Lock()
+
+
+def get_file_lock(path: str) -> FileLock:
+    """The process-wide lock for a path"""
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = FileLock(key)
+        return lock
+
+
+def forget_locks(directory: str):
+    """Drop the process-wide locks of paths under a directory that nobody holds
+
+    For a data directory that is no longer used (e.g. a closed tenant), so _locks doesn't
+    keep growing. A lock that is held stays.
+    """
+    prefix = os.path.join(os.path.abspath(directory), '')
+    with _locks_guard:
+        for key in [key for key in _locks if key.startswith(prefix)]:
+            lock = _locks[key]
+            if lock._thread_lock.acquire(blocking=False):
+                try:
+                    if lock._depth == 0:
+                        del _locks[key]
+                finally:
+                    lock._thread_lock.release()
+
+
+@contextmanager
+def locked(path: str):
+    """Hold the lock for a path for the duration of a with block"""
+    with get_file_lock(path):
+        yield
@@ -0,0 +1,51 @@
+import io
+from datetime import datetime
+from typing import Iterator, Optional
+from .csv_handler import CSVHandler, CHUNK_ROWS
+from .serialization import clean_dataframe
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class HistoryExporter:
+    """Streams daily nutrition and meal log history as CSV or NDJSON, one chunk at a time"""
+
+    def __init__(self, csv_handler: CSVHandler):
+        self.csv_handler = csv_handler
+        self.tables = {
+            'daily_nutrition': csv_handler.daily_nutrition_file,
+            'meal_log': csv_handler.meal_log_file,
+        }
+
+    def validate(self, table: str, export_format: str, date_from: Optional[str], date_to: Optional[str]):
+        """Raise ValueError for anything export() can't handle, before any output is sent"""
+        if table not in self.tables:
+            raise ValueError(f"table must be one of {', '.join(self.tables)}")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        for value in (date_from, date_to):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+
+    def export(self, table: str, export_format: str = 'csv', date_from: Optional[str] = None,
+               date_to: Optional[str] = None, chunksize: int = CHUNK_ROWS) -> Iterator[str]:
+        """Text chunks of the export, for a streamed response"""
+        self.validate(table, export_format, date_from, date_to)
+        file_path = self.tables[table]
+
+        # Fixed column order, so every chunk lines up with the CSV header
+        columns = self.csv_handler.table_columns(file_path)
+        if export_format == 'csv' and columns:
+            yield ','.join(columns) + '\n'
+
+        for chunk in self.csv_handler.iter_chunks(file_path, date_from, date_to, chunksize):
+            chunk = clean_dataframe(chunk.reindex(columns=columns or chunk.columns))
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                chunk.to_csv(buffer, header=False, index=False, lineterminator='\n')
+                yield buffer.getvalue()
+            else:
+                yield chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n'
@@ -0,0 +1,155 @@
+from .csv_handler import CSVHandler
+from .ingredient_search import IngredientSearchIndex
+import numpy as np
+import pandas as pd
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Nutrient columns of ingredients.csv, in nutrient matrix column order
+NUTRIENT_COLUMNS = [
+    'calories', 'protein', 'fat_total', 'fat_saturated', 'carbohydrate',
+    'sugars', 'dietary_fibre_g', 'sodium_mg', 'calcium_mg'
+]
+
+
+class IngredientCatalog:
+    """In-memory copy of ingredients.csv, reloaded only when the file changes on disk"""
+
+    def __init__(self, csv_handler: CSVHandler):
+        self.csv_handler = csv_handler
+        self._lock = threading.Lock()
+
+        # Loaded state (replaced as a whole on reload)
+        self._loaded = False
+        self._version = None
+        self._df = pd.DataFrame()
+        self._records: List[Dict] = []
+        self._by_name: Dict[str, Dict] = {}
+        self._row_by_name: Dict[str, int] = {}
+        self._per_unit_matrix = np.zeros((0, len(NUTRIENT_COLUMNS)))
+        self._search_index: Optional[IngredientSearchIndex] = None  # Built on first search
+
+    def _refresh(self):
+        """Reload the catalog if ingredients.csv has changed since the last load"""
+        version = self.csv_handler.file_version(self.csv_handler.ingredients_file)
+        if self._loaded and version == self._version:
+            return
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._loaded and version == self._version:
+                return
+
+            df = self.csv_handler.read_csv(self.csv_handler.ingredients_file)
+            records = df.to_dict('records')
+
+            # First occurrence wins for duplicate names (same as the old row filter)
+            by_name = {}
+            row_by_name = {}
+            for row, record in enumerate(records):
+                if record['name'] not in by_name:
+                    by_name[record['name']] = record
+                    row_by_name[record['name']] = row
+
+            self._df = df
+            self._records = records
+            self._by_name = by_name
+            self._row_by_name = row_by_name
+            self._per_unit_matrix = self._build_per_unit_matrix(df)
+            self._search_index = None
+            self._version = version
+            self._loaded = True
+
+    @staticmethod
+    def _build_per_unit_matrix(df: pd.DataFrame) -> np.ndarray:
+        """Nutrients per single unit of each ingredient (one row per ingredient)"""
+        if df.empty:
+            return np.zeros((0, len(NUTRIENT_COLUMNS)))
+
+        nutrients = df.reindex(columns=NUTRIENT_COLUMNS).apply(pd.to_numeric, errors='coerce')
+        unit_sizes = pd.to_numeric(df['unit_size'], errors='coerce').to_numpy(dtype=float)
+        unit_sizes[(unit_sizes == 0) | np.isnan(unit_sizes)] = 1.0  # Treat bad unit sizes as 1
+        return nutrients.fillna(0).to_numpy(dtype=float) / unit_sizes[:, None]
+
+    @property
+    def version(self) -> Optional[Tuple]:
+        """Version of the currently loaded catalog"""
+        self._refresh()
+        return self._version
+
+    @property
+    def dataframe(self) -> pd.DataFrame:
+        """Catalog as a DataFrame (shared - do not modify in place)"""
+        self._refresh()
+        return self._df
+
+    def all_records(self) -> List[Dict]:
+        """All ingredients in file order"""
+        self._refresh()
+        return list(self._records)
+
+    def get(self, name: str) -> Optional[Dict]:
+        """O(1) lookup of an ingredient by name"""
+        self._refresh()
+        record = self._by_name.get(name)
+        return dict(record) if record is not None else None
+
+    @property
+    def per_unit_matrix(self) -> np.ndarray:
+        """Nutrient matrix (ingredients x NUTRIENT_COLUMNS), values per single unit"""
+        self._refresh()
+        return self._per_unit_matrix
+
+    def per_unit_frame(self) -> pd.DataFrame:
+        """Per-unit nutrients indexed by ingredient name (first row for duplicate names)"""
+        self._refresh()
+        row_by_name = self._row_by_name
+        return pd.DataFrame(self._per_unit_matrix[list(row_by_name.values())],
+                            index=pd.Index(list(row_by_name), name='name'), columns=NUTRIENT_COLUMNS)
+
+    def row_indices(self, names: List[str]) -> np.ndarray:
+        """Matrix row for each name (-1 for names not in the catalog)"""
+        self._refresh()
+        row_by_name = self._row_by_name
+        return np.array([row_by_name.get(name, -1) for name in names], dtype=np.int64)
+
+    def nutrition_vector(self, names: List[str], quantities: List[float]) -> np.ndarray:
+        """Total nutrients for the given ingredient quantities, in NUTRIENT_COLUMNS order
+
+        Unknown ingredients contribute nothing.
+        """
+        self._refresh()
+        matrix = self._per_unit_matrix
+        rows = self.row_indices(names)
+        quantities = np.asarray(quantities, dtype=float)
+
+        known = rows >= 0
+        return quantities[known] @ matrix[rows[known]]
+
+    def nutrition_vectors(self, names: List[str], quantities: List[float], groups: List[int],
+                          group_count: int) -> np.ndarray:
+        """Total nutrients per group (e.g. per meal), one row per group in NUTRIENT_COLUMNS order
+
+        groups[i] says which group line i belongs to; unknown ingredients contribute nothing.
+        """
+        self._refresh()
+        matrix = self._per_unit_matrix
+        rows = self.row_indices(names)
+        quantities = np.asarray(quantities, dtype=float)
+        groups = np.asarray(groups, dtype=np.int64)
+
+        totals = np.zeros((group_count, matrix.shape[1]))
+        known = rows >= 0
+        np.add.at(totals, groups[known], quantities[known, None] * matrix[rows[known]])
+        return totals
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Ranked prefix / typo-tolerant search over ingredient names"""
+        self._refresh()
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = IngredientSearchIndex([record['name'] for record in self._records])
+            search_index = self._search_index
+            records = self._records
+
+        return [dict(records[position]) for position in search_index.search(query, limit)]
@@ -0,0 +1,93 @@
+import time
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Optional
+from .csv_handler import CSVHandler, SUM_CHUNK_ROWS
+from .ingredient_catalog import IngredientCatalog, NUTRIENT_COLUMNS
+from .meal_ingredients import MealIngredients
+from .serialization import dataframe_to_records
+
+SORT_COLUMNS = ('quantity',) + tuple(NUTRIENT_COLUMNS)
+
+
+class IngredientConsumption:
+    """How much of each ingredient was eaten over a date range, and the nutrients it brought
+
+    Each daily_nutrition entry eats servings_consumed / servings of its meal, i.e. that
+    share of every one of the meal's ingredient lines. The storage handler reduces the
+    entries to servings per meal (servings_by_meal), which are then joined to the
+    meal_ingredients lines and summed per ingredient - groupbys throughout, no Python per
+    entry. Nutrients use the current ingredient catalog.
+    """
+
+    def __init__(self, csv_handler: CSVHandler, catalog: IngredientCatalog, meal_ingredients: MealIngredients):
+        self.csv_handler = csv_handler
+        self.catalog = catalog
+        self.meal_ingredients = meal_ingredients
+
+    def _recipe_servings(self) -> pd.Series:
+        """Servings each meal's recipe makes, by meal_id (bad or missing values count as 1)"""
+        servings = []
+        for chunk in self.csv_handler.iter_chunks(self.csv_handler.meals_file, chunksize=SUM_CHUNK_ROWS,
+                                                  columns=['meal_id', 'servings']):
+            if 'servings' not in chunk:
+                continue
+            meal_ids = pd.to_numeric(chunk['meal_id'], errors='coerce')
+            values = pd.to_numeric(chunk['servings'], errors='coerce')
+            values = values.where(values > 0, 1.0)[meal_ids.notna()]
+            servings.append(pd.Series(values.to_numpy(dtype=float), index=meal_ids[meal_ids.notna()].astype('int64')))
+        if not servings:
+            return pd.Series(dtype=float)
+        return pd.concat(servings).groupby(level=0).first()
+
+    def report(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               sort: str = 'calories', limit: Optional[int] = None) -> Dict:
+        """Per-ingredient quantity eaten and nutrient contribution between two dates, inclusive"""
+        for value in (date_from, date_to):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')  # Raises ValueError for bad dates
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}")
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be at least 1')
+
+        start = time.perf_counter()
+        consumed = self.csv_handler.servings_by_meal(date_from, date_to)
+        servings, entries = consumed['servings_consumed'], consumed['entries']
+
+        # Share of each meal's recipe eaten, then of each of its lines
+        shares = (servings / self._recipe_servings().reindex(servings.index).fillna(1.0)).rename('share')
+        lines = self.meal_ingredients.lines(shares.index)
+        lines = lines.join(shares, on='meal_id', how='inner')
+        lines['quantity'] = lines['quantity'] * lines['share']
+
+        per_ingredient = lines.groupby('ingredient_name', sort=False).agg(
+            quantity=('quantity', 'sum'), meals=('meal_id', 'nunique'))
+        per_unit = self.catalog.per_unit_frame().reindex(per_ingredient.index)
+        nutrients = per_unit.mul(per_ingredient['quantity'], axis=0)
+
+        catalog = self.catalog.dataframe.drop_duplicates('name').set_index('name')
+        report = pd.concat([per_ingredient, nutrients.fillna(0)], axis=1)
+        report.insert(1, 'unit_def', catalog['unit_def'].reindex(report.index) if 'unit_def' in catalog else None)
+        report['in_catalog'] = per_unit.notna().all(axis=1)
+        report = report.sort_values(sort, ascending=False, kind='stable')
+        totals = {nutrient: round(float(report[nutrient].sum()), 2) for nutrient in NUTRIENT_COLUMNS}
+        if limit is not None:
+            report = report.head(limit)
+
+        report = report.reset_index().rename(columns={'ingredient_name': 'name'})
+        report[['quantity'] + NUTRIENT_COLUMNS] = report[['quantity'] + NUTRIENT_COLUMNS].round(2)
+        matched = entries[entries.index.isin(lines['meal_id'].unique())]
+
+        return {
+            'from': date_from,
+            'to': date_to,
+            'sort': sort,
+            'entries': int(entries.sum()),
+            # Entries whose meal has no ingredient lines (e.g. the meal was removed) count for nothing
+            'entries_without_ingredients': int(entries.sum() - matched.sum()),
+            'ingredient_count': int(len(per_ingredient)),
+            'ingredients': dataframe_to_records(report),
+            'totals': totals,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
@@ -1,4 +1,5 @@
-from csv_handler import CSVHandler
+from .csv_handler import CSVHandler
+from .ingredient_catalog import IngredientCatalog, NUTRIENT_COLUMNS
 import pandas as pd
 from typing import Dict, List, Optional
 
@@ -7,28 +8,20 @@ class IngredientOperations:
     def __init__(self, csv_handler: CSVHandler):
         self.csv_handler = csv_handler
 
+        # Loaded once, re-read only when ingredients.csv changes
+        self.catalog = IngredientCatalog(csv_handler)
+
     def get_all_ingredients(self) -> List[Dict]:
-        """Get all ingredients from the CSV"""
-        ingredients_df = self.csv_handler.read_csv(self.csv_handler.ingredients_file)
-        return ingredients_df.to_dict('records')
+        """Get all ingredients from the catalog"""
+        return self.catalog.all_records()
 
     def get_ingredient_by_name(self, name: str) -> Optional[Dict]:
         """Get specific ingredient by name"""
-        ingredients_df = self.csv_handler.read_csv(self.csv_handler.ingredients_file)
-        if ingredients_df.empty:
-            return None
-
-        ingredient = ingredients_df[ingredients_df['name'] == name]
-        return ingredient.iloc[0].to_dict() if not ingredient.empty else None
-
-    def search_ingredients(self, query: str) -> List[Dict]:
-        """Search ingredients by name"""
-        ingredients_df = self.csv_handler.read_csv(self.csv_handler.ingredients_file)
-        if ingredients_df.empty:
-            return []
+        return self.catalog.get(name)
 
-        mask = ingredients_df['name'].str.contains(query, case=False, na=False)
-        return ingredients_df[mask].to_dict('records')
+    def search_ingredients(self, query: str, limit: int = 20) -> List[Dict]:
+        """Search ingredients by name (ranked prefix matches, then close misspellings)"""
+        return self.catalog.search(query, limit)
 
     def calculate_nutrition(self, ingredient_name: str, quantity: float) -> Dict:
         """Calculate nutrition for a given quantity of ingredient"""
@@ -52,4 +45,49 @@ class IngredientOperations:
             'dietary_fibre_g': round(ingredient['dietary_fibre_g'] * multiplier, 2),
             'sodium_mg': round(ingredient['sodium_mg'] * multiplier, 2),
             'calcium_mg': round(ingredient['calcium_mg'] * multiplier, 2)
-        }
\ No newline at end of file
+        }
+
+    def calculate_total_nutrition(self, ingredients: List[Dict]) -> Dict:
+        """Calculate total nutrition for a list of {name, quantity} in one matrix-vector product"""
+        names = [ingredient['name'] for ingredient in ingredients]
+        quantities = [float(ingredient['quantity']) for ingredient in ingredients]
+        totals = self.catalog.nutrition_vector(names, quantities)
+
+        return {key: round(float(value), 2) for key, value in zip(NUTRIENT_COLUMNS, totals)}
+
+    def calculate_total_nutrition_many(self, ingredient_lists: List[List[Dict]]) -> List[Dict]:
+        """calculate_total_nutrition for many ingredient lists (e.g. meals) in one pass"""
+        names, quantities, groups = [], [], []
+        for group, ingredients in enumerate(ingredient_lists):
+            for ingredient in ingredients:
+                names.append(ingredient['name'])
+                quantities.append(float(ingredient['quantity']))
+                groups.append(group)
+
+        totals = self.catalog.nutrition_vectors(names, quantities, groups, len(ingredient_lists))
+        return [
+            {key: round(float(value), 2) for key, value in zip(NUTRIENT_COLUMNS, row)}
+            for row in totals
+        ]
+
+    def calculate_nutrition_batch(self, items: List[Dict]) -> Dict:
+        """Calculate nutrition for many {name, quantity} lines plus their combined totals"""
+        lines = []
+        missing = []
+        totals = {key: 0 for key in NUTRIENT_COLUMNS}
+
+        for item in items:
+            nutrition = self.calculate_nutrition(item['name'], item['quantity'])
+            if not nutrition:
+                missing.append(item['name'])
+                continue
+
+            lines.append(nutrition)
+            for key in totals:
+                totals[key] += nutrition[key]
+
+        return {
+            'lines': lines,
+            'totals': {key: round(value, 2) for key, value in totals.items()},
+            'missing': missing
+        }
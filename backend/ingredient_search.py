@@ -0,0 +1,149 @@
+import re
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+# Words are runs of letters/digits; everything is matched case-insensitively
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Minimum trigram similarity for a typo-tolerant match (averaged over the query's words)
+FUZZY_THRESHOLD = 0.3
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(str(text).lower())
+
+
+def _trigrams(word: str) -> Set[str]:
+    """Trigrams of one word, padded so short words and word starts still count"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.ids: List[int] = []  # Ingredients with a word ending at this node
+
+
+class IngredientSearchIndex:
+    """Prefix trie over the words of ingredient names plus a trigram index of those words for typos
+
+    Built once per catalog load. Queries return positions into the names list, best first.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = [str(name) for name in names]
+        self._lower_names = [name.lower() for name in self.names]
+        self._trie = _TrieNode()
+        # Distinct words of all names: the ingredients using each one, and its trigram count
+        self._word_ids: Dict[str, int] = {}
+        self._word_positions: List[List[int]] = []
+        self._word_trigram_counts: List[int] = []
+        self._trigram_postings: Dict[str, List[int]] = {}  # Trigram -> word IDs
+
+        for position, name in enumerate(self.names):
+            for word in set(_words(name)):
+                node = self._trie
+                for char in word:
+                    node = node.children.setdefault(char, _TrieNode())
+                node.ids.append(position)
+
+                word_id = self._word_ids.get(word)
+                if word_id is None:
+                    word_id = self._word_ids[word] = len(self._word_positions)
+                    self._word_positions.append([])
+                    trigrams = _trigrams(word)
+                    self._word_trigram_counts.append(len(trigrams))
+                    for trigram in trigrams:
+                        self._trigram_postings.setdefault(trigram, []).append(word_id)
+                self._word_positions[word_id].append(position)
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        """Ingredients with a word starting with prefix"""
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+
+        ids = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            ids.update(node.ids)
+            stack.extend(node.children.values())
+        return ids
+
+    def _fuzzy_scores(self, query: str) -> Dict[int, float]:
+        """Typo-tolerant similarity for every ingredient with a word sharing a trigram with the query
+
+        Each query word is compared (trigram Jaccard) with every word of the name and keeps
+        its best match, so a misspelt word still matches inside a long multi-word name. The
+        score is the mean over the query's words.
+        """
+        query_words = _words(query)
+        if not query_words:
+            return {}
+
+        totals = Counter()
+        for query_word in query_words:
+            query_trigrams = _trigrams(query_word)
+            overlaps = Counter()
+            for trigram in query_trigrams:
+                overlaps.update(self._trigram_postings.get(trigram, ()))
+
+            best: Dict[int, float] = {}
+            for word_id, overlap in overlaps.items():
+                similarity = overlap / (len(query_trigrams) + self._word_trigram_counts[word_id] - overlap)
+                for position in self._word_positions[word_id]:
+                    if similarity > best.get(position, 0.0):
+                        best[position] = similarity
+            totals.update(best)
+
+        scores = {}
+        for position, total in totals.items():
+            similarity = total / len(query_words)
+            if similarity >= FUZZY_THRESHOLD:
+                scores[position] = similarity
+        return scores
+
+    def search(self, query: str, limit: int = 20) -> List[int]:
+        """Positions of the best matching ingredients, best first
+
+        Exact names rank first, then names starting with the query, then names where every
+        query word prefixes some word of the name, then fuzzy trigram matches.
+        """
+        query_lower = str(query).strip().lower()
+        query_words = _words(query_lower)
+        if not query_words or limit <= 0:
+            return []
+
+        # Every query word has to prefix some word of the name
+        candidates = self._prefix_ids(query_words[0])
+        for word in query_words[1:]:
+            if not candidates:
+                break
+            candidates &= self._prefix_ids(word)
+
+        scored: List[Tuple[float, int]] = []
+        for position in candidates:
+            name = self._lower_names[position]
+            if name == query_lower:
+                score = 3.0
+            elif name.startswith(query_lower):
+                score = 2.0
+            else:
+                score = 1.0
+            scored.append((score, position))
+
+        # Only fall back to typo-tolerant matching when prefixes don't fill the page
+        if len(scored) < limit:
+            for position, similarity in self._fuzzy_scores(query_lower).items():
+                if position not in candidates:
+                    scored.append((similarity, position))
+
+        # Best score first, then shorter (more specific) names, then alphabetical
+        scored.sort(key=lambda item: (-item[0], len(self.names[item[1]]), self._lower_names[item[1]]))
+        return [position for _, position in scored[:limit]]
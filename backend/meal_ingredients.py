@@ -0,0 +1,98 @@
+import json
+import logging
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+from .csv_handler import CSVHandler, MEAL_INGREDIENTS_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class MealIngredients:
+    """Normalised meal -> ingredient lines (meal_id, position, ingredient_name, quantity)
+
+    meals keeps its JSON ingredients_list / quantities_list columns for the API, but they
+    are parsed once, when a meal is written, instead of on every read. The table is built
+    from meals whenever it doesn't exist yet (delete it to force a rebuild); with the
+    sqlite backend it is indexed by meal_id and ingredient_name.
+
+    Lines are written before their meal row, so a meal is never visible without them. A
+    crash between the two can leave orphan or (after a journal replay) repeated lines,
+    which reads drop.
+    """
+
+    def __init__(self, csv_handler: CSVHandler):
+        self.csv_handler = csv_handler
+        self.lines_file = csv_handler.meal_ingredients_file
+        # (table version, every line cleaned) from the last full read
+        self._all_lines = (None, None)
+
+        with self.csv_handler.locked(self.lines_file):
+            if not self.csv_handler.table_exists(self.lines_file):
+                self.rebuild()
+
+    @staticmethod
+    def meal_lines(meals: Iterable[Dict]) -> List[Dict]:
+        """Line rows for meal rows (JSON ingredients_list / quantities_list); unreadable meals are skipped"""
+        lines = []
+        for meal in meals:
+            try:
+                meal_id = int(float(meal['meal_id']))
+                names = json.loads(meal['ingredients_list'])
+                quantities = [float(quantity) for quantity in json.loads(meal['quantities_list'])]
+            except (KeyError, TypeError, ValueError):
+                logger.warning("Skipping meal with unreadable ingredients meal_id=%s", meal.get('meal_id'))
+                continue
+            lines.extend({'meal_id': meal_id, 'position': position, 'ingredient_name': name, 'quantity': quantity}
+                         for position, (name, quantity) in enumerate(zip(names, quantities)))
+        return lines
+
+    def rebuild(self):
+        """Recreate every meal's lines from the meals table (one-off migration)"""
+        with self.csv_handler.locked(self.lines_file):
+            meals = self.csv_handler.read_csv(self.csv_handler.meals_file)
+            meals = meals[meals['meal_id'].notna()] if 'meal_id' in meals else meals.iloc[0:0]
+            lines = pd.DataFrame(self.meal_lines(meals.to_dict('records')), columns=MEAL_INGREDIENTS_COLUMNS)
+            self.csv_handler.write_csv(lines, self.lines_file)
+            logger.info("Built meal ingredient lines meals=%d lines=%d", len(meals), len(lines))
+
+    def add(self, meals: List[Dict]) -> List[Dict]:
+        """Append the lines of new meal rows (call before appending the meals themselves)"""
+        lines = self.meal_lines(meals)
+        self.csv_handler.append_rows(lines, self.lines_file)
+        return lines
+
+    @staticmethod
+    def _clean(lines: pd.DataFrame) -> pd.DataFrame:
+        if lines.empty:
+            return pd.DataFrame(columns=MEAL_INGREDIENTS_COLUMNS)
+        lines = lines.dropna(subset=['meal_id']).drop_duplicates(['meal_id', 'position'], keep='last')
+        lines = lines.astype({'meal_id': 'int64', 'position': 'int64', 'quantity': 'float64'})
+        return lines.sort_values(['meal_id', 'position'], kind='stable')
+
+    def lines(self, meal_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """Lines of the given meals (all meals if None), in meal and ingredient order
+
+        The whole table is read once and reused until it changes (shared - do not modify in place).
+        """
+        version = self.csv_handler.file_version(self.lines_file)
+        cached_version, lines = self._all_lines
+        if lines is None or version is None or version != cached_version:
+            lines = self._clean(self.csv_handler.read_csv(self.lines_file))
+            self._all_lines = (version, lines)
+        if meal_ids is not None:
+            lines = lines[lines['meal_id'].isin(list(meal_ids))]
+        return lines
+
+    def lines_using(self, ingredient_name: str) -> pd.DataFrame:
+        """Lines of one ingredient across all meals (an indexed lookup with the sqlite backend)"""
+        return self._clean(self.csv_handler.select_rows(self.lines_file, {'ingredient_name': ingredient_name}))
+
+    def backfill(self, meals: List[Dict]) -> List[Dict]:
+        """Add lines for meal rows written without them (e.g. by an older version); returns the new lines"""
+        with self.csv_handler.locked(self.lines_file):
+            have = set(self.lines(int(float(meal['meal_id'])) for meal in meals)['meal_id'])
+            missing = [meal for meal in meals if int(float(meal['meal_id'])) not in have]
+            if not missing:
+                return []
+            logger.info("Adding missing meal ingredient lines meals=%d", len(missing))
+            return self.add(missing)
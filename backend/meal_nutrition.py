@@ -0,0 +1,226 @@
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .csv_handler import CSVHandler, MEAL_TOTAL_COLUMNS, MEAL_PER_SERVING_COLUMNS
+from .ingredient_catalog import IngredientCatalog, NUTRIENT_COLUMNS
+from .meal_ingredients import MealIngredients
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLUMNS = ['name'] + NUTRIENT_COLUMNS
+
+
+class MealNutritionIndex:
+    """Meal nutrient totals kept in step with ingredients.csv
+
+    Keeps an ingredient -> meals reverse index (from the meal_ingredients lines) and a
+    memo of every meal's total nutrient vector. The per-unit values the stored totals were
+    computed from are snapshotted in catalog_snapshot.csv; when ingredients.csv changes,
+    sync() diffs it against the snapshot and recomputes only the meals that use a changed
+    ingredient, in one batched matrix pass and one meals write.
+    """
+
+    def __init__(self, csv_handler: CSVHandler, catalog: IngredientCatalog, meal_ingredients: MealIngredients):
+        self.csv_handler = csv_handler
+        self.catalog = catalog
+        self.meal_ingredients = meal_ingredients
+        self.snapshot_file = csv_handler.catalog_snapshot_file
+        self._lock = threading.Lock()
+
+        # meal_id -> (ingredient names, quantities) and (meal_name, servings); neither changes once created
+        self._lines: Dict[int, Tuple[List[str], List[float]]] = {}
+        self._recipes: Dict[int, Tuple[str, float]] = {}
+        self._meals_by_ingredient: Dict[str, Set[int]] = {}
+        self._meals_version = None
+        # meal_id -> unrounded total nutrients (NUTRIENT_COLUMNS order) for the current catalog
+        self._vectors: Dict[int, np.ndarray] = {}
+        # Catalog version last compared against the snapshot
+        self._synced_version = None
+
+    def _load_meals(self):
+        """Bring the reverse index up to date with meals added or removed since the last call"""
+        version = self.csv_handler.file_version(self.csv_handler.meals_file)
+        if version == self._meals_version and self._meals_version is not None:
+            return
+
+        meals = self.csv_handler.read_csv(self.csv_handler.meals_file)
+        if 'meal_id' in meals:
+            meals = meals[pd.to_numeric(meals['meal_id'], errors='coerce').notna()]
+        else:
+            meals = pd.DataFrame(columns=['meal_id'])
+        meal_ids = pd.to_numeric(meals['meal_id']).astype('int64')
+        current = set(meal_ids)
+
+        new_meals = meals[~meal_ids.isin(list(self._lines)).to_numpy()]
+        if not new_meals.empty:
+            new_ids = pd.to_numeric(new_meals['meal_id']).astype('int64')
+            lines = self.meal_ingredients.lines(new_ids)
+            without_lines = ~new_ids.isin(list(lines['meal_id'])).to_numpy()
+            if without_lines.any():
+                backfilled = self.meal_ingredients.backfill(new_meals[without_lines].to_dict('records'))
+                lines = pd.concat([lines, pd.DataFrame(backfilled, columns=lines.columns)], ignore_index=True)
+
+            lines_by_meal = {int(meal_id): (group['ingredient_name'].tolist(), group['quantity'].astype(float).tolist())
+                             for meal_id, group in lines.groupby('meal_id', sort=False)}
+            names = new_meals['meal_name'] if 'meal_name' in new_meals else pd.Series(None, index=new_meals.index)
+            servings = pd.to_numeric(new_meals['servings'], errors='coerce').fillna(1.0) \
+                if 'servings' in new_meals else pd.Series(1.0, index=new_meals.index)
+            for meal_id, meal_name, meal_servings in zip(new_ids, names, servings):
+                meal_id = int(meal_id)
+                if meal_id not in lines_by_meal:
+                    continue  # Unreadable ingredients (logged when its lines were built)
+                self._lines[meal_id] = lines_by_meal[meal_id]
+                self._recipes[meal_id] = (meal_name, float(meal_servings))
+                for name in lines_by_meal[meal_id][0]:
+                    self._meals_by_ingredient.setdefault(name, set()).add(meal_id)
+
+        for meal_id in set(self._lines) - current:
+            names, _ = self._lines.pop(meal_id)
+            self._recipes.pop(meal_id, None)
+            self._vectors.pop(meal_id, None)
+            for name in names:
+                self._meals_by_ingredient.get(name, set()).discard(meal_id)
+
+        self._meals_version = version
+
+    def recipe(self, meal_id: int) -> Optional[Dict]:
+        """{meal_name, servings, ingredients: [{name, quantity}]} for a meal, or None"""
+        with self._lock:
+            self._load_meals()
+            lines = self._lines.get(meal_id)
+            if lines is None:
+                return None
+            meal_name, servings = self._recipes[meal_id]
+            names, quantities = lines
+        return {
+            'meal_name': meal_name,
+            'servings': servings,
+            'ingredients': [{'name': name, 'quantity': quantity} for name, quantity in zip(names, quantities)],
+        }
+
+    def meals_using(self, names: Iterable[str]) -> Set[int]:
+        """IDs of the meals that contain any of the given ingredients"""
+        with self._lock:
+            self._load_meals()
+            return set().union(*(self._meals_by_ingredient.get(name, set()) for name in names))
+
+    def vectors(self, meal_ids: List[int]) -> np.ndarray:
+        """Total nutrients per meal (rows in meal_ids order), computing only those not memoised"""
+        self.sync()
+        with self._lock:
+            self._load_meals()
+            return self._vectors_for(meal_ids)
+
+    def _vectors_for(self, meal_ids: List[int]) -> np.ndarray:
+        missing = [meal_id for meal_id in meal_ids if meal_id not in self._vectors and meal_id in self._lines]
+        if missing:
+            names, quantities, groups = [], [], []
+            for group, meal_id in enumerate(missing):
+                meal_names, meal_quantities = self._lines[meal_id]
+                names.extend(meal_names)
+                quantities.extend(meal_quantities)
+                groups.extend([group] * len(meal_names))
+            totals = self.catalog.nutrition_vectors(names, quantities, groups, len(missing))
+            self._vectors.update(zip(missing, totals))
+
+        empty = np.zeros(len(NUTRIENT_COLUMNS))
+        if not meal_ids:
+            return np.zeros((0, len(NUTRIENT_COLUMNS)))
+        return np.vstack([self._vectors.get(meal_id, empty) for meal_id in meal_ids])
+
+    def changed_ingredients(self) -> List[str]:
+        """Ingredients whose per-unit nutrients differ from the snapshot (added and removed ones too)"""
+        current = self.catalog.per_unit_frame()
+        snapshot = self.csv_handler.read_csv(self.snapshot_file)
+        if snapshot.empty:
+            return sorted(current.index)
+
+        snapshot = snapshot.drop_duplicates('name').set_index('name')[NUTRIENT_COLUMNS]
+        names = current.index.union(snapshot.index)
+        before = snapshot.reindex(names).to_numpy(dtype=float)
+        after = current.reindex(names).to_numpy(dtype=float)
+        same = np.isclose(before, after, rtol=1e-9, atol=1e-12) | (np.isnan(before) & np.isnan(after))
+        return names[~same.all(axis=1)].tolist()
+
+    def _write_snapshot(self):
+        snapshot = self.catalog.per_unit_frame().reset_index()
+        self.csv_handler.write_csv(snapshot[SNAPSHOT_COLUMNS], self.snapshot_file)
+
+    def sync(self) -> Optional[Dict]:
+        """Recompute the meals affected by catalog changes since the last sync
+
+        Cheap when ingredients.csv hasn't changed (a version check). The first sync with no
+        snapshot on disk takes one and assumes the stored meal totals are current.
+        """
+        version = self.catalog.version
+        if version == self._synced_version:
+            return None
+
+        with self.csv_handler.locked(self.snapshot_file):
+            if not self.csv_handler.table_exists(self.snapshot_file):
+                self._write_snapshot()
+                self._synced_version = version
+                return None
+
+            changed = self.changed_ingredients()
+            result = self.recompute(changed) if changed else None
+            if changed:
+                self._write_snapshot()
+            self._synced_version = version
+            return result
+
+    def recompute(self, ingredient_names: Optional[List[str]] = None) -> Dict:
+        """Recompute and store totals for the meals using the given ingredients (every meal if None)"""
+        with self._lock:
+            self._load_meals()
+            if ingredient_names is None:
+                meal_ids = sorted(self._lines)
+            else:
+                meal_ids = sorted(set().union(*(self._meals_by_ingredient.get(name, set())
+                                                for name in ingredient_names)))
+            for meal_id in meal_ids:
+                self._vectors.pop(meal_id, None)
+            totals = self._vectors_for(meal_ids)
+
+        updated = self._store_totals(meal_ids, totals) if meal_ids else []
+        logger.info("Recomputed meal nutrition ingredients=%s meals_checked=%d meals_updated=%d",
+                    'all' if ingredient_names is None else len(ingredient_names), len(meal_ids), len(updated))
+        return {
+            'ingredients': sorted(ingredient_names) if ingredient_names is not None else None,
+            'meals_checked': len(meal_ids),
+            'meals_updated': updated,
+        }
+
+    def _store_totals(self, meal_ids: List[int], totals: np.ndarray) -> List[int]:
+        """Write new totals / per-serving values for meals whose stored values changed; returns their IDs"""
+        new_totals = pd.DataFrame(np.round(totals, 2), index=meal_ids, columns=MEAL_TOTAL_COLUMNS)
+
+        with self.csv_handler.locked(self.csv_handler.meals_file):
+            meals = self.csv_handler.read_csv(self.csv_handler.meals_file)
+            if meals.empty:
+                return []
+
+            ids = pd.to_numeric(meals['meal_id'], errors='coerce')
+            rows = ids.isin(meal_ids)
+            if not rows.any():
+                return []
+
+            totals_now = new_totals.reindex(ids[rows].astype(int)).to_numpy()
+            servings = pd.to_numeric(meals.loc[rows, 'servings'], errors='coerce').fillna(1).to_numpy(dtype=float)
+            servings[servings <= 0] = 1  # Same guard as per-serving values at creation
+            per_serving_now = np.round(totals_now / servings[:, None], 2)
+
+            stored = meals.loc[rows, MEAL_TOTAL_COLUMNS + MEAL_PER_SERVING_COLUMNS].apply(pd.to_numeric, errors='coerce')
+            new_values = np.hstack([totals_now, per_serving_now])
+            differs = ~np.isclose(stored.to_numpy(dtype=float), new_values).all(axis=1)
+            if not differs.any():
+                return []
+
+            meals = meals.copy()
+            changed_rows = meals.index[rows][differs]
+            meals.loc[changed_rows, MEAL_TOTAL_COLUMNS + MEAL_PER_SERVING_COLUMNS] = new_values[differs]
+            self.csv_handler.write_csv(meals, self.csv_handler.meals_file)
+
+            return [int(meal_id) for meal_id in ids[changed_rows]]
@@ -1,44 +1,431 @@
-from csv_handler import CSVHandler
-from ingredient_operations import IngredientOperations
+from .csv_handler import CSVHandler
+from .ingredient_operations import IngredientOperations
+from .bulk_import import BulkImportError, parse_daily_entry, parse_meal
+from .ingredient_catalog import NUTRIENT_COLUMNS
+from .ingredient_consumption import IngredientConsumption
+from .meal_ingredients import MealIngredients
+from .meal_nutrition import MealNutritionIndex
+from .meal_planner import MealPlanner
+from .meal_variants import MAX_VARIANTS, apply_variant
+from .nutrition_rollups import NutritionRollups
+from .serialization import clean_record, dataframe_to_records
+import numpy as np
 import pandas as pd
+import logging
 import json
-import os
 from datetime import datetime
 from typing import Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
 
 class MealOperations:
-    def __init__(self, csv_handler: CSVHandler):
+    def __init__(self, csv_handler: CSVHandler, ingredient_ops: Optional[IngredientOperations] = None):
         self.csv_handler = csv_handler
-        self.ingredient_ops = IngredientOperations(csv_handler)
+        # Share the caller's ingredient catalog when given, so it is only loaded once
+        self.ingredient_ops = ingredient_ops or IngredientOperations(csv_handler)
 
-        # Daily nutrition file path
-        self.daily_nutrition_file = os.path.join(csv_handler.data_dir, "daily_nutrition.csv")
-        self._initialize_daily_nutrition_file()
+        # Daily nutrition table (created by the storage handler)
+        self.daily_nutrition_file = csv_handler.daily_nutrition_file
 
         # Ensure servings_remaining column exists in meals.csv
         self.csv_handler.ensure_servings_remaining_column()
 
-    def _initialize_daily_nutrition_file(self):
-        """Create daily nutrition CSV file if it doesn't exist"""
-        import os
-        if not os.path.exists(self.daily_nutrition_file):
-            daily_nutrition_df = pd.DataFrame(columns=[
-                'entry_id', 'date', 'meal_id', 'meal_name', 'servings_consumed',
-                'calories_consumed', 'protein_consumed', 'fat_total_consumed',
-                'fat_saturated_consumed', 'carbohydrate_consumed', 'sugars_consumed',
-                'dietary_fibre_consumed', 'sodium_consumed', 'calcium_consumed',
-                'added_timestamp'
-            ])
-            daily_nutrition_df.to_csv(self.daily_nutrition_file, index=False)
+        # Per-date totals, updated alongside every daily nutrition change
+        self.rollups = NutritionRollups(csv_handler)
+
+        # One row per meal ingredient line, built from meals on first run
+        self.meal_ingredients = MealIngredients(csv_handler)
+
+        # Meal totals follow ingredient corrections (only the meals using a changed ingredient)
+        self.meal_nutrition = MealNutritionIndex(csv_handler, self.ingredient_ops.catalog, self.meal_ingredients)
+        self.ingredient_consumption = IngredientConsumption(csv_handler, self.ingredient_ops.catalog,
+                                                            self.meal_ingredients)
+
+        # Optional WriteBehindQueue: new meals, daily entries and meal log rows are acknowledged
+        # straight away and persisted in the background
+        self.write_behind = None
+
+    def flush_pending(self):
+        """Persist queued write-behind rows (call before reading or rewriting the tables)"""
+        if self.write_behind is not None:
+            self.write_behind.flush()
 
     def create_meal(self, meal_name: str, servings: int, ingredients: List[Dict]) -> Dict:
         """Create a new meal with list of ingredients, quantities, and servings"""
-        meals_df = self.csv_handler.read_csv(self.csv_handler.meals_file)
-
         # Calculate total nutrition
         total_nutrition = self._calculate_total_nutrition(ingredients)
+        new_meal = self._build_meal(meal_name, servings, ingredients, total_nutrition)
+
+        if self.write_behind is not None:
+            new_meal['meal_id'] = self.csv_handler.next_id(self.csv_handler.meals_file, 'meal_id')
+            self.write_behind.submit('meal', new_meal)
+            return new_meal
+
+        # Allocate the ID and append under one lock so other workers can't take the same ID
+        with self.csv_handler.locked(self.csv_handler.meals_file):
+            new_meal['meal_id'] = self.csv_handler.next_id(self.csv_handler.meals_file, 'meal_id')
+            self.meal_ingredients.add([new_meal])
+            self.csv_handler.append_row(new_meal, self.csv_handler.meals_file)
+
+        return new_meal
+
+    def add_meal_to_daily_nutrition(self, date: str, meal_id: int, servings_consumed: float) -> Dict:
+        """Add a meal to daily nutrition tracking"""
+        self.meal_nutrition.sync()
+
+        if self.write_behind is not None:
+            meal = self.write_behind.get_meal(meal_id)
+            if not meal:
+                raise ValueError(f"Meal with ID {meal_id} not found")
+            self._check_servings_available(meal, servings_consumed)
+
+            new_entry = self._build_daily_entry(date, meal_id, meal, servings_consumed)
+            new_entry['entry_id'] = self.csv_handler.next_id(self.daily_nutrition_file, 'entry_id')
+            self.write_behind.submit('daily', new_entry)
+            return new_entry
+
+        # One unit of work: meals is read once, the servings check and the update can't
+        # interleave with other requests, and servings_remaining is written once
+        with self.csv_handler.servings_unit_of_work() as servings:
+            # Get meal details
+            meal = servings.get_meal(meal_id)
+            if not meal:
+                raise ValueError(f"Meal with ID {meal_id} not found")
+            meal = clean_record(meal)
+            self._check_servings_available(meal, servings_consumed)
+
+            new_entry = self._build_daily_entry(date, meal_id, meal, servings_consumed)
+
+            with self.csv_handler.locked(self.daily_nutrition_file):
+                new_entry['entry_id'] = self.csv_handler.next_id(self.daily_nutrition_file, 'entry_id')
+                self.csv_handler.append_row(new_entry, self.daily_nutrition_file)
+                self.rollups.apply(pd.DataFrame([new_entry]))
+
+            # Subtract consumed servings - committed with a single meals write when the block exits
+            servings.add(meal_id, -servings_consumed)
+
+        return new_entry
+
+    def import_meals(self, records: List[Dict]) -> List[Dict]:
+        """Create many meals at once: all records are validated first, then written in one append
+
+        Raises BulkImportError listing every invalid record, in which case nothing is written.
+        """
+        self.flush_pending()
+        catalog = self.ingredient_ops.catalog
+        parsed, errors = [], []
+        for row, record in enumerate(records):
+            try:
+                parsed.append(parse_meal(record, lambda name: catalog.get(name) is not None))
+            except ValueError as e:
+                errors.append({'row': row, 'error': str(e)})
+        if errors:
+            raise BulkImportError(errors)
+        if not parsed:
+            return []
+
+        totals = self._calculate_total_nutrition_many([meal['ingredients'] for meal in parsed])
+        new_meals = [
+            self._build_meal(meal['meal_name'], meal['servings'], meal['ingredients'], total_nutrition)
+            for meal, total_nutrition in zip(parsed, totals)
+        ]
+
+        with self.csv_handler.locked(self.csv_handler.meals_file):
+            first_id = self.csv_handler.allocate_ids(self.csv_handler.meals_file, 'meal_id', len(new_meals))
+            for offset, new_meal in enumerate(new_meals):
+                new_meal['meal_id'] = first_id + offset
+            self.meal_ingredients.add(new_meals)
+            self.csv_handler.append_rows(new_meals, self.csv_handler.meals_file)
+
+        return new_meals
+
+    def import_daily_entries(self, records: List[Dict]) -> List[Dict]:
+        """Add many {date, meal_id, servings} entries at once, validated first and written in one append
+
+        Servings are taken off each meal's servings_remaining as for single entries (but not
+        checked against it, so historical backfills go through). Raises BulkImportError listing
+        every invalid record, in which case nothing is written.
+        """
+        self.meal_nutrition.sync()
+        self.flush_pending()
+
+        with self.csv_handler.servings_unit_of_work() as servings:
+            meals = {}
+            parsed, errors = [], []
+            for row, record in enumerate(records):
+                try:
+                    entry = parse_daily_entry(record)
+                    if entry['meal_id'] not in meals:
+                        meal = servings.get_meal(entry['meal_id'])
+                        meals[entry['meal_id']] = clean_record(meal) if meal else None
+                    if meals[entry['meal_id']] is None:
+                        raise ValueError(f"Meal with ID {entry['meal_id']} not found")
+                    parsed.append(entry)
+                except ValueError as e:
+                    errors.append({'row': row, 'error': str(e)})
+            if errors:
+                raise BulkImportError(errors)
+            if not parsed:
+                return []
+
+            new_entries = [
+                self._build_daily_entry(entry['date'], entry['meal_id'], meals[entry['meal_id']], entry['servings'])
+                for entry in parsed
+            ]
+
+            with self.csv_handler.locked(self.daily_nutrition_file):
+                first_id = self.csv_handler.allocate_ids(self.daily_nutrition_file, 'entry_id', len(new_entries))
+                for offset, new_entry in enumerate(new_entries):
+                    new_entry['entry_id'] = first_id + offset
+                self.csv_handler.append_rows(new_entries, self.daily_nutrition_file)
+                self.rollups.apply(pd.DataFrame(new_entries))
+
+            consumed = pd.DataFrame(parsed).groupby('meal_id')['servings'].sum()
+            for meal_id, servings_consumed in consumed.items():
+                servings.add(meal_id, -servings_consumed)
+
+        return new_entries
+
+    def get_daily_nutrition(self, date: str) -> List[Dict]:
+        """Get all nutrition entries for a specific date"""
+        return dataframe_to_records(self.get_daily_nutrition_frame(date))
+
+    def get_daily_nutrition_frame(self, date: str) -> pd.DataFrame:
+        """Nutrition entries for a date as a DataFrame (serialised straight to JSON by the API)"""
+        self.flush_pending()
+        return self.csv_handler.select_rows(self.daily_nutrition_file, {'date': date})
+
+    def remove_daily_nutrition_entry(self, date: str, entry_id: int):
+        """Remove a specific entry from daily nutrition"""
+        self.flush_pending()
+        with self.csv_handler.servings_unit_of_work() as servings:
+            removed = self.csv_handler.delete_rows(self.daily_nutrition_file, {'date': date, 'entry_id': entry_id})
+            if removed.empty:
+                logger.warning("Entry not found date=%s entry_id=%s", date, entry_id)
+                return
+
+            self.rollups.apply(removed, sign=-1)
+
+            # Add servings back to servings_remaining
+            entry = removed.iloc[0]
+            servings.add(entry['meal_id'], entry['servings_consumed'])
+
+    def clear_daily_nutrition(self, date: str):
+        """Clear all nutrition entries for a specific date"""
+        self.flush_pending()
+        with self.csv_handler.servings_unit_of_work() as servings:
+            # Remove all entries for the date
+            date_entries = self.csv_handler.delete_rows(self.daily_nutrition_file, {'date': date})
+            if date_entries.empty:
+                return
+            self.rollups.apply(date_entries, sign=-1)
+
+            # Restore servings, summed per meal, in one update
+            restored = date_entries.groupby('meal_id')['servings_consumed'].sum()
+            for meal_id, servings_consumed in restored.items():
+                servings.add(meal_id, servings_consumed)
+
+    def recompute_meal_nutrition(self, ingredient_names: Optional[List[str]] = None,
+                                 all_meals: bool = False) -> Dict:
+        """Recompute stored meal totals from the current ingredient catalog
+
+        By default only meals using ingredients changed since the last recompute are touched;
+        ingredient_names picks the ingredients explicitly, all_meals recomputes every meal.
+        """
+        self.flush_pending()
+        if all_meals:
+            return self.meal_nutrition.recompute()
+        if ingredient_names:
+            return self.meal_nutrition.recompute(ingredient_names)
+        return self.meal_nutrition.sync() or {'ingredients': [], 'meals_checked': 0, 'meals_updated': []}
+
+    def plan_meals(self, targets: Dict, limits: Optional[Dict] = None, days: int = 7, **options) -> Dict:
+        """Multi-day plan of servings from the stored meals that comes close to daily targets
+
+        options are passed on to MealPlanner.plan (serving_step, max_servings_per_meal,
+        time_budget_ms, start_date).
+        """
+        return MealPlanner(self.get_all_meals_frame()).plan(targets, limits, days, **options)
+
+    def evaluate_meal_variants(self, meal_id: int, variants: List[Dict]) -> Optional[Dict]:
+        """Totals and per-serving nutrition of a stored meal under each variant (see apply_variant)
+
+        Nothing is stored. Each variant starts from the meal's cached nutrient vector and only
+        the ingredients it changes are looked up, all variants together in one catalog pass.
+        Returns None if the meal doesn't exist; a bad variant gets an error entry of its own.
+        """
+        if len(variants) > MAX_VARIANTS:
+            raise ValueError(f"At most {MAX_VARIANTS} variants per request")
+
+        self.flush_pending()
+        base_vector = self.meal_nutrition.vectors([meal_id])[0]
+        recipe = self.meal_nutrition.recipe(meal_id)
+        if recipe is None:
+            return None
+
+        catalog = self.ingredient_ops.catalog
+        base_quantities: Dict[str, float] = {}
+        for line in recipe['ingredients']:
+            base_quantities[line['name']] = base_quantities.get(line['name'], 0.0) + line['quantity']
+
+        # Per variant, the quantity change of each ingredient relative to the scaled base meal
+        applied, names, quantities, groups = [], [], [], []
+        for variant in variants:
+            try:
+                result = apply_variant(recipe['ingredients'], recipe['servings'], variant,
+                                       lambda name: catalog.get(name) is not None)
+            except ValueError as e:
+                applied.append({'error': str(e)})
+                continue
+
+            new_quantities: Dict[str, float] = {}
+            for line in result['ingredients']:
+                new_quantities[line['name']] = new_quantities.get(line['name'], 0.0) + line['quantity']
+            for name in set(base_quantities) | set(new_quantities):
+                change = new_quantities.get(name, 0.0) - base_quantities.get(name, 0.0) * result['scale']
+                if change:
+                    names.append(name)
+                    quantities.append(change)
+                    groups.append(len(applied))
+            applied.append(result)
+
+        deltas = catalog.nutrition_vectors(names, quantities, groups, len(applied))
+
+        def nutrients(vector: np.ndarray) -> Dict:
+            return {nutrient: round(float(value), 2) for nutrient, value in zip(NUTRIENT_COLUMNS, vector)}
+
+        base_total = nutrients(base_vector)
+        results = []
+        for variant, result, delta in zip(variants, applied, deltas):
+            label = variant.get('label') if isinstance(variant, dict) else None
+            if 'error' in result:
+                results.append({'label': label, 'error': result['error']})
+                continue
+            total = nutrients(base_vector * result['scale'] + delta)
+            results.append({
+                'label': label,
+                'ingredients': result['ingredients'],
+                'servings': result['servings'],
+                'total_nutrition': total,
+                'per_serving': self._calculate_per_serving_nutrition(total, result['servings']),
+                'change': {nutrient: round(total[nutrient] - base_total[nutrient], 2) for nutrient in NUTRIENT_COLUMNS},
+            })
+
+        return {
+            'meal_id': meal_id,
+            'base': {
+                'meal_name': recipe['meal_name'],
+                'ingredients': recipe['ingredients'],
+                'servings': recipe['servings'],
+                'total_nutrition': base_total,
+                'per_serving': self._calculate_per_serving_nutrition(base_total, recipe['servings']),
+            },
+            'variants': results,
+        }
+
+    def get_nutrition_summary(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                              granularity: str = 'day') -> Dict:
+        """Daily or weekly nutrient totals over a date range, from the rollup table"""
+        self.flush_pending()
+        return self.rollups.summary(date_from, date_to, granularity)
+
+    def get_ingredient_consumption(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                                   sort: str = 'calories', limit: Optional[int] = None) -> Dict:
+        """Quantity of each ingredient eaten over a date range and the nutrients it contributed"""
+        self.flush_pending()
+        return self.ingredient_consumption.report(date_from, date_to, sort, limit)
 
+    def log_meal(self, meal_id: int, meal_time: str, date: str = None, notes: str = "") -> Dict:
+        """Log a meal consumption"""
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+
+        # Get meal details
+        if self.write_behind is not None:
+            meal = self.write_behind.get_meal(meal_id)
+        else:
+            meal = self.get_meal_by_id(meal_id)
+        if not meal:
+            raise ValueError(f"Meal with ID {meal_id} not found")
+
+        new_log = self._build_meal_log(date, meal_time, meal_id, meal, notes)
+
+        if self.write_behind is not None:
+            new_log['log_id'] = self.csv_handler.next_id(self.csv_handler.meal_log_file, 'log_id')
+            self.write_behind.submit('log', new_log)
+            return new_log
+
+        with self.csv_handler.locked(self.csv_handler.meal_log_file):
+            new_log['log_id'] = self.csv_handler.next_id(self.csv_handler.meal_log_file, 'log_id')
+            self.csv_handler.append_row(new_log, self.csv_handler.meal_log_file)
+
+        return new_log
+
+    def get_all_meals(self) -> List[Dict]:
+        """Get all created meals"""
+        try:
+            meals_list = dataframe_to_records(self.get_all_meals_frame())
+            logger.debug("Loaded valid meals count=%d", len(meals_list))
+            return meals_list
+
+        except Exception as e:
+            logger.exception("Error in get_all_meals: %s", e)
+            return []
+
+    def get_all_meals_frame(self) -> pd.DataFrame:
+        """Valid meals as a DataFrame (serialised straight to JSON by the API)"""
+        self.flush_pending()
+        self.meal_nutrition.sync()
+        meals_df = self.csv_handler.read_csv(self.csv_handler.meals_file)
+
+        if meals_df.empty:
+            return meals_df
+
+        # Ensure servings_remaining column exists
+        if 'servings_remaining' not in meals_df.columns:
+            meals_df['servings_remaining'] = None
+
+        # Filter out invalid meals (empty meal_name or meal_id)
+        valid_meals_mask = (
+                meals_df['meal_name'].notna() &
+                (meals_df['meal_name'] != '') &
+                meals_df['meal_id'].notna()
+        )
+        meals_df = meals_df[valid_meals_mask]
+
+        if meals_df.empty:
+            logger.debug("No valid meals found after filtering")
+
+        return meals_df
+
+    def get_meals_using_ingredient(self, ingredient_name: str) -> List[Dict]:
+        """Meals containing an ingredient, with the quantity each uses (from the meal_ingredients lines)"""
+        self.flush_pending()
+        lines = self.meal_ingredients.lines_using(ingredient_name)
+        if lines.empty:
+            return []
+
+        quantities = lines.groupby('meal_id', sort=True)['quantity'].sum().rename('quantity')
+        meals = self.get_all_meals_frame()
+        if meals.empty:
+            return []
+        meals = meals.assign(meal_id=pd.to_numeric(meals['meal_id']).astype('int64'))
+        meals = meals.join(quantities, on='meal_id', how='inner')
+        return dataframe_to_records(meals[['meal_id', 'meal_name', 'servings', 'servings_remaining', 'quantity']])
+
+    def get_meal_by_id(self, meal_id: int) -> Optional[Dict]:
+        """Get specific meal by ID"""
+        self.flush_pending()
+        self.meal_nutrition.sync()
+        meal = self.csv_handler.select_rows(self.csv_handler.meals_file, {'meal_id': meal_id})
+        if meal.empty:
+            return None
+
+        return dataframe_to_records(meal.iloc[:1])[0]
+
+    def _build_meal(self, meal_name: str, servings: int, ingredients: List[Dict], total_nutrition: Dict) -> Dict:
+        """Meal row for meals.csv (meal_id is allocated by the caller)"""
         # Calculate per-serving nutrition
         per_serving_nutrition = self._calculate_per_serving_nutrition(total_nutrition, servings)
 
@@ -47,7 +434,7 @@ class MealOperations:
         quantities = [ing['quantity'] for ing in ingredients]
 
         new_meal = {
-            'meal_id': self.csv_handler.get_next_id(meals_df, 'meal_id'),
+            'meal_id': None,  # Allocated by the caller, under the table lock
             'meal_name': meal_name,
             'servings': servings,
             'servings_remaining': servings,  # NEW: Initialize servings_remaining to servings
@@ -76,36 +463,15 @@ class MealOperations:
             'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
-        meals_df = pd.concat([meals_df, pd.DataFrame([new_meal])], ignore_index=True)
-        self.csv_handler.write_csv(meals_df, self.csv_handler.meals_file)
-
         return new_meal
 
-    def add_meal_to_daily_nutrition(self, date: str, meal_id: int, servings_consumed: float) -> Dict:
-        """Add a meal to daily nutrition tracking"""
-        # Get meal details
-        meal = self.get_meal_by_id(meal_id)
-        if not meal:
-            raise ValueError(f"Meal with ID {meal_id} not found")
-
-        # Check if enough servings are available (only for new meals with servings_remaining data)
-        servings_remaining = meal.get('servings_remaining')
-        if servings_remaining is not None and servings_remaining != '' and not pd.isna(servings_remaining):
-            try:
-                remaining_float = float(servings_remaining)
-                if remaining_float < servings_consumed:
-                    raise ValueError(
-                        f"Not enough servings available. Requested: {servings_consumed}, Available: {remaining_float}")
-            except (ValueError, TypeError) as e:
-                print(f"Could not parse servings_remaining: {servings_remaining}, error: {e}")
-
-        daily_nutrition_df = self.csv_handler.read_csv(self.daily_nutrition_file)
-
+    def _build_daily_entry(self, date: str, meal_id: int, meal: Dict, servings_consumed: float) -> Dict:
+        """Daily nutrition row for some servings of a meal (entry_id is allocated by the caller)"""
         # Calculate nutrition for consumed servings
         consumed_nutrition = self._calculate_consumed_nutrition(meal, servings_consumed)
 
-        new_entry = {
-            'entry_id': self.csv_handler.get_next_id(daily_nutrition_df, 'entry_id'),
+        return {
+            'entry_id': None,  # Allocated by the caller, under the table lock
             'date': date,
             'meal_id': meal_id,
             'meal_name': meal['meal_name'],
@@ -122,99 +488,10 @@ class MealOperations:
             'added_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
-        daily_nutrition_df = pd.concat([daily_nutrition_df, pd.DataFrame([new_entry])], ignore_index=True)
-        self.csv_handler.write_csv(daily_nutrition_df, self.daily_nutrition_file)
-
-        # Update servings_remaining (subtract consumed servings)
-        try:
-            self.csv_handler.update_servings_remaining(meal_id, -servings_consumed)
-        except Exception as e:
-            print(f"Could not update servings_remaining: {e}")
-
-        return new_entry
-
-    def get_daily_nutrition(self, date: str) -> List[Dict]:
-        """Get all nutrition entries for a specific date"""
-        daily_nutrition_df = self.csv_handler.read_csv(self.daily_nutrition_file)
-        if daily_nutrition_df.empty:
-            return []
-
-        day_entries = daily_nutrition_df[daily_nutrition_df['date'] == date]
-
-        # Convert to dict and manually clean up NaN values
-        entries_list = day_entries.to_dict('records')
-
-        # Clean up NaN values manually
-        for entry in entries_list:
-            for key, value in entry.items():
-                if pd.isna(value):
-                    entry[key] = None
-                elif isinstance(value, str) and value.lower() == 'nan':
-                    entry[key] = None
-
-        return entries_list
-
-    def remove_daily_nutrition_entry(self, date: str, entry_id: int):
-        """Remove a specific entry from daily nutrition"""
-        daily_nutrition_df = self.csv_handler.read_csv(self.daily_nutrition_file)
-        if daily_nutrition_df.empty:
-            return
-
-        # Find the entry to get meal_id and servings_consumed before removing
-        entry_mask = (daily_nutrition_df['date'] == date) & (daily_nutrition_df['entry_id'] == entry_id)
-        if entry_mask.any():
-            entry = daily_nutrition_df[entry_mask].iloc[0]
-            meal_id = entry['meal_id']
-            servings_consumed = entry['servings_consumed']
-
-            # Remove the entry
-            daily_nutrition_df = daily_nutrition_df[~entry_mask]
-            self.csv_handler.write_csv(daily_nutrition_df, self.daily_nutrition_file)
-
-            # Add servings back to servings_remaining
-            try:
-                self.csv_handler.update_servings_remaining(meal_id, servings_consumed)
-            except Exception as e:
-                print(f"Could not update servings_remaining: {e}")
-        else:
-            print(f"Entry not found: date={date}, entry_id={entry_id}")
-
-    def clear_daily_nutrition(self, date: str):
-        """Clear all nutrition entries for a specific date"""
-        daily_nutrition_df = self.csv_handler.read_csv(self.daily_nutrition_file)
-        if daily_nutrition_df.empty:
-            return
-
-        # Get all entries for the date to restore servings_remaining
-        date_entries = daily_nutrition_df[daily_nutrition_df['date'] == date]
-
-        # Restore servings for each entry
-        for _, entry in date_entries.iterrows():
-            try:
-                meal_id = entry['meal_id']
-                servings_consumed = entry['servings_consumed']
-                self.csv_handler.update_servings_remaining(meal_id, servings_consumed)
-            except Exception as e:
-                print(f"Could not restore servings for meal {entry['meal_id']}: {e}")
-
-        # Remove all entries for the date
-        daily_nutrition_df = daily_nutrition_df[daily_nutrition_df['date'] != date]
-        self.csv_handler.write_csv(daily_nutrition_df, self.daily_nutrition_file)
-
-    def log_meal(self, meal_id: int, meal_time: str, date: str = None, notes: str = "") -> Dict:
-        """Log a meal consumption"""
-        if date is None:
-            date = datetime.now().strftime('%Y-%m-%d')
-
-        # Get meal details
-        meal = self.get_meal_by_id(meal_id)
-        if not meal:
-            raise ValueError(f"Meal with ID {meal_id} not found")
-
-        meal_log_df = self.csv_handler.read_csv(self.csv_handler.meal_log_file)
-
+    def _build_meal_log(self, date: str, meal_time: str, meal_id: int, meal: Dict, notes: str) -> Dict:
+        """Meal log row for a meal eaten at a meal time (log_id is allocated by the caller)"""
         new_log = {
-            'log_id': self.csv_handler.get_next_id(meal_log_df, 'log_id'),
+            'log_id': None,  # Allocated by the caller, under the table lock
             'date': date,
             'meal_time': meal_time,
             'meal_id': meal_id,
@@ -245,94 +522,27 @@ class MealOperations:
             'notes': notes
         }
 
-        meal_log_df = pd.concat([meal_log_df, pd.DataFrame([new_log])], ignore_index=True)
-        self.csv_handler.write_csv(meal_log_df, self.csv_handler.meal_log_file)
-
         return new_log
 
-    def get_all_meals(self) -> List[Dict]:
-        """Get all created meals"""
-        try:
-            meals_df = self.csv_handler.read_csv(self.csv_handler.meals_file)
-
-            if meals_df.empty:
-                return []
-
-            # Ensure servings_remaining column exists
-            if 'servings_remaining' not in meals_df.columns:
-                meals_df['servings_remaining'] = None
-
-            # Filter out invalid meals (empty meal_name or meal_id)
-            valid_meals_mask = (
-                    meals_df['meal_name'].notna() &
-                    (meals_df['meal_name'] != '') &
-                    meals_df['meal_id'].notna()
-            )
-            meals_df = meals_df[valid_meals_mask]
-
-            if meals_df.empty:
-                print("No valid meals found after filtering")
-                return []
-
-            # Convert to dict first, then clean up NaN values
-            meals_list = meals_df.to_dict('records')
-
-            # Clean up NaN values manually
-            for meal in meals_list:
-                for key, value in meal.items():
-                    if pd.isna(value):
-                        meal[key] = None
-                    elif isinstance(value, str) and value.lower() == 'nan':
-                        meal[key] = None
-
-            print(f"Successfully loaded {len(meals_list)} valid meals")
-            return meals_list
-
-        except Exception as e:
-            print(f"Error in get_all_meals: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
-
-    def get_meal_by_id(self, meal_id: int) -> Optional[Dict]:
-        """Get specific meal by ID"""
-        meals_df = self.csv_handler.read_csv(self.csv_handler.meals_file)
-        if meals_df.empty:
-            return None
-
-        meal = meals_df[meals_df['meal_id'] == meal_id]
-        if meal.empty:
-            return None
-
-        # Convert to dict and manually clean up NaN values
-        meal_dict = meal.iloc[0].to_dict()
-
-        # Clean up NaN values manually
-        for key, value in meal_dict.items():
-            if pd.isna(value):
-                meal_dict[key] = None
-            elif isinstance(value, str) and value.lower() == 'nan':
-                meal_dict[key] = None
-
-        return meal_dict
+    def _check_servings_available(self, meal: Dict, servings_consumed: float):
+        """Warn when a meal has fewer servings left than are being eaten (only for meals with servings_remaining data)"""
+        servings_remaining = meal.get('servings_remaining')
+        if servings_remaining is not None and servings_remaining != '' and not pd.isna(servings_remaining):
+            try:
+                remaining_float = float(servings_remaining)
+                if remaining_float < servings_consumed:
+                    raise ValueError(
+                        f"Not enough servings available. Requested: {servings_consumed}, Available: {remaining_float}")
+            except (ValueError, TypeError) as e:
+                logger.warning("Could not parse servings_remaining=%s error=%s", servings_remaining, e)
 
     def _calculate_total_nutrition(self, ingredients: List[Dict]) -> Dict:
         """Calculate total nutrition for a list of ingredients with quantities"""
-        totals = {
-            'calories': 0, 'protein': 0, 'fat_total': 0, 'fat_saturated': 0,
-            'carbohydrate': 0, 'sugars': 0, 'dietary_fibre_g': 0,
-            'sodium_mg': 0, 'calcium_mg': 0
-        }
-
-        for ingredient in ingredients:
-            nutrition = self.ingredient_ops.calculate_nutrition(
-                ingredient['name'], ingredient['quantity']
-            )
-            for key in totals:
-                totals[key] += nutrition.get(key, 0)
+        return self.ingredient_ops.calculate_total_nutrition(ingredients)
 
-        # Round all values
-        return {key: round(value, 2) for key, value in totals.items()}
+    def _calculate_total_nutrition_many(self, ingredient_lists: List[List[Dict]]) -> List[Dict]:
+        """_calculate_total_nutrition for many meals in one batched pass"""
+        return self.ingredient_ops.calculate_total_nutrition_many(ingredient_lists)
 
     def _calculate_per_serving_nutrition(self, total_nutrition: Dict, servings: int) -> Dict:
         """Calculate per-serving nutrition from total nutrition"""
@@ -0,0 +1,177 @@
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from .csv_handler import MEAL_PER_SERVING_COLUMNS
+from .ingredient_catalog import NUTRIENT_COLUMNS
+
+# Shorter names accepted for targets and limits
+NUTRIENT_ALIASES = {
+    'fat': 'fat_total',
+    'saturated_fat': 'fat_saturated',
+    'carbs': 'carbohydrate',
+    'carbohydrates': 'carbohydrate',
+    'fibre': 'dietary_fibre_g',
+    'fiber': 'dietary_fibre_g',
+    'sodium': 'sodium_mg',
+    'calcium': 'calcium_mg',
+}
+
+MAX_DAYS = 31
+
+# Going over a limit costs this much more than missing a target by the same fraction
+LIMIT_WEIGHT = 10.0
+
+
+def _nutrient_vector(values: Optional[Dict], name: str) -> np.ndarray:
+    """Daily amounts keyed by nutrient (or alias) as a NUTRIENT_COLUMNS vector, NaN where not given"""
+    vector = np.full(len(NUTRIENT_COLUMNS), np.nan)
+    for key, value in (values or {}).items():
+        nutrient = NUTRIENT_ALIASES.get(key, key)
+        if nutrient not in NUTRIENT_COLUMNS:
+            raise ValueError(f"Unknown nutrient in {name}: {key}")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}.{key} must be a number")
+        if value <= 0:
+            raise ValueError(f"{name}.{key} must be greater than 0")
+        vector[NUTRIENT_COLUMNS.index(nutrient)] = value
+    return vector
+
+
+class MealPlanner:
+    """Multi-day meal plans whose daily totals come close to macro targets
+
+    Each day is filled greedily: every step adds serving_step servings of whichever meal
+    lowers the day's score most, where the score is the squared relative miss on each
+    target plus a heavier penalty for going over a limit. Swaps (one step of one planned
+    meal for another meal) then run until nothing improves. All candidates are scored at
+    once as a (meals x nutrients) array, so a day costs a few dozen vectorised passes.
+    servings_remaining is shared across the days; meals without it are unlimited.
+    """
+
+    def __init__(self, meals: pd.DataFrame):
+        # A fresh or emptied store can read back without any columns; that plans nothing
+        meals = meals.reindex(columns=meals.columns.union(['meal_id', 'meal_name'], sort=False))
+        meals = meals.dropna(subset=['meal_id'])
+        self.meal_ids = [int(meal_id) for meal_id in pd.to_numeric(meals['meal_id'])]
+        self.meal_names = meals['meal_name'].tolist()
+        self.per_serving = (meals.reindex(columns=MEAL_PER_SERVING_COLUMNS)
+                            .apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=float))
+        remaining = pd.to_numeric(meals.get('servings_remaining', pd.Series(np.nan, index=meals.index)),
+                                  errors='coerce').to_numpy(dtype=float)
+        self.available = np.where(np.isnan(remaining), np.inf, remaining)
+
+    @staticmethod
+    def _scores(totals: np.ndarray, targets: np.ndarray, limits: np.ndarray) -> np.ndarray:
+        """Score of each row of day totals (lower is better)"""
+        with np.errstate(invalid='ignore'):
+            miss = np.where(np.isnan(targets), 0.0, (totals - targets) / np.nan_to_num(targets, nan=1.0))
+            over = np.where(np.isnan(limits), 0.0, np.maximum(totals - limits, 0) / np.nan_to_num(limits, nan=1.0))
+        return (miss ** 2).sum(axis=-1) + LIMIT_WEIGHT * (over ** 2).sum(axis=-1)
+
+    def plan(self, targets: Dict, limits: Optional[Dict] = None, days: int = 7, serving_step: float = 0.5,
+             max_servings_per_meal: float = 2, time_budget_ms: float = 500, start_date: Optional[str] = None) -> Dict:
+        """Plan days of meals against daily targets / limits ({nutrient: amount}, aliases like carbs allowed)"""
+        target_vector = _nutrient_vector(targets, 'targets')
+        limit_vector = _nutrient_vector(limits, 'limits')
+        if np.isnan(target_vector).all():
+            raise ValueError('targets needs at least one nutrient')
+        if not 1 <= int(days) <= MAX_DAYS:
+            raise ValueError(f'days must be between 1 and {MAX_DAYS}')
+        if serving_step <= 0 or max_servings_per_meal < serving_step:
+            raise ValueError('serving_step must be positive and no more than max_servings_per_meal')
+        if start_date:
+            first_day = datetime.strptime(start_date, '%Y-%m-%d')  # Raises ValueError for bad dates
+
+        start = time.perf_counter()
+        deadline = start + time_budget_ms / 1000
+        available = self.available.copy()
+        plan = np.zeros((int(days), len(self.meal_ids)))
+        complete = True
+
+        for day in range(int(days)):
+            servings, finished = self._plan_day(target_vector, limit_vector, available, serving_step,
+                                                max_servings_per_meal, deadline)
+            plan[day] = servings
+            available -= servings
+            complete = complete and finished
+
+        day_totals = plan @ self.per_serving
+        day_scores = self._scores(day_totals, target_vector, limit_vector)
+        result_days = []
+        for day, (servings, totals, score) in enumerate(zip(plan, day_totals, day_scores)):
+            planned = np.flatnonzero(servings)
+            result_days.append({
+                'day': day + 1,
+                'date': (first_day + timedelta(days=day)).strftime('%Y-%m-%d') if start_date else None,
+                'meals': [{'meal_id': self.meal_ids[i], 'meal_name': self.meal_names[i],
+                           'servings': round(float(servings[i]), 2)} for i in planned],
+                'totals': {nutrient: round(float(value), 2) for nutrient, value in zip(NUTRIENT_COLUMNS, totals)},
+                'score': round(float(score), 4),
+            })
+
+        return {
+            'days': result_days,
+            'targets': {n: v for n, v in zip(NUTRIENT_COLUMNS, target_vector.tolist()) if not np.isnan(v)},
+            'limits': {n: v for n, v in zip(NUTRIENT_COLUMNS, limit_vector.tolist()) if not np.isnan(v)},
+            'meals_considered': len(self.meal_ids),
+            'complete': complete,  # False if the time budget cut the swap search short
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def _plan_day(self, targets: np.ndarray, limits: np.ndarray, available: np.ndarray, step: float,
+                  max_servings: float, deadline: float):
+        """Servings of each meal for one day, and whether the search finished within the deadline"""
+        per_serving = self.per_serving
+        steps = per_serving * step
+        # Whole steps of each meal (so servings stay exact multiples of step)
+        counts = np.zeros(len(self.meal_ids), dtype=np.int64)
+        step_limit = np.floor(np.minimum(max_servings, available) / step + 1e-9)
+        totals = np.zeros(per_serving.shape[1])
+        score = float(self._scores(totals, targets, limits))
+        if not len(counts):
+            return counts * step, True
+
+        # Add one step of the best meal at a time (always finished - it stops once nothing helps)
+        while True:
+            scores = self._scores(totals + steps, targets, limits)
+            scores[counts >= step_limit] = np.inf
+            best = int(np.argmin(scores))
+            if not scores[best] < score - 1e-12:
+                break
+            counts[best] += 1
+            totals += steps[best]
+            score = float(scores[best])
+
+        # Swap one step of a planned meal for one step of another (or just drop it)
+        while True:
+            if time.perf_counter() > deadline:
+                return counts * step, False
+            planned = np.flatnonzero(counts)
+            if not len(planned):
+                break
+            without = totals - steps[planned]  # (planned, nutrients)
+            swap_scores = self._scores(without[:, None, :] + steps[None, :, :], targets, limits)
+            swap_scores[:, counts >= step_limit] = np.inf
+            swap_scores[np.arange(len(planned)), planned] = np.inf
+            drop_scores = self._scores(without, targets, limits)
+
+            i, j = np.unravel_index(int(np.argmin(swap_scores)), swap_scores.shape)
+            best_swap = swap_scores[i, j]
+            best_drop = int(np.argmin(drop_scores))
+            if min(best_swap, drop_scores[best_drop]) >= score - 1e-12:
+                break
+            if best_swap <= drop_scores[best_drop]:
+                counts[planned[i]] -= 1
+                counts[j] += 1
+                totals = without[i] + steps[j]
+                score = float(best_swap)
+            else:
+                counts[planned[best_drop]] -= 1
+                totals = without[best_drop]
+                score = float(drop_scores[best_drop])
+
+        return counts * step, True
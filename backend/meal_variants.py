@@ -0,0 +1,106 @@
+from typing import Callable, Dict, List
+
+# Upper bound on variants evaluated in one request
+MAX_VARIANTS = 500
+
+
+def apply_variant(ingredients: List[Dict], servings: float, variant: Dict,
+                  known_ingredient: Callable[[str], bool]) -> Dict:
+    """A meal's ingredients and servings with one variant's overrides applied, or ValueError
+
+    A variant may hold any of:
+        remove:        [name, ...]                      ingredients to drop
+        substitutions: {from: to} or [{from, to, quantity?}]  swap ingredients (keeping the
+                       quantity unless one is given)
+        quantities:    {name: quantity}                 new quantities for existing ingredients (0 drops it)
+        add:           [{name, quantity}]               extra ingredients
+        scale:         factor                           multiplies every quantity (applied last)
+        servings:      count                            servings the totals are split over
+    """
+    if not isinstance(variant, dict):
+        raise ValueError('each variant must be an object')
+
+    lines = [dict(ingredient) for ingredient in ingredients]
+    names = {line['name'] for line in lines}
+
+    def check_present(name):
+        if not isinstance(name, str) or name not in names:
+            raise ValueError(f"{name} is not an ingredient of this meal")
+
+    def check_known(name):
+        if not isinstance(name, str) or not known_ingredient(name):
+            raise ValueError(f"Unknown ingredient: {name}")
+
+    def number(value, what):
+        if isinstance(value, bool):
+            raise ValueError(f"{what} must be a number")
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{what} must be a number")
+
+    def quantity(value, name):
+        value = number(value, f"quantity for {name}")
+        if value < 0:
+            raise ValueError(f"quantity for {name} can't be negative")
+        return value
+
+    remove = variant.get('remove') or []
+    if not isinstance(remove, list) or not all(isinstance(name, str) for name in remove):
+        raise ValueError('remove must be a list of ingredient names')
+    for name in remove:
+        check_present(name)
+        lines = [line for line in lines if line['name'] != name]
+        names.discard(name)
+
+    substitutions = variant.get('substitutions') or []
+    if isinstance(substitutions, dict):
+        substitutions = [{'from': old, 'to': new} for old, new in substitutions.items()]
+    if not isinstance(substitutions, list) or not all(
+            isinstance(substitution, dict) and isinstance(substitution.get('from'), str)
+            and isinstance(substitution.get('to'), str) for substitution in substitutions):
+        raise ValueError('substitutions must be {from: to} or a list of {from, to, quantity} with names as strings')
+    for substitution in substitutions:
+        old, new = substitution['from'], substitution['to']
+        check_present(old)
+        check_known(new)
+        new_quantity = None
+        if substitution.get('quantity') is not None:
+            new_quantity = quantity(substitution['quantity'], new)
+        for line in lines:
+            if line['name'] == old:
+                line['name'] = new
+                if new_quantity is not None:
+                    line['quantity'] = new_quantity
+        names.discard(old)
+        names.add(new)
+
+    quantities = variant.get('quantities') or {}
+    if not isinstance(quantities, dict):
+        raise ValueError('quantities must be an object of {ingredient name: quantity}')
+    for name, value in quantities.items():
+        check_present(name)
+        value = quantity(value, name)
+        for line in lines:
+            if line['name'] == name:
+                line['quantity'] = value
+
+    additions = variant.get('add') or []
+    if not isinstance(additions, list) or not all(isinstance(ingredient, dict) for ingredient in additions):
+        raise ValueError('add must be a list of {name, quantity}')
+    for ingredient in additions:
+        check_known(ingredient.get('name'))
+        lines.append({'name': ingredient['name'], 'quantity': quantity(ingredient.get('quantity'), ingredient['name'])})
+        names.add(ingredient['name'])
+
+    scale = number(variant.get('scale', 1), 'scale')
+    if scale <= 0:
+        raise ValueError('scale must be greater than 0')
+    lines = [{'name': line['name'], 'quantity': float(line['quantity']) * scale}
+             for line in lines if float(line['quantity']) != 0]
+
+    servings = number(variant.get('servings', servings), 'servings')
+    if servings <= 0:
+        raise ValueError('servings must be greater than 0')
+
+    return {'ingredients': lines, 'servings': servings, 'scale': scale}
@@ -0,0 +1,223 @@
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets (seconds) - from sub-millisecond cache hits to multi-second rewrites
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, one value per label combination"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        key = tuple(str(value) for value in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(tuple(str(value) for value in label_values), 0)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one set of buckets per label combination"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        key = tuple(str(label) for label in label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}')
+                lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics this process exposes on /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'HTTP requests handled, by route and status', ('method', 'route', 'status'))
+HTTP_ERRORS = REGISTRY.counter(
+    'http_request_errors_total', 'HTTP requests that ended in a 5xx response', ('method', 'route'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time to build the response, by route', ('method', 'route'))
+
+STORAGE_SECONDS = REGISTRY.histogram(
+    'storage_operation_duration_seconds', 'Time spent reading, writing and appending to tables', ('operation', 'table'))
+STORAGE_BYTES = REGISTRY.counter(
+    'storage_bytes_total', 'Bytes of table files read / written, by table', ('operation', 'table'))
+STORAGE_ERRORS = REGISTRY.counter(
+    'storage_errors_total', 'Table reads / writes / appends that raised, by table', ('operation', 'table'))
+
+WRITE_BEHIND_FLUSHES = REGISTRY.counter(
+    'write_behind_flushes_total', 'Batches persisted by the write-behind writer')
+WRITE_BEHIND_ROWS = REGISTRY.counter(
+    'write_behind_rows_total', 'Rows persisted by the write-behind writer, by kind', ('kind',))
+
+TENANT_OPENS = REGISTRY.counter(
+    'tenant_opens_total', 'Per-user storage handlers opened (first use or after eviction)')
+TENANT_EVICTIONS = REGISTRY.counter(
+    'tenant_evictions_total', 'Per-user storage handlers closed to stay within the pool size')
+
+# Nesting depth of instrumented storage calls on this thread (a subclass calling the
+# CSV implementation through super() should only be counted once)
+_storage_depth = threading.local()
+
+
+def instrument_storage(operation: str):
+    """Decorator for a storage handler's read_csv(file_path), write_csv(df, file_path) or
+    append_rows(rows, file_path)
+
+    Records the call's duration under the table's name, and the bytes read or written:
+    the table's size on disk afterwards for reads and writes, how much it grew for appends.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            depth = getattr(_storage_depth, 'depth', 0)
+            if depth:
+                return method(self, *args, **kwargs)
+
+            file_path = args[0] if operation == 'read' else args[1]
+            table = self.table_name(file_path)
+            size_before = self.stored_bytes(file_path) if operation == 'append' else 0
+            _storage_depth.depth = 1
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception:
+                STORAGE_ERRORS.inc(operation, table)
+                raise
+            finally:
+                _storage_depth.depth = 0
+                STORAGE_SECONDS.observe(time.perf_counter() - start, operation, table)
+
+            size = self.stored_bytes(file_path)
+            if size is not None:
+                # An append to a new table wrote all of it; a concurrent rewrite can shrink a
+                # table under an append, so never count below 0
+                STORAGE_BYTES.inc(operation, table, amount=max(0, size - (size_before or 0)))
+            return result
+        return wrapper
+    return decorator
+
+
+def instrument_app(app):
+    """Time every request and count it by route, status and errors (plus a debug log line)"""
+    from flask import g, request
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('request_start', None)
+        if start is None:
+            return response
+
+        duration = time.perf_counter() - start
+        # The URL rule ("/api/daily-nutrition/<date>"), so routes don't explode into one series per date
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_LATENCY.observe(duration, request.method, route)
+        HTTP_REQUESTS.inc(request.method, route, response.status_code)
+        if response.status_code >= 500:
+            HTTP_ERRORS.inc(request.method, route)
+
+        logger.debug("request method=%s route=%s status=%s duration_ms=%.2f",
+                     request.method, route, response.status_code, duration * 1000)
+        return response
+
+
+def configure_logging(level: Optional[str] = None):
+    """Leveled key=value log lines on stderr; NUTRITION_LOG_LEVEL sets the level (default INFO)"""
+    level = level or os.environ.get('NUTRITION_LOG_LEVEL', 'INFO')
+    logging.basicConfig(
+        level=level.upper(),
+        format='%(asctime)s level=%(levelname)s logger=%(name)s %(message)s'
+    )
@@ -0,0 +1,108 @@
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Optional
+from .csv_handler import CSVHandler, CONSUMED_COLUMNS, DAILY_ROLLUP_COLUMNS
+from .serialization import dataframe_to_records
+
+# Columns summed per date (everything in the rollup except the date itself)
+SUM_COLUMNS = DAILY_ROLLUP_COLUMNS[1:]
+
+GRANULARITIES = ('day', 'week')
+
+
+class NutritionRollups:
+    """Per-date nutrient totals, kept in step with daily_nutrition as entries come and go
+
+    Summaries read one small row per logged day instead of scanning every entry. The
+    rollup table is rebuilt from daily_nutrition whenever it doesn't exist yet, so delete
+    it to force a rebuild.
+    """
+
+    def __init__(self, csv_handler: CSVHandler):
+        self.csv_handler = csv_handler
+        self.rollup_file = csv_handler.daily_rollup_file
+        self.daily_nutrition_file = csv_handler.daily_nutrition_file
+
+        with self.csv_handler.locked(self.rollup_file):
+            if not self.csv_handler.table_exists(self.rollup_file):
+                self.rebuild()
+
+    @staticmethod
+    def _sum_by_date(entries: pd.DataFrame) -> pd.DataFrame:
+        """Entry count and nutrient sums for each date in a set of daily_nutrition rows"""
+        if entries.empty:
+            return pd.DataFrame(columns=DAILY_ROLLUP_COLUMNS)
+
+        values = entries.reindex(columns=['servings_consumed'] + CONSUMED_COLUMNS)
+        values = values.apply(pd.to_numeric, errors='coerce').fillna(0)
+        values['entries'] = 1
+        values['date'] = entries['date'].astype(str)
+
+        sums = values.groupby('date', as_index=False)[SUM_COLUMNS].sum()
+        return sums[DAILY_ROLLUP_COLUMNS]
+
+    def rebuild(self):
+        """Recompute every date from the full daily_nutrition table"""
+        with self.csv_handler.locked(self.rollup_file):
+            entries = self.csv_handler.read_csv(self.daily_nutrition_file)
+            self.csv_handler.write_csv(self._sum_by_date(entries).round(4), self.rollup_file)
+
+    def apply(self, entries: pd.DataFrame, sign: int = 1):
+        """Add (sign=1) or subtract (sign=-1) daily_nutrition rows from their dates' totals"""
+        delta = self._sum_by_date(entries)
+        if delta.empty:
+            return
+        delta[SUM_COLUMNS] = delta[SUM_COLUMNS] * sign
+
+        with self.csv_handler.locked(self.rollup_file):
+            rollup = self.csv_handler.read_csv(self.rollup_file)
+            if not rollup.empty:
+                rollup['date'] = rollup['date'].astype(str)
+                delta = pd.concat([rollup[DAILY_ROLLUP_COLUMNS], delta], ignore_index=True)
+
+            combined = delta.groupby('date', as_index=False)[SUM_COLUMNS].sum()
+            # Dates with no entries left drop out (and take any float residue with them)
+            combined = combined[combined['entries'] > 0]
+            self.csv_handler.write_csv(combined[DAILY_ROLLUP_COLUMNS].round(4), self.rollup_file)
+
+    def summary(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                granularity: str = 'day') -> Dict:
+        """Totals per day (or per Monday-starting week) between two dates, inclusive"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        for value in (date_from, date_to):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')  # Raises ValueError for bad dates
+
+        rollup = self.csv_handler.read_csv(self.rollup_file)
+        if rollup.empty:
+            rollup = pd.DataFrame(columns=DAILY_ROLLUP_COLUMNS)
+        rollup['date'] = rollup['date'].astype(str)
+
+        # ISO dates sort as strings
+        if date_from:
+            rollup = rollup[rollup['date'] >= date_from]
+        if date_to:
+            rollup = rollup[rollup['date'] <= date_to]
+        rollup = rollup.sort_values('date')
+
+        if granularity == 'week':
+            dates = pd.to_datetime(rollup['date'])
+            rollup = rollup.assign(
+                week_start=(dates - pd.to_timedelta(dates.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d'),
+                days=1
+            )
+            periods = rollup.groupby('week_start', as_index=False)[['days'] + SUM_COLUMNS].sum()
+        else:
+            periods = rollup[DAILY_ROLLUP_COLUMNS]
+
+        totals = {column: round(float(rollup[column].sum()), 2) for column in SUM_COLUMNS}
+        totals['entries'] = int(totals['entries'])
+
+        return {
+            'from': date_from,
+            'to': date_to,
+            'granularity': granularity,
+            'periods': dataframe_to_records(periods.round(2)),
+            'totals': totals,
+        }
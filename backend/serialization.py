@@ -0,0 +1,83 @@
+import json
+import math
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List
+
+# orjson is optional - much faster than the json module when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn "nan" strings (any case) into real missing values, one column at a time"""
+    text_columns = df.select_dtypes(include='object').columns
+    if len(text_columns) == 0:
+        return df
+
+    df = df.copy()
+    for column in text_columns:
+        is_nan_text = df[column].astype(str).str.lower() == 'nan'
+        if is_nan_text.any():
+            df.loc[is_nan_text, column] = np.nan
+    return df
+
+
+def dataframe_to_records(df: pd.DataFrame) -> List[Dict]:
+    """DataFrame rows as plain dicts, with every missing value (NaN, None, "nan") as None"""
+    if df.empty:
+        return []
+
+    df = clean_dataframe(df)
+    # object dtype boxes numpy values as Python ints/floats, so the dicts serialise cleanly
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def clean_record(record: Dict) -> Dict:
+    """Replace NaN / "nan" values in a single row dict with None"""
+    for key, value in record.items():
+        if isinstance(value, str):
+            if value.lower() == 'nan':
+                record[key] = None
+        elif pd.isna(value):
+            record[key] = None
+    return record
+
+
+def _default(value: Any):
+    """Fallback encoder for numpy / pandas values the json module doesn't know"""
+    if isinstance(value, np.generic):
+        value = value.item()
+        return None if isinstance(value, float) and not math.isfinite(value) else value
+    if value is pd.NA or value is pd.NaT:
+        return None
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite(value: Any) -> Any:
+    """A payload with NaN / inf floats replaced by None, as orjson writes them"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def to_json(payload: Any) -> bytes:
+    """Serialise an API payload to JSON bytes
+
+    DataFrames are written straight from their columns by pandas (missing values become
+    null); anything else goes through orjson when available, or the json module otherwise.
+    Either way NaN and inf are written as null, never as bare NaN / Infinity.
+    """
+    if isinstance(payload, pd.DataFrame):
+        return clean_dataframe(payload).to_json(orient='records').encode('utf-8')
+
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    return json.dumps(_finite(payload), default=_default, allow_nan=False).encode('utf-8')
@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TenantServices:
+    """Storage handler and operations for one user's data directory"""
+
+    def __init__(self, csv_handler, ingredient_ops, meal_ops):
+        self.csv_handler = csv_handler
+        self.ingredient_ops = ingredient_ops
+        self.meal_ops = meal_ops
+
+    def close(self):
+        """Persist anything still queued; the handler itself holds no open files between calls"""
+        from .file_lock import forget_locks
+
+        if self.meal_ops.write_behind is not None:
+            self.meal_ops.write_behind.close()
+        forget_locks(self.csv_handler.data_dir)
+
+
+class NutritionServices:
+    """The storage handler and operations objects for one app, built on first use
+
+    Nothing (not even pandas) is imported until a request needs storage, and the handler
+    is built once per process however many threads ask for it at the same time.
+
+    Requests without a user use DATA_DIR. Each user given to tenant() gets their own data
+    directory (own CSVs / own database) under TENANTS_DIR; at most TENANT_POOL_SIZE users'
+    handlers stay open, least recently used closed first (once no request is using them). The ingredient catalog is shared
+    by all of them and loaded once.
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._csv_handler = None
+        self._ingredient_ops = None
+        self._meal_ops = None
+        self._tenants = None
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+
+            from .storage import create_storage_handler
+            from .ingredient_operations import IngredientOperations
+            from .tenants import TenantPool
+
+            csv_dir = self.config['CSV_DIR']
+            ingredients_path = os.path.join(csv_dir, 'ingredients.csv')
+            if not os.path.exists(ingredients_path):
+                logger.warning("ingredients.csv not found path=%s", ingredients_path)
+
+            data_dir = self.config['DATA_DIR']
+            os.makedirs(data_dir, exist_ok=True)
+            self._csv_handler = create_storage_handler(self.config['STORAGE_BACKEND'], csv_dir, data_dir)
+            self._ingredient_ops = IngredientOperations(self._csv_handler)
+            self._meal_ops = self._build_meal_ops(self._csv_handler, data_dir)
+
+            self._tenants = TenantPool(self._open_tenant, TenantServices.close,
+                                       int(self.config.get('TENANT_POOL_SIZE', 64)))
+            self._loaded = True
+            logger.info("Storage ready backend=%s data_dir=%s write_behind=%s",
+                        self.config['STORAGE_BACKEND'], data_dir, bool(self.config.get('WRITE_BEHIND')))
+
+    def _build_meal_ops(self, csv_handler, data_dir: str):
+        from .meal_operations import MealOperations
+
+        # MealOperations also makes sure meals has its servings_remaining column
+        meal_ops = MealOperations(csv_handler, self._ingredient_ops)
+        if self.config.get('WRITE_BEHIND'):
+            from .write_behind import WriteBehindQueue
+            meal_ops.write_behind = WriteBehindQueue(
+                csv_handler, meal_ops.rollups, meal_ops.meal_ingredients, os.path.join(data_dir, 'write_behind.journal'))
+        return meal_ops
+
+    def _open_tenant(self, tenant_id: str) -> TenantServices:
+        from .storage import create_storage_handler
+        from .tenants import tenant_data_dir
+
+        data_dir = tenant_data_dir(self.tenants_dir, tenant_id)
+        os.makedirs(data_dir, exist_ok=True)
+        csv_handler = create_storage_handler(self.config['STORAGE_BACKEND'], self.config['CSV_DIR'], data_dir)
+        # Shares the app-wide ingredient catalog rather than loading another copy
+        return TenantServices(csv_handler, self._ingredient_ops, self._build_meal_ops(csv_handler, data_dir))
+
+    @property
+    def tenants_dir(self) -> str:
+        return self.config.get('TENANTS_DIR') or os.path.join(self.config['DATA_DIR'], 'users')
+
+    def tenant(self, tenant_id: Optional[str]):
+        """Services for a user's own data (these app-wide ones when tenant_id is None)
+
+        A user's services stay open until release(tenant_id) is called for them.
+        """
+        if tenant_id is None:
+            return self
+        self._load()
+        return self._tenants.acquire(tenant_id)
+
+    def release(self, tenant_id: Optional[str]):
+        """Done with the services tenant(tenant_id) returned"""
+        if tenant_id is not None:
+            self._tenants.release(tenant_id)
+
+    @property
+    def csv_handler(self):
+        self._load()
+        return self._csv_handler
+
+    @property
+    def ingredient_ops(self):
+        self._load()
+        return self._ingredient_ops
+
+    @property
+    def meal_ops(self):
+        self._load()
+        return self._meal_ops
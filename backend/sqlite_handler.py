@@ -0,0 +1,412 @@
+from .csv_handler import (
+    CSVHandler, ServingsUnitOfWork, MEALS_COLUMNS, MEAL_LOG_COLUMNS, DAILY_NUTRITION_COLUMNS, CHUNK_ROWS,
+    TEXT_COLUMNS, INTEGER_COLUMNS
+)
+from .metrics import instrument_storage
+import numpy as np
+import logging
+import pandas as pd
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Indexed columns for each table (a tuple is one index over several columns)
+TABLE_INDEXES = {
+    'meals': ['meal_id'],
+    'meal_log': ['log_id', 'date', 'meal_id'],
+    'daily_nutrition': ['entry_id', 'date', 'meal_id',
+                        # Covering indexes for servings_by_meal() over a date range / all dates
+                        ('date', 'meal_id', 'servings_consumed'), ('meal_id', 'servings_consumed', 'date')],
+    'daily_rollup': ['date'],
+    'meal_ingredients': ['meal_id', 'ingredient_name'],
+}
+
+
+class SQLiteServingsUnitOfWork(ServingsUnitOfWork):
+    """Unit of work that looks meals up through the meal_id index instead of loading the table"""
+
+    def get_meal(self, meal_id) -> Optional[Dict]:
+        meal = self.handler.select_rows(self.handler.meals_file, {'meal_id': meal_id})
+        return meal.iloc[0].to_dict() if not meal.empty else None
+
+
+class SQLiteHandler(CSVHandler):
+    """Storage handler that keeps meals, meal_log and daily_nutrition in an embedded SQLite database
+
+    Tables are still addressed by the same file paths as CSVHandler (meals_file etc.), so the
+    operations classes work unchanged. ingredients.csv stays a CSV file.
+    """
+
+    unit_of_work_class = SQLiteServingsUnitOfWork
+
+    def __init__(self, csv_dir: str, data_dir: str, db_file: Optional[str] = None):
+        self.db_file = db_file or os.path.join(data_dir, "nutrition.db")
+        self._local = threading.local()
+        super().__init__(csv_dir, data_dir)
+
+        # File path -> table name for the tables that live in the database
+        self.tables = {
+            self.meals_file: 'meals',
+            self.meal_log_file: 'meal_log',
+            self.daily_nutrition_file: 'daily_nutrition',
+            self.daily_rollup_file: 'daily_rollup',
+            self.meal_ingredients_file: 'meal_ingredients',
+        }
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections can't be shared across threads)"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a single write transaction"""
+        conn = self.connection
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _initialize_csv_files(self):
+        """Create the database tables and indexes if they don't exist"""
+        schemas = {
+            'meals': MEALS_COLUMNS,
+            'meal_log': MEAL_LOG_COLUMNS,
+            'daily_nutrition': DAILY_NUTRITION_COLUMNS,
+        }
+        with self._transaction() as conn:
+            # Bookkeeping, e.g. which CSV files have already been imported
+            conn.execute('CREATE TABLE IF NOT EXISTS "storage_meta" ("key" TEXT PRIMARY KEY, "value" TEXT)')
+            for table, columns in schemas.items():
+                column_defs = ', '.join(f'"{column}" {self._column_type(column)}' for column in columns)
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({column_defs})')
+                self._create_indexes(conn, table)
+
+    @staticmethod
+    def _create_indexes(conn: sqlite3.Connection, table: str):
+        for columns in TABLE_INDEXES.get(table, []):
+            columns = (columns,) if isinstance(columns, str) else columns
+            column_list = ', '.join(f'"{column}"' for column in columns)
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{"_".join(columns)}" ON "{table}" ({column_list})')
+
+    @staticmethod
+    def _column_type(column: str) -> str:
+        if column in INTEGER_COLUMNS:
+            return 'INTEGER'
+        if column in TEXT_COLUMNS:
+            return 'TEXT'
+        return 'REAL'
+
+    @staticmethod
+    def _sql_value(value):
+        """Convert pandas/numpy values into something sqlite3 can bind"""
+        if value is None:
+            return None
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        return value
+
+    def _table_columns(self, table: str) -> List[str]:
+        return [row[1] for row in self.connection.execute(f'PRAGMA table_info("{table}")')]
+
+    def _ensure_table(self, conn: sqlite3.Connection, table: str, columns: List[str]):
+        """Create a table on first use (with its indexes), or add any columns it is missing"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if exists:
+            self._ensure_columns(conn, table, columns)
+            return
+
+        column_defs = ', '.join(f'"{column}" {self._column_type(column)}' for column in columns)
+        conn.execute(f'CREATE TABLE "{table}" ({column_defs})')
+        self._create_indexes(conn, table)
+
+    def _ensure_columns(self, conn: sqlite3.Connection, table: str, columns: List[str]):
+        """Add any columns the table doesn't have yet"""
+        existing = set(self._table_columns(table))
+        for column in columns:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {self._column_type(column)}')
+                existing.add(column)
+
+    def _insert(self, conn: sqlite3.Connection, table: str, rows: List[Dict]):
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        self._ensure_table(conn, table, columns)
+
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        conn.executemany(
+            f'INSERT INTO "{table}" ({column_list}) VALUES ({placeholders})',
+            [[self._sql_value(row.get(column)) for column in columns] for row in rows]
+        )
+
+    @staticmethod
+    def _where_clause(where: Dict):
+        clause = ' AND '.join(f'"{column}" = ?' for column in where)
+        return clause, [SQLiteHandler._sql_value(value) for value in where.values()]
+
+    def file_version(self, file_path: str):
+        """Version of a table: changes whenever the database (or its WAL) is written"""
+        if file_path not in self.tables:
+            return super().file_version(file_path)
+
+        versions = [super(SQLiteHandler, self).file_version(path) for path in (self.db_file, self.db_file + '-wal')]
+        return self._combine_versions(versions)
+
+    def stored_bytes(self, file_path: str) -> Optional[int]:
+        """Tables share one database file, so their sizes can't be told apart"""
+        if file_path in self.tables:
+            return None
+        return super().stored_bytes(file_path)
+
+    def table_exists(self, file_path: str) -> bool:
+        """Whether a table has been created yet"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().table_exists(file_path)
+        return self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+
+    def table_columns(self, file_path: str) -> List[str]:
+        """Column names of a table"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().table_columns(file_path)
+        return self._table_columns(table)
+
+    def iter_chunks(self, file_path: str, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    chunksize: int = CHUNK_ROWS, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Stream a table in chunks of rows, optionally limited to a date range (inclusive)
+
+        Uses its own connection, so the whole stream reads one consistent snapshot and
+        doesn't hold up this thread's connection.
+        """
+        table = self.tables.get(file_path)
+        if table is None:
+            yield from super().iter_chunks(file_path, date_from, date_to, chunksize, columns)
+            return
+
+        select = '*'
+        if columns is not None:
+            existing = set(self._table_columns(table))
+            select = ', '.join(f'"{column}"' for column in columns if column in existing) or '*'
+
+        clauses, params = self._date_range_clauses(date_from, date_to)
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            cursor = conn.execute(f'SELECT {select} FROM "{table}"{where} ORDER BY rowid', params)
+            columns = [description[0] for description in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _date_range_clauses(date_from: Optional[str], date_to: Optional[str]):
+        clauses, params = [], []
+        if date_from:
+            clauses.append('"date" >= ?')
+            params.append(date_from)
+        if date_to:
+            clauses.append('"date" <= ?')
+            params.append(date_to)
+        return clauses, params
+
+    def servings_by_meal(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> pd.DataFrame:
+        """servings_consumed and entry count per meal_id, summed by one GROUP BY over a covering index"""
+        clauses, params = self._date_range_clauses(date_from, date_to)
+        clauses.append('"meal_id" IS NOT NULL')
+        sums = pd.read_sql_query(
+            'SELECT "meal_id", TOTAL("servings_consumed") AS servings_consumed, '
+            f'COUNT(*) AS entries FROM "daily_nutrition" WHERE {" AND ".join(clauses)} GROUP BY 1',
+            self.connection, params=params
+        )
+        return sums.astype({'meal_id': 'int64', 'servings_consumed': float, 'entries': 'int64'}).set_index('meal_id')
+
+    @instrument_storage('read')
+    def read_csv(self, file_path: str) -> pd.DataFrame:
+        """Read a whole table (falls back to CSV for files not stored in the database)"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().read_csv(file_path)
+        return pd.read_sql_query(f'SELECT * FROM "{table}" ORDER BY rowid', self.connection)
+
+    @instrument_storage('write')
+    def write_csv(self, df: pd.DataFrame, file_path: str):
+        """Replace the contents of a table"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().write_csv(df, file_path)
+
+        with self._transaction() as conn:
+            self._ensure_table(conn, table, list(df.columns))
+            conn.execute(f'DELETE FROM "{table}"')
+            if not df.empty:
+                self._insert(conn, table, df.to_dict('records'))
+
+    @instrument_storage('append')
+    def append_rows(self, rows: List[Dict], file_path: str):
+        """Insert rows into a table"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().append_rows(rows, file_path)
+        if not rows:
+            return
+
+        with self._transaction() as conn:
+            self._insert(conn, table, rows)
+
+    def select_rows(self, file_path: str, where: Dict) -> pd.DataFrame:
+        """Indexed lookup of rows whose columns equal all the given values"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().select_rows(file_path, where)
+
+        clause, params = self._where_clause(where)
+        return pd.read_sql_query(
+            f'SELECT * FROM "{table}" WHERE {clause} ORDER BY rowid', self.connection, params=params
+        )
+
+    def delete_rows(self, file_path: str, where: Dict) -> pd.DataFrame:
+        """Delete matching rows and return them"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().delete_rows(file_path, where)
+
+        clause, params = self._where_clause(where)
+        with self._transaction() as conn:
+            removed = pd.read_sql_query(
+                f'SELECT * FROM "{table}" WHERE {clause} ORDER BY rowid', conn, params=params
+            )
+            if not removed.empty:
+                conn.execute(f'DELETE FROM "{table}" WHERE {clause}', params)
+        return removed
+
+    def allocate_ids(self, file_path: str, id_column: str, count: int) -> int:
+        """Reserve a block of IDs using the indexed MAX() of the ID column"""
+        table = self.tables.get(file_path)
+        if table is None:
+            return super().allocate_ids(file_path, id_column, count)
+
+        key = (file_path, id_column)
+        with self.locked(file_path), self._id_lock:
+            max_id = self.connection.execute(f'SELECT MAX("{id_column}") FROM "{table}"').fetchone()[0]
+            # IDs handed out but not inserted yet must not be reused
+            counter = self._id_counters.setdefault(key, [1, None])
+            first_id = max(counter[0], int(max_id or 0) + 1)
+            counter[0] = first_id + count
+            return first_id
+
+    def ensure_servings_remaining_column(self):
+        """Add the servings_remaining column to the meals table if it doesn't exist"""
+        with self._transaction() as conn:
+            self._ensure_columns(conn, 'meals', ['servings_remaining'])
+
+    def update_servings_remaining(self, meal_id: int, servings_change: float):
+        """Update servings_remaining for a specific meal (positive = add, negative = subtract)"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT servings_remaining FROM meals WHERE meal_id = ? LIMIT 1', (self._sql_value(meal_id),)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Meal with ID {meal_id} not found")
+
+            current_remaining = row[0]
+            if current_remaining is None:
+                logger.warning("Cannot update servings for meal_id=%s - no servings_remaining data "
+                               "(created before this feature)", meal_id)
+                return
+
+            new_remaining = float(current_remaining) + float(servings_change)
+            if new_remaining < 0:
+                logger.warning("Attempted to consume more servings than available meal_id=%s", meal_id)
+                new_remaining = 0
+
+            conn.execute('UPDATE meals SET servings_remaining = ? WHERE meal_id = ?',
+                         (new_remaining, self._sql_value(meal_id)))
+
+        logger.debug("Updated servings_remaining meal_id=%s servings_remaining=%s", meal_id, new_remaining)
+        return new_remaining
+
+    def apply_servings_changes(self, changes: Dict, meals_df: Optional[pd.DataFrame] = None) -> Dict:
+        """Apply servings changes to many meals in a single transaction"""
+        if not changes:
+            return {}
+
+        params = [(float(change), self._sql_value(meal_id)) for meal_id, change in changes.items()]
+        meal_ids = [self._sql_value(meal_id) for meal_id in changes]
+        placeholders = ', '.join('?' for _ in meal_ids)
+
+        with self._transaction() as conn:
+            # Meals created before servings tracking (NULL servings_remaining) are left alone
+            conn.executemany(
+                'UPDATE meals SET servings_remaining = MAX(servings_remaining + ?, 0) '
+                'WHERE meal_id = ? AND servings_remaining IS NOT NULL',
+                params
+            )
+            rows = conn.execute(
+                f'SELECT meal_id, servings_remaining FROM meals WHERE meal_id IN ({placeholders}) '
+                f'AND servings_remaining IS NOT NULL', meal_ids
+            ).fetchall()
+
+        results = {meal_id: float(remaining) for meal_id, remaining in rows}
+        logger.debug("Updated servings_remaining meals=%d changes=%s", len(results), results)
+        return results
+
+    def import_csv_files(self, overwrite: bool = False):
+        """One-shot import of the existing CSV files into the database
+
+        Each table is imported once; later calls skip it unless overwrite is True.
+        Blank rows (no ID) in the CSVs are skipped.
+        """
+        id_columns = {'meals': 'meal_id', 'meal_log': 'log_id', 'daily_nutrition': 'entry_id'}
+
+        for file_path, table in self.tables.items():
+            if table not in id_columns:
+                continue  # Derived tables are rebuilt, not imported
+
+            marker = f'imported:{table}'
+            already_imported = self.connection.execute(
+                'SELECT 1 FROM storage_meta WHERE key = ?', (marker,)
+            ).fetchone()
+            if already_imported and not overwrite:
+                continue
+
+            df = super().read_csv(file_path)
+            if not df.empty:
+                df = df[df[id_columns[table]].notna()]
+                self.write_csv(df, file_path)
+                logger.info("Imported CSV into database rows=%d file=%s table=%s", len(df), file_path, table)
+
+            self.connection.execute(
+                'INSERT OR REPLACE INTO storage_meta (key, value) VALUES (?, ?)', (marker, file_path)
+            )
+
+    def export_csv_files(self, target_dir: str):
+        """Write every table back out as a CSV file in target_dir"""
+        os.makedirs(target_dir, exist_ok=True)
+        for file_path, table in self.tables.items():
+            df = self.read_csv(file_path)
+            df.to_csv(os.path.join(target_dir, os.path.basename(file_path)), index=False)
@@ -0,0 +1,27 @@
+from .csv_handler import CSVHandler
+
+# Available storage backends
+STORAGE_BACKENDS = ('csv', 'sqlite', 'feather')
+
+
+def create_storage_handler(backend: str, csv_dir: str, data_dir: str) -> CSVHandler:
+    """Create the storage handler for the configured backend ("csv", "sqlite" or "feather")"""
+    if backend == 'csv':
+        return CSVHandler(csv_dir, data_dir)
+
+    if backend == 'sqlite':
+        from .sqlite_handler import SQLiteHandler
+        handler = SQLiteHandler(csv_dir, data_dir)
+        # Bring over existing CSV data the first time the database is used
+        handler.import_csv_files()
+        return handler
+
+    if backend == 'feather':
+        # Needs pyarrow, so only imported when selected
+        from .feather_handler import FeatherHandler
+        handler = FeatherHandler(csv_dir, data_dir)
+        # Convert the existing CSVs to typed Feather files the first time
+        handler.migrate_csv_files()
+        return handler
+
+    raise ValueError(f"Unknown storage backend '{backend}', expected one of {STORAGE_BACKENDS}")
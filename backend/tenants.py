@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Set, Tuple
+from .metrics import TENANT_EVICTIONS, TENANT_OPENS
+
+logger = logging.getLogger(__name__)
+
+# Tenant IDs become directory names, so keep them to a safe alphabet
+TENANT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def validate_tenant_id(tenant_id: str) -> str:
+    """The tenant ID if it is usable as a directory name, otherwise ValueError"""
+    if not isinstance(tenant_id, str) or not TENANT_ID_PATTERN.match(tenant_id):
+        raise ValueError("User ID must be 1-64 letters, digits, '-' or '_'")
+    return tenant_id
+
+
+def tenant_data_dir(tenants_dir: str, tenant_id: str) -> str:
+    """Data directory for a tenant: <tenants_dir>/<2-hex-digit shard>/<tenant_id>
+
+    The shard prefix (from a hash of the ID) keeps any one directory to a few thousand
+    entries however many tenants there are.
+    """
+    shard = hashlib.sha1(validate_tenant_id(tenant_id).encode('utf-8')).hexdigest()[:2]
+    return os.path.join(tenants_dir, shard, tenant_id)
+
+
+class TenantPool:
+    """Bounded LRU cache of per-tenant objects (storage handler plus operations)
+
+    open_tenant(tenant_id) builds a tenant's objects the first time they are needed; once
+    more than max_open tenants are open, the least recently used one is handed to
+    close_tenant. Different tenants open in parallel, the same tenant only once.
+
+    acquire() holds a tenant until the matching release(). A tenant evicted while held is
+    retired rather than closed: it is closed by its last release, and handed back out if
+    asked for again before then. A tenant being opened or closed is waited for, so there
+    are never two live copies on the same data directory.
+    """
+
+    def __init__(self, open_tenant: Callable, close_tenant: Callable, max_open: int = 64):
+        self.open_tenant = open_tenant
+        self.close_tenant = close_tenant
+        self.max_open = max(1, max_open)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # Notified when a tenant stops being busy
+        self._entries: OrderedDict = OrderedDict()
+        self._retired: Dict[str, object] = {}  # Evicted, closed when no longer held
+        self._holders: Dict[str, int] = {}  # acquire() calls not yet released, per tenant
+        self._busy: Set[str] = set()  # Tenants being opened or closed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _take(self, tenant_id: str):
+        """An open (or retired) tenant's objects, held; None if it has to be opened. Call with _lock held"""
+        while tenant_id in self._busy:
+            self._changed.wait()
+        entry = self._entries.get(tenant_id)
+        if entry is not None:
+            self._entries.move_to_end(tenant_id)
+        else:
+            entry = self._retired.pop(tenant_id, None)
+            if entry is None:
+                return None
+            self._entries[tenant_id] = entry
+        self._holders[tenant_id] = self._holders.get(tenant_id, 0) + 1
+        return entry
+
+    def _evict(self) -> List[Tuple[str, object]]:
+        """Drop least recently used tenants over max_open; returns those to close now. Call with _lock held"""
+        evicted = []
+        while len(self._entries) > self.max_open:
+            tenant_id, entry = self._entries.popitem(last=False)
+            TENANT_EVICTIONS.inc()
+            if self._holders.get(tenant_id):
+                logger.debug("Retiring tenant in use tenant=%s", tenant_id)
+                self._retired[tenant_id] = entry
+            else:
+                self._busy.add(tenant_id)
+                evicted.append((tenant_id, entry))
+        return evicted
+
+    def _close(self, tenant_id: str, entry):
+        logger.debug("Closing tenant tenant=%s", tenant_id)
+        try:
+            self.close_tenant(entry)
+        except Exception as e:
+            logger.exception("Error closing tenant=%s: %s", tenant_id, e)
+        finally:
+            with self._lock:
+                self._busy.discard(tenant_id)
+                self._changed.notify_all()
+
+    def acquire(self, tenant_id: str):
+        """The tenant's objects, opening them (and evicting the least recently used) if needed
+
+        Every acquire() must be paired with a release(tenant_id).
+        """
+        with self._lock:
+            entry = self._take(tenant_id)
+            opening = entry is None
+            if opening:
+                self._busy.add(tenant_id)
+
+        if opening:
+            try:
+                entry = self.open_tenant(tenant_id)
+            except BaseException:
+                with self._lock:
+                    self._busy.discard(tenant_id)
+                    self._changed.notify_all()
+                raise
+            TENANT_OPENS.inc()
+
+        with self._lock:
+            if opening:
+                self._busy.discard(tenant_id)
+                self._changed.notify_all()
+                self._entries[tenant_id] = entry
+                self._holders[tenant_id] = self._holders.get(tenant_id, 0) + 1
+            evicted = self._evict()
+
+        for evicted_id, evicted_entry in evicted:
+            self._close(evicted_id, evicted_entry)
+        return entry
+
+    def release(self, tenant_id: str):
+        """Give back a tenant from acquire(); closes it if it was evicted meanwhile"""
+        with self._lock:
+            holders = self._holders[tenant_id] - 1
+            if holders:
+                self._holders[tenant_id] = holders
+                return
+            del self._holders[tenant_id]
+            entry = self._retired.pop(tenant_id, None)
+            if entry is None:
+                return
+            self._busy.add(tenant_id)
+        self._close(tenant_id, entry)
+
+    def close_all(self):
+        """Close every open tenant, held or not"""
+        with self._lock:
+            entries = list(self._entries.values()) + list(self._retired.values())
+            self._entries.clear()
+            self._retired.clear()
+        for entry in entries:
+            self.close_tenant(entry)
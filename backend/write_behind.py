@@ -0,0 +1,259 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import pandas as pd
+from typing import Dict, List, Optional
+from .csv_handler import CSVHandler
+from .meal_ingredients import MealIngredients
+from .metrics import WRITE_BEHIND_FLUSHES, WRITE_BEHIND_ROWS
+from .nutrition_rollups import NutritionRollups
+from .serialization import dataframe_to_records, to_json
+
+logger = logging.getLogger(__name__)
+
+# Journal record kind -> (table file attribute on the handler, ID column)
+KINDS = {
+    'meal': ('meals_file', 'meal_id'),
+    'log': ('meal_log_file', 'log_id'),
+    'daily': ('daily_nutrition_file', 'entry_id'),
+}
+
+
+class WriteBehindQueue:
+    """Acknowledge new meals, meal log rows and daily entries at once and persist them from one thread
+
+    Each write gets its ID straight away, is appended to a journal (fsynced) and queued. A
+    background writer waits flush_delay after the first queued write so a burst piles up,
+    then persists everything queued with one append per table, one rollup update and one
+    servings_remaining rewrite, and trims the journal. On startup any journal left by a
+    crash is replayed (rows already in their tables are skipped), so acknowledged writes
+    are never lost.
+
+    Meals are looked up through an in-memory cache that includes queued servings changes.
+    Anything that reads or rewrites these tables calls flush() first (the read barrier).
+    IDs come from the handler's in-memory counters, so only one process should write.
+    """
+
+    def __init__(self, csv_handler: CSVHandler, rollups: NutritionRollups, meal_ingredients: MealIngredients,
+                 journal_file: str, flush_delay: float = 0.05):
+        self.csv_handler = csv_handler
+        self.rollups = rollups
+        self.meal_ingredients = meal_ingredients
+        self.journal_file = journal_file
+        self.flush_delay = flush_delay
+
+        self._lock = threading.Lock()  # Guards the queued state and the journal handle
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()  # One flush at a time (writer thread or a read barrier)
+        self._closing = threading.Event()
+
+        # Queued journal records ({'kind', 'row'}) in submission order, not yet persisted
+        self._pending: List[Dict] = []
+        # Meals queued for creation, and servings consumed by queued daily entries, per meal_id
+        self._pending_meals: Dict[int, Dict] = {}
+        self._pending_servings: Dict[int, float] = {}
+        # Stored meal rows by meal_id, valid while meals is at _meals_version
+        self._meals: Dict[int, Dict] = {}
+        self._meals_version = None
+
+        self._replay()
+        self._journal = open(self.journal_file, 'ab')
+
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _replay(self):
+        """Persist the records of a journal left behind by a crash"""
+        try:
+            with open(self.journal_file, 'rb') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Only the last line can be torn, and its write was never acknowledged
+                logger.warning("Skipping unreadable journal line file=%s", self.journal_file)
+        if not records:
+            return
+
+        # A crash mid-flush can leave some rows persisted and others not
+        partially_flushed = False
+        for kind, (file_attribute, id_column) in KINDS.items():
+            ids = [record['row'][id_column] for record in records if record['kind'] == kind]
+            if not ids:
+                continue
+            stored = self.csv_handler.read_csv(getattr(self.csv_handler, file_attribute))
+            existing = set(pd.to_numeric(stored.get(id_column, pd.Series(dtype=float)), errors='coerce').dropna())
+            before = len(records)
+            records = [record for record in records
+                       if record['kind'] != kind or float(record['row'][id_column]) not in existing]
+            if kind == 'daily' and len(records) < before:
+                partially_flushed = True
+
+        logger.info("Replaying write-behind journal records=%d file=%s", len(records), self.journal_file)
+        if partially_flushed:
+            logger.warning("Journal overlapped persisted daily entries - rebuilding rollups; "
+                           "servings_remaining may be off for that batch")
+            self.rollups.rebuild()
+
+        self._persist(records)
+        os.remove(self.journal_file)
+
+    def _queue(self, record: Dict):
+        row = record['row']
+        self._pending.append(record)
+        if record['kind'] == 'meal':
+            self._pending_meals[int(row['meal_id'])] = row
+        elif record['kind'] == 'daily':
+            meal_id = int(float(row['meal_id']))
+            self._pending_servings[meal_id] = self._pending_servings.get(meal_id, 0.0) + float(row['servings_consumed'])
+
+    def submit(self, kind: str, row: Dict):
+        """Journal a row (its ID already allocated) and queue it for the writer"""
+        record = {'kind': kind, 'row': row}
+        line = to_json(record) + b'\n'
+        with self._lock:
+            self._journal.write(line)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._queue(record)
+            self._wakeup.notify()
+
+    def get_meal(self, meal_id) -> Optional[Dict]:
+        """Meal row including queued meals and queued servings changes, or None"""
+        try:
+            meal_id = int(float(meal_id))
+        except (TypeError, ValueError):
+            return None
+
+        with self._lock:
+            meal = self._pending_meals.get(meal_id)
+            if meal is None:
+                version = self.csv_handler.file_version(self.csv_handler.meals_file)
+                if version != self._meals_version:
+                    # Changed by something other than the writer - one read refills the whole cache
+                    meals = dataframe_to_records(self.csv_handler.read_csv(self.csv_handler.meals_file))
+                    self._meals = {int(float(row['meal_id'])): row for row in meals if row.get('meal_id') is not None}
+                    self._meals_version = version
+                meal = self._meals.get(meal_id)
+            if meal is None:
+                return None
+            consumed = self._pending_servings.get(meal_id, 0.0)
+
+        meal = dict(meal)
+        if consumed and meal.get('servings_remaining') is not None:
+            meal['servings_remaining'] = max(float(meal['servings_remaining']) - consumed, 0.0)
+        return meal
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing.is_set():
+                    self._wakeup.wait()
+                if self._closing.is_set() and not self._pending:
+                    return
+
+            # Let the rest of a burst arrive, then write it all at once (cut short on close)
+            self._closing.wait(self.flush_delay)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception("Write-behind flush failed, will retry: %s", e)
+                if self._closing.is_set():
+                    return  # Still in the journal, replayed on the next start
+                self._closing.wait(1)
+
+    def flush(self) -> int:
+        """Persist everything queued so far (in the caller's thread); returns the rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            servings = self._persist(batch)
+
+            with self._lock:
+                del self._pending[:len(batch)]
+                self._forget(batch)
+                # A loaded meals cache takes the new meals and servings_remaining values rather than a re-read
+                if self._meals_version is not None:
+                    self._meals_version = self.csv_handler.file_version(self.csv_handler.meals_file)
+                    for record in batch:
+                        if record['kind'] == 'meal':
+                            self._meals[int(record['row']['meal_id'])] = dict(record['row'])
+                for meal_id, remaining in servings.items():
+                    if meal_id in self._meals:
+                        self._meals[meal_id]['servings_remaining'] = remaining
+                self._rewrite_journal()
+
+            logger.debug("Write-behind flush rows=%d duration_ms=%.2f", len(batch), (time.perf_counter() - start) * 1000)
+            return len(batch)
+
+    def _persist(self, batch: List[Dict]) -> Dict:
+        """Write a batch of journal records to their tables; returns the new servings_remaining values"""
+        rows = {kind: [record['row'] for record in batch if record['kind'] == kind] for kind in KINDS}
+
+        # Meals' ingredient lines go first, so no meal is ever stored without them
+        if rows['meal']:
+            self.meal_ingredients.add(rows['meal'])
+        for kind, (file_attribute, _) in KINDS.items():
+            if rows[kind]:
+                self.csv_handler.append_rows(rows[kind], getattr(self.csv_handler, file_attribute))
+                WRITE_BEHIND_ROWS.inc(kind, amount=len(rows[kind]))
+        WRITE_BEHIND_FLUSHES.inc()
+
+        if not rows['daily']:
+            return {}
+        entries = pd.DataFrame(rows['daily'])
+        self.rollups.apply(entries)
+        consumed = entries.groupby(entries['meal_id'].astype(float).astype(int))['servings_consumed'].sum()
+        return self.csv_handler.apply_servings_changes({meal_id: -value for meal_id, value in consumed.items()})
+
+    def _forget(self, batch: List[Dict]):
+        """Drop persisted records from the queued meals and servings"""
+        for record in batch:
+            row = record['row']
+            if record['kind'] == 'meal':
+                self._pending_meals.pop(int(row['meal_id']), None)
+            elif record['kind'] == 'daily':
+                meal_id = int(float(row['meal_id']))
+                remaining = self._pending_servings.get(meal_id, 0.0) - float(row['servings_consumed'])
+                if abs(remaining) < 1e-9:
+                    self._pending_servings.pop(meal_id, None)
+                else:
+                    self._pending_servings[meal_id] = remaining
+
+    def _rewrite_journal(self):
+        """Replace the journal with the records still queued (usually none)"""
+        temp_file = self.journal_file + '.tmp'
+        with open(temp_file, 'wb') as f:
+            for record in self._pending:
+                f.write(to_json(record) + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(temp_file, self.journal_file)
+        self._journal = open(self.journal_file, 'ab')
+
+    def close(self):
+        """Stop the writer after it has persisted everything queued"""
+        with self._lock:
+            if self._closing.is_set():
+                return
+            self._closing.set()
+            self._wakeup.notify()
+        atexit.unregister(self.close)
+        self._thread.join()
+        self.flush()
+        with self._lock:
+            self._journal.close()
@@ -0,0 +1,216 @@
+"""Benchmarks for the backend operations and API routes on synthetic data
+
+    python benchmarks/run_benchmarks.py --daily 100000 --output results.json
+    python benchmarks/run_benchmarks.py --daily 100000 --compare results.json
+
+Generates a data set in a temp dir (see synthetic_data.py), times each operation and
+reports throughput plus latency percentiles (milliseconds) as JSON. --compare prints the
+change in p50/p95 against an earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from synthetic_data import generate, scale_sizes  # noqa: E402
+
+
+def summarise(latencies: List[float]) -> Dict:
+    """Throughput and latency percentiles (ms) for a list of per-call durations in seconds"""
+    ms = np.array(latencies) * 1000
+    total = float(np.sum(latencies))
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': round(len(latencies) / total, 2) if total else None,
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p90_ms': round(float(np.percentile(ms, 90)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+def measure(operation: Callable[[int], object], iterations: int, warmup: int = 2) -> Dict:
+    """Call operation(i) iterations times (after a warmup) and summarise the timings"""
+    for i in range(warmup):
+        operation(-1 - i)
+
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - start)
+    return summarise(latencies)
+
+
+def check(response):
+    """Fail loudly if a route errors, rather than timing error pages"""
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def run(data_dir: str, backend: str, iterations: int, seed: int, write_behind: bool = False) -> Dict:
+    """Time every benchmarked operation against the data set in data_dir"""
+    # Keep per-request logging out of the timings
+    os.environ.setdefault('NUTRITION_LOG_LEVEL', 'WARNING')
+
+    start = time.perf_counter()
+    from app import create_app
+    app = create_app({
+        'CSV_DIR': data_dir,
+        'DATA_DIR': os.path.join(data_dir, 'data'),
+        'STORAGE_BACKEND': backend,
+        'WRITE_BEHIND': write_behind,
+    })
+    startup_seconds = time.perf_counter() - start
+
+    client = app.test_client()
+    services = app.extensions['nutrition']
+    start = time.perf_counter()
+    handler = services.csv_handler  # Storage loads on first use
+    storage_seconds = time.perf_counter() - start
+    ingredient_ops = services.ingredient_ops
+    meal_ops = services.meal_ops
+
+    rng = random.Random(seed)
+    ingredient_names = ingredient_ops.catalog.dataframe['name'].tolist()
+    meal_ids = [int(meal_id) for meal_id in handler.read_csv(handler.meals_file)['meal_id'].dropna()]
+    dates = sorted(handler.read_csv(handler.daily_nutrition_file)['date'].dropna().unique().tolist())
+    bench_date = '2099-01-01'  # Days the benchmarks add to, away from the generated history
+
+    def random_ingredients():
+        return [{'name': rng.choice(ingredient_names), 'quantity': rng.randint(10, 300)}
+                for _ in range(rng.randint(2, 8))]
+
+    # Daily targets for the meal planner
+    plan_targets = {'calories': 2200, 'protein': 110, 'fat': 70, 'carbs': 260}
+    plan_limits = {'sodium': 2300}
+
+    # Distinct generated days for clear_daily_nutrition to wipe, one per call
+    days_to_clear = list(reversed(dates))
+
+    results = {}
+    operations = {
+        'calculate_nutrition': lambda i: ingredient_ops.calculate_nutrition(rng.choice(ingredient_names), 150),
+        'create_meal': lambda i: meal_ops.create_meal(f"Bench meal {i}", 4, random_ingredients()),
+        'add_meal_to_daily_nutrition': lambda i: meal_ops.add_meal_to_daily_nutrition(bench_date, rng.choice(meal_ids), 0.5),
+        'get_daily_nutrition': lambda i: meal_ops.get_daily_nutrition(rng.choice(dates)),
+        'clear_daily_nutrition': lambda i: meal_ops.clear_daily_nutrition(days_to_clear.pop() if days_to_clear else bench_date),
+        'plan_meals (7 days)': lambda i: meal_ops.plan_meals(plan_targets, plan_limits, 7),
+        'plan_meals (14 days)': lambda i: meal_ops.plan_meals(plan_targets, plan_limits, 14),
+        'GET /api/ingredients?limit=50': lambda i: check(client.get('/api/ingredients?limit=50')),
+        'GET /api/ingredients/search': lambda i: check(client.get(f"/api/ingredients/search?q={rng.choice(ingredient_names)[:4]}")),
+        'POST /api/calculate-nutrition': lambda i: check(client.post(
+            '/api/calculate-nutrition', json={'name': rng.choice(ingredient_names), 'quantity': 150})),
+        'GET /api/meals?limit=50': lambda i: check(client.get('/api/meals?limit=50')),
+        'POST /api/meals': lambda i: check(client.post(
+            '/api/meals', json={'meal_name': f"Bench route meal {i}", 'servings': 2, 'ingredients': random_ingredients()})),
+        'GET /api/daily-nutrition/<date>': lambda i: check(client.get(f"/api/daily-nutrition/{rng.choice(dates)}")),
+        'POST /api/daily-nutrition/<date>': lambda i: check(client.post(
+            f"/api/daily-nutrition/{bench_date}", json={'meal_id': rng.choice(meal_ids), 'servings': 0.5})),
+        'GET /api/nutrition-summary (90 days)': lambda i: check(client.get(
+            f"/api/nutrition-summary?from={dates[max(len(dates) - 90, 0)]}&to={dates[-1]}")),
+        'POST /api/meal-plan (7 days)': lambda i: check(client.post(
+            '/api/meal-plan', json={'targets': plan_targets, 'limits': plan_limits, 'days': 7})),
+        'GET /api/ingredient-consumption (90 days)': lambda i: check(client.get(
+            f"/api/ingredient-consumption?from={dates[max(len(dates) - 90, 0)]}&to={dates[-1]}&limit=50")),
+        'GET /api/ingredient-consumption (all)': lambda i: check(client.get('/api/ingredient-consumption?limit=50')),
+    }
+
+    for name, operation in operations.items():
+        results[name] = measure(operation, iterations)
+        print(f"{name:40s} p50 {results[name]['p50_ms']:9.3f}ms  p95 {results[name]['p95_ms']:9.3f}ms  "
+              f"{results[name]['ops_per_sec']} ops/s", file=sys.stderr)
+
+    results['app_startup'] = {'seconds': round(startup_seconds, 3)}
+    results['storage_load'] = {'seconds': round(storage_seconds, 3)}
+    return results
+
+
+def compare(current: Dict, baseline: Dict):
+    """Print the p50 / p95 change of each operation against a baseline results file"""
+    print(f"{'operation':40s} {'p50 base':>10s} {'p50 now':>10s} {'change':>8s} {'p95 change':>11s}")
+    for name, stats in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or 'p50_ms' not in stats:
+            continue
+        p50_change = (stats['p50_ms'] - base['p50_ms']) / base['p50_ms'] * 100 if base['p50_ms'] else 0
+        p95_change = (stats['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100 if base['p95_ms'] else 0
+        print(f"{name:40s} {base['p50_ms']:10.3f} {stats['p50_ms']:10.3f} {p50_change:+7.1f}% {p95_change:+10.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--daily', type=int, default=10000, help='daily_nutrition rows, 1k to 1M (sets the other sizes)')
+    parser.add_argument('--ingredients', type=int, help='ingredient rows')
+    parser.add_argument('--meals', type=int, help='meal rows')
+    parser.add_argument('--iterations', type=int, default=50, help='timed calls per operation')
+    parser.add_argument('--backend', default='csv', help='storage backend: csv, sqlite or feather')
+    parser.add_argument('--write-behind', action='store_true', help='queue writes and persist them in the background')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results JSON here (printed to stdout otherwise)')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--keep', action='store_true', help="don't delete the generated data")
+    args = parser.parse_args()
+
+    sizes = scale_sizes(args.daily)
+    sizes['ingredients'] = args.ingredients or sizes['ingredients']
+    sizes['meals'] = args.meals or sizes['meals']
+
+    data_dir = tempfile.mkdtemp(prefix='nutrition_bench_')
+    try:
+        start = time.perf_counter()
+        rows = generate(data_dir, seed=args.seed, **sizes)
+        print(f"Generated {rows} in {time.perf_counter() - start:.1f}s at {data_dir}", file=sys.stderr)
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'backend': args.backend,
+                'write_behind': args.write_behind,
+                'rows': rows,
+                'iterations': args.iterations,
+                'seed': args.seed,
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+            },
+            'results': run(data_dir, args.backend, args.iterations, args.seed, args.write_behind),
+        }
+    finally:
+        if args.keep:
+            print(f"Kept data in {data_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
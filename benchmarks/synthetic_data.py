@@ -0,0 +1,148 @@
+"""Synthetic ingredients / meals / daily nutrition data for the benchmarks
+
+    python benchmarks/synthetic_data.py /tmp/nutrition_bench --daily 100000
+
+writes <target>/ingredients.csv and <target>/data/{meals,meal_log,daily_nutrition}.csv
+in the same layout as the real app's data.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.csv_handler import MEAL_LOG_COLUMNS, CONSUMED_COLUMNS  # noqa: E402
+from backend.ingredient_catalog import NUTRIENT_COLUMNS  # noqa: E402
+
+# Typical nutrients per 100g (calories, protein, fat, sat fat, carbs, sugars, fibre, sodium, calcium)
+NUTRIENT_SCALES = np.array([250, 10, 10, 4, 30, 10, 3, 300, 100], dtype=float)
+
+MAX_INGREDIENTS_PER_MEAL = 8
+
+WORDS = [
+    'chicken', 'beef', 'rice', 'pasta', 'tomato', 'yoghurt', 'banana', 'apple', 'oats', 'milk',
+    'cheese', 'egg', 'bread', 'spinach', 'carrot', 'potato', 'salmon', 'tuna', 'lentils', 'beans',
+    'almond', 'peanut', 'honey', 'butter', 'olive', 'onion', 'garlic', 'pepper', 'mushroom', 'corn'
+]
+BRANDS = ['Farmers Union', 'Coles', 'Woolworths', 'Aldi', 'Homebrand', 'Organic', 'Fresh', 'Light']
+
+
+def scale_sizes(daily_rows: int) -> Dict[str, int]:
+    """Default table sizes for a daily_nutrition row count"""
+    return {
+        'ingredients': int(min(max(daily_rows // 20, 200), 50000)),
+        'meals': int(max(daily_rows // 10, 50)),
+        'daily': int(daily_rows),
+    }
+
+
+def generate_ingredients(rng: np.random.Generator, count: int) -> pd.DataFrame:
+    first = rng.choice(WORDS, count)
+    second = rng.choice(WORDS, count)
+    brand = rng.choice(BRANDS, count)
+    names = pd.Series([f"{a.title()} {b.title()} {c} {i}" for i, (a, b, c) in enumerate(zip(first, second, brand))])
+
+    nutrients = rng.gamma(2.0, 0.5, size=(count, len(NUTRIENT_COLUMNS))) * NUTRIENT_SCALES
+    df = pd.DataFrame(nutrients.round(2), columns=NUTRIENT_COLUMNS)
+    df.insert(0, 'name', names)
+    df.insert(1, 'unit_size', 100)
+    df.insert(2, 'unit_def', 'g')
+    return df
+
+
+def generate_meals(rng: np.random.Generator, ingredients: pd.DataFrame, count: int) -> pd.DataFrame:
+    """Meals of 2-8 random ingredients, with totals computed from the ingredient nutrients"""
+    per_gram = ingredients[NUTRIENT_COLUMNS].to_numpy() / 100.0
+    picks = rng.integers(0, len(ingredients), size=(count, MAX_INGREDIENTS_PER_MEAL))
+    grams = rng.integers(10, 300, size=(count, MAX_INGREDIENTS_PER_MEAL)).astype(float)
+    sizes = rng.integers(2, MAX_INGREDIENTS_PER_MEAL + 1, size=count)
+    grams[np.arange(MAX_INGREDIENTS_PER_MEAL) >= sizes[:, None]] = 0
+
+    totals = np.einsum('mi,min->mn', grams, per_gram[picks]).round(2)
+    servings = rng.integers(1, 9, size=count)
+    names = ingredients['name'].to_numpy()
+
+    df = pd.DataFrame({
+        'meal_id': np.arange(1, count + 1),
+        'meal_name': [f"Meal {i}" for i in range(1, count + 1)],
+        'servings': servings,
+        'ingredients_list': [json.dumps(names[picks[m, :sizes[m]]].tolist()) for m in range(count)],
+        'quantities_list': [json.dumps(grams[m, :sizes[m]].astype(int).tolist()) for m in range(count)],
+    })
+    for i, column in enumerate(NUTRIENT_COLUMNS):
+        df[f'total_{column}'] = totals[:, i]
+    per_serving_names = {
+        'dietary_fibre_g': 'dietary_fibre', 'sodium_mg': 'sodium', 'calcium_mg': 'calcium'
+    }
+    for i, column in enumerate(NUTRIENT_COLUMNS):
+        df[f"{per_serving_names.get(column, column)}_per_serving"] = (totals[:, i] / servings).round(2)
+    df['created_date'] = '2025-01-01 12:00:00'
+    # Plenty left so benchmarked additions never run out
+    df['servings_remaining'] = 1e9
+    return df
+
+
+def generate_daily_nutrition(rng: np.random.Generator, meals: pd.DataFrame, count: int,
+                             days: int = 730) -> pd.DataFrame:
+    """Entries spread over the last `days` days, a few per day"""
+    rows = rng.integers(0, len(meals), size=count)
+    servings = rng.choice([0.5, 1.0, 1.5, 2.0], size=count)
+    start = date.today() - timedelta(days=days)
+    dates = pd.to_datetime(start) + pd.to_timedelta(rng.integers(0, days, size=count), unit='D')
+
+    per_serving = meals.filter(like='_per_serving').to_numpy()[rows]
+    df = pd.DataFrame({
+        'entry_id': np.arange(1, count + 1),
+        'date': dates.strftime('%Y-%m-%d'),
+        'meal_id': meals['meal_id'].to_numpy()[rows],
+        'meal_name': meals['meal_name'].to_numpy()[rows],
+        'servings_consumed': servings,
+    })
+    consumed = (per_serving * servings[:, None]).round(2)
+    for i, column in enumerate(CONSUMED_COLUMNS):
+        df[column] = consumed[:, i]
+    df['added_timestamp'] = df['date'] + ' 12:00:00'
+    return df.sort_values(['date', 'entry_id'], kind='stable')
+
+
+def generate(target_dir: str, ingredients: int, meals: int, daily: int, seed: int = 0) -> Dict[str, int]:
+    """Write a full synthetic data set into target_dir and return the row counts"""
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(target_dir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    ingredients_df = generate_ingredients(rng, ingredients)
+    meals_df = generate_meals(rng, ingredients_df, meals)
+    daily_df = generate_daily_nutrition(rng, meals_df, daily)
+
+    ingredients_df.to_csv(os.path.join(target_dir, 'ingredients.csv'), index=False)
+    meals_df.to_csv(os.path.join(data_dir, 'meals.csv'), index=False)
+    daily_df.to_csv(os.path.join(data_dir, 'daily_nutrition.csv'), index=False)
+    pd.DataFrame(columns=MEAL_LOG_COLUMNS).to_csv(os.path.join(data_dir, 'meal_log.csv'), index=False)
+
+    return {'ingredients': len(ingredients_df), 'meals': len(meals_df), 'daily': len(daily_df)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('target_dir')
+    parser.add_argument('--daily', type=int, default=10000, help='daily_nutrition rows (sets the other sizes)')
+    parser.add_argument('--ingredients', type=int, help='ingredient rows')
+    parser.add_argument('--meals', type=int, help='meal rows')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = scale_sizes(args.daily)
+    sizes['ingredients'] = args.ingredients or sizes['ingredients']
+    sizes['meals'] = args.meals or sizes['meals']
+    print(json.dumps(generate(args.target_dir, seed=args.seed, **sizes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,12 @@ let dailyNutritionEntries = [];
 let selectedMeal = null;
 let currentDate = '';
 
+// Meal fields used by the dropdown and the preview
+const MEAL_FIELDS = [
+    'meal_id', 'meal_name', 'servings', 'servings_remaining', 'calories_per_serving',
+    'protein_per_serving', 'fat_total_per_serving', 'carbohydrate_per_serving'
+];
+
 // Initialize page when loaded
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Daily Nutrition page loaded');
@@ -21,7 +27,8 @@ document.addEventListener('DOMContentLoaded', function() {
 async function loadMeals() {
     try {
         console.log('Loading meals...');
-        const response = await fetch('/api/meals');
+        // Only the fields this page shows - the browser revalidates with the ETag on each load
+        const response = await fetch(`/api/meals?fields=${MEAL_FIELDS.join(',')}`);
 
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
@@ -1,69 +1,69 @@
 let ingredients = [];
 let currentMealIngredients = [];
 let currentIngredient = null;
+let searchTimer = null;
 
-// Load ingredients when page loads
-document.addEventListener('DOMContentLoaded', function() {
-    console.log('Page loaded, checking if ingredients needed...');
-
-    // Only load ingredients if we're on the create meal page (check for ingredientSelect element)
-    const ingredientSelect = document.getElementById('ingredientSelect');
-    if (ingredientSelect) {
-        console.log('Create meal page detected, loading ingredients...');
-        loadIngredients();
-    } else {
-        console.log('Not on create meal page, skipping ingredient loading');
+// Wait this long after the last keystroke before searching
+const SEARCH_DELAY_MS = 150;
+const SEARCH_LIMIT = 25;
+
+function onIngredientSearch() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(searchIngredients, SEARCH_DELAY_MS);
+}
+
+async function searchIngredients() {
+    const query = document.getElementById('ingredientSearch').value.trim();
+
+    if (!query) {
+        ingredients = [];
+        populateIngredientSelect('Type above to search...');
+        return;
     }
-});
 
-async function loadIngredients() {
     try {
-        console.log('Fetching ingredients from /api/ingredients');
-        const response = await fetch('/api/ingredients');
-
-        console.log('Response status:', response.status);
+        const response = await fetch(`/api/ingredients/search?q=${encodeURIComponent(query)}&limit=${SEARCH_LIMIT}`);
 
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const responseText = await response.text();
-        console.log('Raw response:', responseText);
-
-        // Try to parse as JSON
-        ingredients = JSON.parse(responseText);
-        console.log('Parsed ingredients:', ingredients);
-
-        const select = document.getElementById('ingredientSelect');
+        const results = await response.json();
 
-        // Double-check the element exists (defensive programming)
-        if (!select) {
-            console.log('ingredientSelect element not found, skipping dropdown population');
+        // Ignore stale responses if the user kept typing
+        if (document.getElementById('ingredientSearch').value.trim() !== query) {
             return;
         }
 
-        select.innerHTML = '<option value="">Choose an ingredient...</option>';
-
-        ingredients.forEach(ingredient => {
-            const option = document.createElement('option');
-            option.value = ingredient.name;
-            option.textContent = ingredient.name;
-            select.appendChild(option);
-        });
+        ingredients = results;
+        populateIngredientSelect(results.length ? `${results.length} match(es) - choose one...` : 'No matching ingredients');
 
-        console.log(`Loaded ${ingredients.length} ingredients into dropdown`);
+        // Pick the top match straight away so Enter/Add works without touching the dropdown
+        if (results.length > 0) {
+            document.getElementById('ingredientSelect').value = results[0].name;
+            onIngredientSelect();
+        }
 
     } catch (error) {
-        console.error('Error details:', error);
-
-        // Only show message if we have a messageArea element (i.e., we're on the right page)
-        const messageArea = document.getElementById('messageArea');
-        if (messageArea) {
-            showMessage('Error loading ingredients: ' + error.message, 'danger');
-        }
+        console.error('Error searching ingredients:', error);
+        showMessage('Error searching ingredients: ' + error.message, 'danger');
     }
 }
 
+function populateIngredientSelect(placeholder) {
+    const select = document.getElementById('ingredientSelect');
+    select.innerHTML = `<option value="">${placeholder}</option>`;
+
+    ingredients.forEach(ingredient => {
+        const option = document.createElement('option');
+        option.value = ingredient.name;
+        option.textContent = ingredient.name;
+        select.appendChild(option);
+    });
+
+    onIngredientSelect();
+}
+
 function onIngredientSelect() {
     const select = document.getElementById('ingredientSelect');
     const selectedName = select.value;
@@ -113,7 +113,9 @@ async function addIngredient() {
 
         // Clear inputs
         document.getElementById('quantityInput').value = '';
-        document.getElementById('ingredientSelect').value = '';
+        document.getElementById('ingredientSearch').value = '';
+        ingredients = [];
+        populateIngredientSelect('Type above to search...');
         document.getElementById('unitDisplay').textContent = 'Select ingredient first';
         document.getElementById('addIngredientBtn').disabled = true;
         currentIngredient = null;
@@ -0,0 +1,22 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Tests import the app and backend package from the project folder
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+# The ingredient catalog shipped with the app
+INGREDIENTS_CSV = os.path.join(PROJECT_DIR, 'ingredients.csv')
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Test client for an app with the shipped catalog and an empty data directory"""
+    from app import create_app
+
+    shutil.copy(INGREDIENTS_CSV, tmp_path / 'ingredients.csv')
+    app = create_app({'CSV_DIR': str(tmp_path), 'DATA_DIR': str(tmp_path / 'data'), 'STORAGE_BACKEND': 'csv'})
+    return app.test_client()
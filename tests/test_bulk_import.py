@@ -0,0 +1,52 @@
+import pytest
+
+from backend.bulk_import import parse_daily_entry, parse_meal
+
+
+@pytest.mark.parametrize('servings', ['nan', 'inf', '-inf', float('nan'), float('inf'), 0, -1])
+def test_daily_entry_rejects_non_positive_or_non_finite_servings(servings):
+    with pytest.raises(ValueError, match='servings'):
+        parse_daily_entry({'date': '2024-01-01', 'meal_id': 1, 'servings': servings})
+
+
+def test_daily_entry_servings_default_to_one():
+    assert parse_daily_entry({'date': '2024-01-01', 'meal_id': '2'}) == {'date': '2024-01-01', 'meal_id': 2, 'servings': 1.0}
+
+
+def known_ingredient(name):
+    return name in ('Oats', 'Milk')
+
+
+def meal_record(oats_quantity):
+    return {'meal_name': 'Porridge', 'servings': 2,
+            'ingredients': [{'name': 'Oats', 'quantity': oats_quantity}, {'name': 'Milk', 'quantity': 250}]}
+
+
+@pytest.mark.parametrize('quantity', [-5, 0, 'nan', 'inf', float('nan'), float('-inf')])
+def test_meal_rejects_non_positive_or_non_finite_quantities(quantity):
+    with pytest.raises(ValueError, match='quantity for Oats'):
+        parse_meal(meal_record(quantity), known_ingredient)
+
+
+def test_meal_rejects_bad_quantities_from_csv_columns():
+    record = {'meal_name': 'Porridge', 'ingredients_list': '["Oats", "Milk"]', 'quantities_list': '[40, -1]'}
+    with pytest.raises(ValueError, match='quantity for Milk'):
+        parse_meal(record, known_ingredient)
+
+
+def test_meal_accepts_positive_quantities():
+    parsed = parse_meal(meal_record('40'), known_ingredient)
+    assert parsed['ingredients'] == [{'name': 'Oats', 'quantity': 40.0}, {'name': 'Milk', 'quantity': 250.0}]
+    assert parsed['servings'] == 2
+
+
+def test_meal_import_with_a_bad_quantity_imports_nothing(client):
+    meals = [
+        {'meal_name': 'Good', 'ingredients': [{'name': 'Chicken Breast', 'quantity': 200}]},
+        {'meal_name': 'Negative', 'ingredients': [{'name': 'Chicken Breast', 'quantity': -200}]},
+        {'meal_name': 'Infinite', 'ingredients': [{'name': 'Chicken Breast', 'quantity': 'inf'}]},
+    ]
+    response = client.post('/api/meals/bulk', json=meals)
+    assert response.status_code == 400
+    assert [error['row'] for error in response.get_json()['errors']] == [1, 2]
+    assert client.get('/api/meals').get_json() == []
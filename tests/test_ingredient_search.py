@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from backend.ingredient_search import IngredientSearchIndex
+from conftest import INGREDIENTS_CSV
+
+
+@pytest.fixture(scope='module')
+def names():
+    return pd.read_csv(INGREDIENTS_CSV)['name'].tolist()
+
+
+@pytest.fixture(scope='module')
+def index(names):
+    return IngredientSearchIndex(names)
+
+
+def search(index, names, query, limit=20):
+    return [names[position] for position in index.search(query, limit)]
+
+
+@pytest.mark.parametrize('query, word', [
+    ('yoghrt', 'yoghurt'),
+    ('tomatos', 'tomato'),
+    ('mushrom', 'mushroom'),
+    ('chese', 'cheese'),
+])
+def test_single_word_typos_match_multi_word_names(index, names, query, word):
+    results = search(index, names, query)
+    assert results
+    assert word in results[0].lower()
+    assert len(results[0].split()) > 1
+
+
+def test_typo_alongside_an_exact_word(index, names):
+    results = search(index, names, 'chicken brest')
+    assert results[0] == 'Chicken Breast'
+
+
+def test_prefix_matches_rank_before_fuzzy_ones(index, names):
+    results = search(index, names, 'chicken')
+    assert all(name.lower().startswith('chicken') for name in results[:3])
+
+
+def test_unrelated_query_matches_nothing(index, names):
+    assert search(index, names, 'xyzzy') == []
@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from backend.meal_planner import MealPlanner
+
+
+@pytest.mark.parametrize('meals', [pd.DataFrame(), pd.DataFrame(columns=['meal_name']), pd.DataFrame({'meal_name': ['Toast']})])
+def test_no_usable_meals_plans_nothing(meals):
+    plan = MealPlanner(meals).plan({'calories': 2000}, days=2)
+    assert plan['meals_considered'] == 0
+    assert [day['meals'] for day in plan['days']] == [[], []]
+
+
+def test_meal_plan_with_an_empty_meals_table(client, tmp_path):
+    assert client.get('/api/meals').get_json() == []
+    (tmp_path / 'data' / 'meals.csv').write_text('')  # No header, not even meal_id
+
+    response = client.post('/api/meal-plan', json={'targets': {'calories': 2000}, 'days': 3})
+    assert response.status_code == 200
+    plan = response.get_json()
+    assert plan['meals_considered'] == 0
+    assert len(plan['days']) == 3
@@ -0,0 +1,18 @@
+import os
+
+from backend.csv_handler import CSVHandler
+from backend.metrics import STORAGE_BYTES
+
+
+def test_appends_count_the_bytes_they_add(tmp_path):
+    handler = CSVHandler(str(tmp_path), str(tmp_path))
+    table = str(tmp_path / 'notes.csv')
+    before = STORAGE_BYTES.value('append', 'notes')
+
+    handler.append_rows([{'note_id': 1, 'text': 'first'}], table)
+    created = os.path.getsize(table)
+    assert STORAGE_BYTES.value('append', 'notes') - before == created
+
+    handler.append_rows([{'note_id': 2, 'text': 'second'}, {'note_id': 3, 'text': 'third'}], table)
+    assert STORAGE_BYTES.value('append', 'notes') - before == os.path.getsize(table)
+    assert os.path.getsize(table) > created
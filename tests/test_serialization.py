@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import serialization
+from backend.serialization import to_json
+
+PAYLOAD = {
+    'total': float('nan'),
+    'values': [1.5, float('inf'), -float('inf'), np.float64('nan'), np.float32('nan'), np.int64(3)],
+    'nested': ({'calories': float('nan'), 'name': 'Oats'},),
+}
+EXPECTED = {
+    'total': None,
+    'values': [1.5, None, None, None, None, 3],
+    'nested': [{'calories': None, 'name': 'Oats'}],
+}
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    if request.param == 'json':
+        monkeypatch.setattr(serialization, 'orjson', None)
+    elif serialization.orjson is None:
+        pytest.skip('orjson is not installed')
+    return request.param
+
+
+def test_non_finite_floats_become_null(encoder):
+    output = to_json(PAYLOAD)
+    assert b'NaN' not in output and b'Infinity' not in output
+    assert json.loads(output) == EXPECTED
+
+
+def test_dataframe_missing_values_become_null(encoder):
+    df = pd.DataFrame({'name': ['Oats', 'nan'], 'calories': [389.0, np.nan]})
+    assert json.loads(to_json(df)) == [{'name': 'Oats', 'calories': 389.0}, {'name': None, 'calories': None}]
+
+
+def test_json_fallback_refuses_to_write_nan(monkeypatch):
+    monkeypatch.setattr(serialization, 'orjson', None)
+    monkeypatch.setattr(serialization, '_finite', lambda payload: payload)
+    with pytest.raises(ValueError):
+        to_json({'total': float('nan')})